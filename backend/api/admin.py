@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Proyecto, Tecnologia, Producto, Contacto
+from django.shortcuts import redirect, render
+from . import cache_backends
+from .models import Proyecto, Tecnologia, Producto, Contacto, CorreoPendiente
 from .models import Post
 
 @admin.register(Proyecto)
@@ -24,6 +27,14 @@ class ContactoAdmin(admin.ModelAdmin):
     list_filter = ['fecha']
     search_fields = ['ticket', 'nombre', 'apellido', 'correo']
     readonly_fields = ['fecha']
+    ordering = ['-fecha']
+
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'destinatario', 'estado', 'intentos', 'proximo_intento', 'enviado']
+    list_filter = ['estado']
+    search_fields = ['clave', 'destinatario']
+    readonly_fields = ['clave', 'creado', 'enviado', 'id_proveedor', 'ultimo_error']
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -31,4 +42,20 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ['categoria', 'estado', 'publicado', 'destacado']
     search_fields = ['titulo', 'resumen', 'contenido']
     prepopulated_fields = {'slug': ('titulo',)}
-    list_editable = ['publicado', 'destacado']
\ No newline at end of file
+    list_editable = ['publicado', 'destacado']
+
+def estadisticas_cache(request):
+    """Tamaño y tasa de aciertos de cada namespace de la cache (solo staff, ver backend/urls.py)"""
+    if request.method == 'POST':
+        cache_backends.reiniciar_contadores()
+        return redirect(request.path)
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Cache',
+        'namespaces': cache_backends.resumen(),
+        'redis': settings.CACHE_BACKEND == 'redis',
+        'ubicacion': settings.CACHE_DIR,
+        'prefijo': settings.CACHE_KEY_PREFIX,
+        'version': settings.CACHE_VERSION,
+    }
+    return render(request, 'admin/cache.html', context)
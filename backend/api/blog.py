@@ -0,0 +1,47 @@
+import html
+import math
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Velocidad de lectura promedio en español (palabras por minuto)
+PALABRAS_POR_MINUTO = 200
+PALABRAS_EXTRACTO = 40
+LARGO_EXTRACTO = 300
+
+# Campos de Post que forman el documento de búsqueda (además del título, indexado aparte)
+CAMPOS_BUSQUEDA_POST = ['resumen', 'contenido', 'tags', 'keywords']
+
+_ESPACIOS_RE = re.compile(r'\s+')
+# Cierre de bloques HTML: se reemplaza por espacio para no pegar palabras de párrafos distintos
+_BLOQUE_RE = re.compile(r'</(p|div|h[1-6]|li|blockquote|pre|tr)>|<br\s*/?>', re.IGNORECASE)
+
+
+def texto_plano(contenido):
+    """Texto del artículo sin HTML ni espacios repetidos"""
+    texto = strip_tags(_BLOQUE_RE.sub(' ', contenido or ''))
+    return _ESPACIOS_RE.sub(' ', html.unescape(texto)).strip()
+
+
+def tiempo_lectura(texto):
+    """Minutos estimados de lectura (mínimo 1)"""
+    return max(1, math.ceil(len(texto.split()) / PALABRAS_POR_MINUTO))
+
+
+def extracto(texto):
+    """Primeras palabras del artículo para las tarjetas del índice"""
+    return Truncator(texto).words(PALABRAS_EXTRACTO)[:LARGO_EXTRACTO]
+
+
+def campos_derivados(contenido):
+    """Valores de Post.tiempo_lectura y Post.extracto para un contenido HTML"""
+    texto = texto_plano(contenido)
+    return {'tiempo_lectura': tiempo_lectura(texto), 'extracto': extracto(texto)}
+
+
+def documento_busqueda(post):
+    """Texto plano (sin HTML) que indexa la búsqueda del blog: resumen, contenido, tags y keywords"""
+    tags = post.tags if isinstance(post.tags, list) else []
+    partes = [post.resumen, texto_plano(post.contenido), ' '.join(str(t) for t in tags), post.keywords]
+    return ' '.join(p for p in partes if p)
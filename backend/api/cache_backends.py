@@ -0,0 +1,249 @@
+"""
+Backends de cache con contadores de aciertos/fallos por namespace.
+Cada namespace es un alias de CACHES (ver settings) con su propio KEY_PREFIX,
+así que se puede medir y vaciar por separado.
+
+Los backends con `atomico = True` garantizan que add(), incr() y actualizar()
+son atómicos entre procesos: Redis siempre, archivos entre los workers de un nodo.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends import filebased, redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, el backend de archivos no es atómico
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto un proceso suma sus contadores locales a los compartidos
+VOLCADO = 10
+STATS_KEY = 'cache:stats:{}:{}'
+# Contadores por namespace: aciertos y fallos de get(), más los que suma la aplicación
+# (entradas vencidas servidas y misses coalescidos de api.pokemon_cache)
+TIPOS = ('hit', 'miss', 'stale', 'coalesced_local', 'coalesced_remote')
+# Límite de claves recorridas al medir un namespace en Redis
+MAX_CLAVES_SCAN = 100_000
+MUESTRA_MEMORIA = 200
+# Archivos de lock por directorio del backend de archivos (las claves se reparten por hash)
+BLOQUEOS = 64
+
+_AUSENTE = object()
+_local = threading.local()
+_contadores = Counter()
+_contadores_lock = threading.Lock()
+_ultimo_volcado = time.monotonic()
+
+
+@contextmanager
+def sin_contar():
+    """Lecturas internas (locks, incr(), get_or_set()) que no son aciertos de la aplicación"""
+    anterior = getattr(_local, 'pausado', False)
+    _local.pausado = True
+    try:
+        yield
+    finally:
+        _local.pausado = anterior
+
+
+def contar(namespace, tipo, cantidad=1):
+    """Suma un contador de TIPOS en memoria; se vuelcan a la cache compartida cada VOLCADO segundos"""
+    global _ultimo_volcado
+    if getattr(_local, 'pausado', False):
+        return
+    with _contadores_lock:
+        _contadores[(namespace, tipo)] += cantidad
+        if time.monotonic() - _ultimo_volcado < VOLCADO:
+            return
+        _ultimo_volcado = time.monotonic()
+    volcar()
+
+
+def volcar():
+    """Suma los contadores de este proceso a los compartidos (alias 'default')"""
+    with _contadores_lock:
+        pendientes = dict(_contadores)
+        _contadores.clear()
+    destino = caches['default']
+    for (namespace, tipo), cantidad in pendientes.items():
+        key = STATS_KEY.format(namespace, tipo)
+        # add() + incr() en vez de incr() + set(): dos workers no se pisan el primer valor
+        destino.add(key, 0, None)
+        destino.incr(key, cantidad)
+
+
+class NamespaceMixin:
+    """Cuenta aciertos y fallos de get() bajo el NAMESPACE del alias ('default' no se cuenta)"""
+    atomico = False
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.namespace = params.get('NAMESPACE', 'default')
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        if self.namespace != 'default':
+            contar(self.namespace, 'miss' if valor is _AUSENTE else 'hit')
+        return default if valor is _AUSENTE else valor
+
+    def incr(self, key, delta=1, version=None):
+        with sin_contar():
+            return super().incr(key, delta, version)
+
+    def get_or_set(self, key, default, timeout=None, version=None):
+        with sin_contar():
+            return super().get_or_set(key, default, timeout, version)
+
+    def tamano(self):
+        """(entradas, bytes) del namespace, o None si el backend no lo permite"""
+        return None
+
+
+class FileBasedCache(NamespaceMixin, filebased.FileBasedCache):
+    """
+    Un directorio por namespace, compartido por todos los workers del nodo.
+    El FileBasedCache de Django hace add() e incr() como leer-y-escribir sin lock;
+    aquí toman un flock, así que son atómicos entre procesos del mismo nodo
+    (no entre réplicas: para eso, Redis).
+    """
+    atomico = fcntl is not None
+
+    @contextmanager
+    def _bloqueo(self, key, version=None):
+        if fcntl is None:
+            yield
+            return
+        archivo = os.path.basename(self._key_to_file(key, version))
+        directorio = os.path.join(self._dir, 'bloqueos')
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, f'{int(archivo[:8], 16) % BLOQUEOS}.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._bloqueo(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._bloqueo(key, version):
+            return super().incr(key, delta, version)
+
+    def actualizar(self, key, funcion, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Lee `key`, escribe funcion(valor)[0] y devuelve funcion(valor)[1] sin que otro
+        proceso modifique la clave en medio. valor es None si la clave no existe.
+        """
+        with self._bloqueo(key, version), sin_contar():
+            nuevo, resultado = funcion(self.get(key, None, version))
+            self.set(key, nuevo, timeout, version)
+            return resultado
+
+    def tamano(self):
+        entradas = total = 0
+        try:
+            with os.scandir(self._dir) as archivos:
+                for archivo in archivos:
+                    if archivo.name.endswith(self.cache_suffix):
+                        entradas += 1
+                        total += archivo.stat().st_size
+        except FileNotFoundError:
+            pass
+        return entradas, total
+
+
+class RedisCache(NamespaceMixin, redis.RedisCache):
+    atomico = True
+
+    def actualizar(self, key, funcion, timeout=DEFAULT_TIMEOUT, version=None):
+        """Como FileBasedCache.actualizar, con WATCH/MULTI: si otro cliente escribe en medio, se reintenta"""
+        clave = self.make_and_validate_key(key, version)
+        serializer = self._cache._serializer
+        with self._cache.get_client(clave, write=True).pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(clave)
+                    crudo = pipe.get(clave)
+                    nuevo, resultado = funcion(None if crudo is None else serializer.loads(crudo))
+                    pipe.multi()
+                    pipe.set(clave, serializer.dumps(nuevo), ex=self.get_backend_timeout(timeout))
+                    pipe.execute()
+                    return resultado
+                except self._cache._lib.WatchError:
+                    continue
+
+    def get_many(self, keys, version=None):
+        # Lectura nativa (MGET): no pasa por get()
+        valores = super().get_many(keys, version)
+        contar(self.namespace, 'hit', len(valores))
+        contar(self.namespace, 'miss', len(keys) - len(valores))
+        return valores
+
+    def tamano(self):
+        cliente = self._cache.get_client()
+        claves = []
+        # Solo la versión actual: las de deploys anteriores expiran por su TTL
+        for clave in cliente.scan_iter(match=self.make_key('*'), count=1000):
+            claves.append(clave)
+            if len(claves) >= MAX_CLAVES_SCAN:
+                break
+        if not claves:
+            return 0, 0
+        # MEMORY USAGE es por clave: se mide una muestra y se extrapola
+        muestra = claves[:MUESTRA_MEMORIA]
+        memoria = sum(cliente.memory_usage(clave) or 0 for clave in muestra)
+        return len(claves), int(memoria * len(claves) / len(muestra))
+
+
+def leer_contadores(namespaces):
+    """{namespace: {tipo: total}} sumando todos los workers (incluye lo pendiente de este proceso)"""
+    volcar()
+    valores = caches['default'].get_many([
+        STATS_KEY.format(namespace, tipo) for namespace in namespaces for tipo in TIPOS
+    ])
+    return {
+        namespace: {tipo: valores.get(STATS_KEY.format(namespace, tipo), 0) for tipo in TIPOS}
+        for namespace in namespaces
+    }
+
+
+def resumen():
+    """Tamaño y tasa de aciertos de cada namespace configurado"""
+    contadores = leer_contadores(settings.CACHE_NAMESPACES)
+    filas = []
+    for namespace in settings.CACHE_NAMESPACES:
+        backend = caches[namespace]
+        aciertos = contadores[namespace]['hit']
+        fallos = contadores[namespace]['miss']
+        try:
+            tamano = backend.tamano()
+        except Exception as e:
+            logger.warning('Error midiendo la cache %s: %s', namespace, e)
+            tamano = None
+        filas.append({
+            'namespace': namespace,
+            'backend': type(backend).__name__,
+            'entradas': tamano[0] if tamano else None,
+            'bytes': tamano[1] if tamano else None,
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'hit_rate': round(aciertos / (aciertos + fallos), 4) if aciertos + fallos else None,
+        })
+    return filas
+
+
+def reiniciar_contadores():
+    caches['default'].delete_many([
+        STATS_KEY.format(namespace, tipo) for namespace in settings.CACHE_NAMESPACES for tipo in TIPOS
+    ])
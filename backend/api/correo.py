@@ -0,0 +1,234 @@
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import resend
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CorreoPendiente
+
+logger = logging.getLogger(__name__)
+
+# Reintentos con backoff exponencial: 30s, 1m, 2m, 4m... hasta 1h entre intentos
+MAX_INTENTOS = 8
+BACKOFF_BASE = 30
+BACKOFF_MAXIMO = 60 * 60
+# Tiempo que un worker retiene un correo; si muere enviándolo, otro lo retoma después
+BLOQUEO = 5 * 60
+LOTE = 50
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Estado del drenaje en este proceso
+_drenaje_lock = threading.Lock()
+_drenando = False
+_repetir = False
+
+
+class ResendBackend:
+    """Envía por la API de Resend; la clave de idempotencia evita duplicados en reintentos"""
+
+    def __init__(self):
+        resend.api_key = settings.RESEND_API_KEY
+
+    def enviar(self, correo):
+        if not resend.api_key:
+            raise RuntimeError('RESEND_API_KEY no configurada')
+        respuesta = resend.Emails.send(
+            {
+                'from': correo.remitente,
+                'to': [correo.destinatario],
+                'subject': correo.asunto,
+                'text': correo.cuerpo,
+            },
+            {'idempotency_key': correo.clave},
+        )
+        return respuesta.get('id', '') if isinstance(respuesta, dict) else ''
+
+
+class FakeBackend:
+    """Resend local para desarrollo y pruebas: guarda los envíos en memoria"""
+    enviados = []
+
+    def enviar(self, correo):
+        # Misma semántica que Resend: una clave ya enviada no se vuelve a enviar
+        if not any(e['clave'] == correo.clave for e in self.enviados):
+            self.enviados.append({
+                'clave': correo.clave,
+                'to': correo.destinatario,
+                'subject': correo.asunto,
+                'text': correo.cuerpo,
+            })
+        return f'fake-{correo.clave}'
+
+
+def get_backend():
+    return import_string(settings.CORREO_BACKEND)()
+
+
+def encolar_correos_contacto(contacto):
+    """Inserta en el outbox el acuse al cliente y el aviso al administrador"""
+    correos = [
+        CorreoPendiente(
+            clave=f'{contacto.ticket}:cliente',
+            contacto=contacto,
+            remitente=settings.CORREO_REMITENTE,
+            destinatario=contacto.correo,
+            asunto=f"Hemos recibido tu solicitud - {contacto.ticket}",
+            cuerpo=f"""
+Hola {contacto.nombre},
+
+Gracias por contactarnos. Hemos recibido tu solicitud correctamente.
+
+Tu número de ticket es: {contacto.ticket}
+
+Detalles de tu consulta:
+{contacto.mensaje}
+
+Nos pondremos en contacto contigo a la brevedad.
+
+Saludos,
+Fehu Developers
+            """,
+        ),
+        CorreoPendiente(
+            clave=f'{contacto.ticket}:admin',
+            contacto=contacto,
+            remitente=settings.CORREO_REMITENTE,
+            destinatario=settings.CORREO_ADMIN,
+            asunto=f"Nueva solicitud de contacto - {contacto.ticket}",
+            cuerpo=f"""
+Nueva solicitud de contacto recibida:
+
+Ticket: {contacto.ticket}
+Nombre: {contacto.nombre} {contacto.apellido}
+Teléfono: {contacto.telefono}
+Correo: {contacto.correo}
+
+Mensaje:
+{contacto.mensaje}
+            """,
+        ),
+    ]
+    # Un solo INSERT; ignore_conflicts hace idempotente volver a encolar el mismo ticket
+    CorreoPendiente.objects.bulk_create(correos, ignore_conflicts=True)
+    transaction.on_commit(despachar)
+
+
+def despachar():
+    """
+    Drena el outbox en segundo plano dentro del proceso web. A lo más un drenaje
+    por proceso: una ráfaga de contactos no crea más hilos, solo alarga ese drenaje.
+    """
+    global _drenando, _repetir
+    if not settings.CORREO_EN_PROCESO:
+        return
+    with _drenaje_lock:
+        if _drenando:
+            _repetir = True
+            return
+        _drenando = True
+    _get_executor().submit(_drenar)
+
+
+def _drenar():
+    global _drenando, _repetir
+    try:
+        while True:
+            while procesar_pendientes():
+                pass
+            with _drenaje_lock:
+                # Llegaron correos mientras se drenaba: otra pasada
+                if not _repetir:
+                    _drenando = False
+                    return
+                _repetir = False
+    except Exception:
+        logger.exception('Error procesando correos pendientes')
+        with _drenaje_lock:
+            _drenando = False
+    finally:
+        connection.close()
+
+
+def procesar_pendientes(limite=LOTE, log=None):
+    """Envía hasta `limite` correos vencidos; devuelve cuántos intentó"""
+    backend = get_backend()
+    intentados = 0
+    for correo in _reclamar(limite):
+        intentados += 1
+        try:
+            id_proveedor = backend.enviar(correo)
+        except Exception as e:
+            _registrar_fallo(correo, e)
+            if log:
+                log(f"Error enviando {correo.clave} (intento {correo.intentos}): {e}")
+            continue
+
+        CorreoPendiente.objects.filter(pk=correo.pk).update(
+            estado=CorreoPendiente.ENVIADO,
+            enviado=timezone.now(),
+            intentos=correo.intentos + 1,
+            id_proveedor=id_proveedor or '',
+            ultimo_error='',
+        )
+        if log:
+            log(f"Correo {correo.clave} enviado a {correo.destinatario}")
+    return intentados
+
+
+def _reclamar(limite):
+    """
+    Toma correos vencidos marcándolos ENVIANDO con un UPDATE condicional: si otro
+    worker lo tomó primero el UPDATE no afecta filas y se salta (sin SELECT FOR UPDATE).
+    """
+    ahora = timezone.now()
+    for correo in _candidatos(ahora, limite):
+        tomado = CorreoPendiente.objects.filter(
+            pk=correo.pk, estado=correo.estado, proximo_intento=correo.proximo_intento,
+        ).update(estado=CorreoPendiente.ENVIANDO, proximo_intento=ahora + timedelta(seconds=BLOQUEO))
+        if tomado:
+            yield correo
+
+
+def _candidatos(ahora, limite):
+    """Correos vencidos; otro worker puede haberlos leído igual, por eso se reclaman uno a uno"""
+    return list(
+        CorreoPendiente.objects.filter(
+            Q(estado=CorreoPendiente.PENDIENTE) | Q(estado=CorreoPendiente.ENVIANDO),
+            proximo_intento__lte=ahora,
+        ).order_by('proximo_intento')[:limite]
+    )
+
+
+def _registrar_fallo(correo, error):
+    intentos = correo.intentos + 1
+    if intentos >= MAX_INTENTOS:
+        estado, espera = CorreoPendiente.FALLIDO, 0
+    else:
+        # Backoff exponencial con jitter para no reintentar todos a la vez
+        estado = CorreoPendiente.PENDIENTE
+        espera = min(BACKOFF_BASE * 2 ** (intentos - 1), BACKOFF_MAXIMO) * random.uniform(0.8, 1.2)
+    CorreoPendiente.objects.filter(pk=correo.pk).update(
+        estado=estado,
+        intentos=intentos,
+        proximo_intento=timezone.now() + timedelta(seconds=espera),
+        ultimo_error=str(error)[:1000],
+    )
+    correo.intentos = intentos
+
+
+def _get_executor():
+    # Perezoso: no crear hilos antes del fork de gunicorn
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='correos')
+    return _executor
@@ -0,0 +1,248 @@
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from django.conf import settings
+from django.db.models import Q
+from PIL import Image, UnidentifiedImageError
+
+from .models import Producto
+
+logger = logging.getLogger(__name__)
+
+# Anchos de miniatura permitidos: el ancho pedido se sube al siguiente de la lista,
+# así cada imagen tiene pocas variantes en disco
+ANCHOS = (96, 160, 245, 320, 480, 640, 960)
+CALIDAD_WEBP = 82
+
+FORMATOS = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg', 'PNG': 'image/png', 'GIF': 'image/gif'}
+
+# Redirecciones seguidas al descargar; cada salto se valida como el origen
+MAX_REDIRECCIONES = 3
+
+# Uso de cada imagen para la limpieza (LRU): mtime de este archivo en su directorio,
+# actualizado como mucho una vez por MARCA_USO_CADA (no se toca el mtime de las variantes: es su ETag)
+MARCA_USO = '.uso'
+MARCA_USO_CADA = 60 * 60
+# Cada cuánto, como mucho, se revisa el tamaño del cache tras una descarga. La marca es
+# un archivo en el propio directorio: vale para todos los workers que comparten el disco
+MARCA_LIMPIEZA = '.limpieza'
+LIMPIEZA_CADA = 10 * 60
+# Al superar el máximo se borra hasta quedar en esta fracción, para no limpiar en cada descarga
+FRACCION_TRAS_LIMPIEZA = 0.9
+
+_limpieza_lock = threading.Lock()
+
+
+class ImagenNoPermitida(Exception):
+    """La URL no es de un host permitido ni una imagen de producto"""
+
+
+class ImagenInvalida(Exception):
+    """El origen no devolvió una imagen utilizable"""
+
+
+def ancho_variante(ancho):
+    """Ancho de la variante a servir para el ancho pedido (None = imagen original)"""
+    if not ancho:
+        return None
+    return next((a for a in ANCHOS if a >= ancho), ANCHOS[-1])
+
+
+def obtener_variante(url, ancho=None):
+    """
+    Ruta en disco de la imagen (original o redimensionada a `ancho`) y su content type.
+    La primera vez descarga el original; cada variante se genera una sola vez.
+    """
+    directorio = _directorio(url)
+    original = directorio / 'original'
+    if not original.exists():
+        _validar_origen(url)
+        _escribir(original, _descargar(url))
+        _limpiar_si_toca()
+    _marcar_uso(directorio)
+
+    if ancho is None:
+        with Image.open(original) as img:
+            return original, FORMATOS.get(img.format, 'application/octet-stream')
+
+    variante = directorio / f'w{ancho}.webp'
+    if not variante.exists():
+        _escribir(variante, _redimensionar(original, ancho))
+    return variante, 'image/webp'
+
+
+def etag(ruta):
+    """ETag fuerte: la variante no cambia mientras exista el archivo"""
+    stat = ruta.stat()
+    return '"{}-{:x}-{:x}"'.format(ruta.parent.name[:16], stat.st_size, int(stat.st_mtime))
+
+
+def _directorio(url):
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return Path(settings.MEDIA_ROOT) / 'imagenes' / digest[:2] / digest
+
+
+def _validar_origen(url):
+    # Solo hosts conocidos o URLs cargadas en un producto: el proxy no es abierto
+    partes = urlsplit(url)
+    if partes.scheme not in ('http', 'https') or not partes.hostname:
+        raise ImagenNoPermitida(url)
+    if partes.hostname in settings.IMAGE_PROXY_HOSTS:
+        return
+    if not Producto.objects.filter(Q(imagen0=url) | Q(imagen1=url)).exists():
+        raise ImagenNoPermitida(url)
+
+
+def _validar_redireccion(origen, destino):
+    # Un host permitido (o una imagen de producto) podría redirigir a la red interna:
+    # cada salto debe quedarse en el mismo host o ir a uno de IMAGE_PROXY_HOSTS
+    partes = urlsplit(destino)
+    if partes.scheme not in ('http', 'https') or not partes.hostname:
+        raise ImagenNoPermitida(destino)
+    if partes.hostname != urlsplit(origen).hostname and partes.hostname not in settings.IMAGE_PROXY_HOSTS:
+        raise ImagenNoPermitida(destino)
+
+
+def _descargar(url):
+    try:
+        actual = url
+        for _ in range(MAX_REDIRECCIONES + 1):
+            with requests.get(actual, stream=True, timeout=(3.05, 10), allow_redirects=False) as response:
+                if response.is_redirect:
+                    siguiente = urljoin(actual, response.headers['Location'])
+                    _validar_redireccion(actual, siguiente)
+                    actual = siguiente
+                    continue
+                response.raise_for_status()
+                contenido = io.BytesIO()
+                for bloque in response.iter_content(64 * 1024):
+                    contenido.write(bloque)
+                    if contenido.tell() > settings.IMAGE_PROXY_MAX_BYTES:
+                        raise ImagenInvalida(f'{url} supera el tamaño máximo')
+                break
+        else:
+            raise ImagenInvalida(f'{url}: demasiadas redirecciones')
+    except requests.RequestException as e:
+        raise ImagenInvalida(str(e))
+
+    datos = contenido.getvalue()
+    try:
+        # open() y verify() solo leen el encabezado y validan la estructura: no decodifican
+        with Image.open(io.BytesIO(datos)) as img:
+            ancho, alto = img.size
+            img.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImagenInvalida(f'{url} no es una imagen: {e}')
+    # Un PNG de pocos KB puede declarar 50000x50000: se rechaza antes de que
+    # _redimensionar lo decodifique entero en memoria
+    if ancho * alto > settings.IMAGE_PROXY_MAX_PIXELES:
+        raise ImagenInvalida(f'{url} mide {ancho}x{alto}, más que el máximo de píxeles')
+    return datos
+
+
+def _redimensionar(original, ancho):
+    with Image.open(original) as img:
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+        if img.width > ancho:
+            img.thumbnail((ancho, img.height * ancho // img.width + 1), Image.Resampling.LANCZOS)
+        salida = io.BytesIO()
+        img.save(salida, 'WEBP', quality=CALIDAD_WEBP, method=4)
+    return salida.getvalue()
+
+
+def _escribir(ruta, datos):
+    # Archivo temporal + rename atómico: dos requests simultáneos no dejan un archivo a medias
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
+
+
+def _marcar_uso(directorio):
+    marca = directorio / MARCA_USO
+    try:
+        if time.time() - marca.stat().st_mtime < MARCA_USO_CADA:
+            return
+    except FileNotFoundError:
+        pass
+    try:
+        marca.touch()
+    except OSError:
+        # La limpieza pudo borrar el directorio mientras se servía: no es un error del request
+        pass
+
+
+def _limpiar_si_toca():
+    """
+    Tras una descarga, lanza limpiar_cache() en un hilo aparte si pasaron LIMPIEZA_CADA
+    segundos desde la última: recorrer el disco nunca queda en el camino del request.
+    """
+    marca = Path(settings.MEDIA_ROOT) / 'imagenes' / MARCA_LIMPIEZA
+    with _limpieza_lock:
+        try:
+            if time.time() - marca.stat().st_mtime < LIMPIEZA_CADA:
+                return
+        except FileNotFoundError:
+            pass
+        marca.touch()
+    threading.Thread(target=_limpiar_en_segundo_plano, name='limpieza-imagenes', daemon=True).start()
+
+
+def _limpiar_en_segundo_plano():
+    try:
+        borradas, total = limpiar_cache()
+    except Exception:
+        logger.exception('Error al limpiar el cache de imágenes')
+        return
+    if borradas:
+        logger.info('Cache de imágenes: %s imágenes borradas, quedan %s bytes', borradas, total)
+
+
+def limpiar_cache(max_bytes=None):
+    """
+    Si el cache en disco supera max_bytes (IMAGE_PROXY_MAX_DISCO) borra las imágenes
+    usadas hace más tiempo, con todas sus variantes, hasta bajar de
+    FRACCION_TRAS_LIMPIEZA del máximo. Devuelve (imágenes borradas, bytes restantes).
+    """
+    max_bytes = settings.IMAGE_PROXY_MAX_DISCO if max_bytes is None else max_bytes
+    entradas = []
+    total = 0
+    for directorio in (Path(settings.MEDIA_ROOT) / 'imagenes').glob('*/*'):
+        tamano = uso = 0
+        try:
+            for archivo in directorio.iterdir():
+                stat = archivo.stat()
+                tamano += stat.st_size
+                uso = max(uso, stat.st_mtime)
+        except OSError:
+            continue
+        entradas.append((uso, tamano, directorio))
+        total += tamano
+
+    borradas = 0
+    if total <= max_bytes:
+        return borradas, total
+    for uso, tamano, directorio in sorted(entradas, key=lambda e: e[0]):
+        if total <= max_bytes * FRACCION_TRAS_LIMPIEZA:
+            break
+        shutil.rmtree(directorio, ignore_errors=True)
+        total -= tamano
+        borradas += 1
+    return borradas, total
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from api.models import PokemonCard
+from api.pokemon_sync import FuenteDump, FuenteTCGdex, actualizar_precios
+
+
+class Command(BaseCommand):
+    help = 'Actualiza los precios de las cartas Pokémon del espejo local y agrega el punto del día al historial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Directorio con un dump grabado de TCGdex en lugar de la API')
+        parser.add_argument('--sets', help='IDs de sets separados por coma (por defecto todos)')
+        parser.add_argument('--cartas', help='IDs de cartas separados por coma')
+        parser.add_argument('--limite', type=int, help='Máximo de cartas a actualizar (las más antiguas primero)')
+
+    def handle(self, *args, **options):
+        fuente = FuenteDump(options['desde']) if options['desde'] else FuenteTCGdex()
+
+        queryset = PokemonCard.objects.order_by('last_updated')
+        if options['sets']:
+            queryset = queryset.filter(set_id__in=options['sets'].split(','))
+        if options['cartas']:
+            queryset = queryset.filter(card_id__in=options['cartas'].split(','))
+
+        card_ids = queryset.values_list('card_id', flat=True)
+        if options['limite']:
+            card_ids = card_ids[:options['limite']]
+
+        stats = actualizar_precios(fuente, card_ids, log=self.stdout.write)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['cartas']} cartas actualizadas, {stats['puntos']} puntos de historial "
+            f"({stats['errores']} errores)"
+        ))
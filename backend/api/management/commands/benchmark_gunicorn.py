@@ -0,0 +1,147 @@
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Levanta gunicorn con gunicorn.conf.py en cada modo (sync, gthread), le aplica '
+            'la misma carga y compara throughput, latencias y memoria')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modos', default='sync,gthread', help='Modos separados por coma')
+        parser.add_argument('--rutas', default='/api/tecnologias/,/api/posts/,/api/pokemon/filters/',
+                            help='Rutas pedidas en ronda, separadas por coma')
+        parser.add_argument('--hilos', type=int, default=32, help='Clientes concurrentes')
+        parser.add_argument('--duracion', type=float, default=15, help='Segundos de carga por modo')
+        parser.add_argument('--puerto', type=int, default=8090)
+        parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY (por defecto el de gunicorn.conf.py)')
+
+    def handle(self, *args, **options):
+        rutas = [r.strip() for r in options['rutas'].split(',') if r.strip()]
+        resultados = {}
+        for modo in [m.strip() for m in options['modos'].split(',') if m.strip()]:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {modo} =='))
+            proceso = self._levantar(modo, options)
+            try:
+                base = f"http://127.0.0.1:{options['puerto']}"
+                self._esperar(base, rutas[0], proceso)
+                # Calentar caches e imports de cada worker antes de medir
+                self._cargar(base, rutas, options['hilos'], 2)
+                resultados[modo] = self._cargar(base, rutas, options['hilos'], options['duracion'])
+                resultados[modo]['memoria'] = self._memoria(proceso.pid)
+            finally:
+                proceso.send_signal(signal.SIGTERM)
+                try:
+                    proceso.wait(timeout=40)
+                except subprocess.TimeoutExpired:
+                    proceso.kill()
+            r = resultados[modo]
+            self.stdout.write(
+                f"{r['total']} requests ({r['rps']:.0f}/s), errores {r['errores']}, "
+                f"p50 {r['p50']:.1f} ms, p95 {r['p95']:.1f} ms, memoria {r['memoria'] / 1024:.0f} MB"
+            )
+            for estado, cantidad in sorted(r['estados'].items(), key=lambda e: str(e[0])):
+                self.stdout.write(f'  {estado}: {cantidad}')
+
+        self.stdout.write('\nResumen:')
+        self.stdout.write(f"  {'modo':<10}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'errores':>9}{'MB':>8}")
+        for modo, r in resultados.items():
+            self.stdout.write(
+                f"  {modo:<10}{r['rps']:>8.0f}{r['p50']:>10.1f}{r['p95']:>10.1f}"
+                f"{r['errores']:>9}{r['memoria'] / 1024:>8.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark terminado'))
+
+    def _levantar(self, modo, options):
+        entorno = {**os.environ, 'GUNICORN_MODO': modo, 'PORT': str(options['puerto'])}
+        if options['workers']:
+            entorno['WEB_CONCURRENCY'] = str(options['workers'])
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR,
+            env=entorno,
+        )
+
+    def _esperar(self, base, ruta, proceso, limite=30):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            if proceso.poll() is not None:
+                raise CommandError(f'gunicorn terminó al arrancar (código {proceso.returncode})')
+            try:
+                requests.get(f'{base}{ruta}', timeout=2)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn no respondió en {limite} s')
+
+    def _cargar(self, base, rutas, hilos, duracion):
+        fin = time.monotonic() + duracion
+        estados = Counter()
+        latencias = []
+        lock = threading.Lock()
+
+        def cliente(desfase):
+            session = requests.Session()
+            i = desfase
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                try:
+                    estado = session.get(f'{base}{rutas[i % len(rutas)]}', timeout=30).status_code
+                except requests.RequestException:
+                    estado = 'error'
+                with lock:
+                    estados[estado] += 1
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                i += 1
+
+        clientes = [threading.Thread(target=cliente, args=(n,)) for n in range(max(1, hilos))]
+        for hilo in clientes:
+            hilo.start()
+        for hilo in clientes:
+            hilo.join()
+
+        ordenadas = sorted(latencias) or [0]
+        total = sum(estados.values())
+        return {
+            'total': total,
+            'rps': total / duracion,
+            'estados': estados,
+            'errores': sum(c for e, c in estados.items() if e == 'error' or e >= 500),
+            'p50': statistics.median(ordenadas),
+            'p95': ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))],
+        }
+
+    def _memoria(self, pid_master):
+        """KB de memoria del master y sus workers; PSS reparte las páginas compartidas (preload)"""
+        pids = [pid_master]
+        for entrada in os.listdir('/proc'):
+            if not entrada.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entrada}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid_master:
+                pids.append(int(entrada))
+        return sum(self._memoria_proceso(pid) for pid in pids)
+
+    def _memoria_proceso(self, pid):
+        for archivo, campo in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+            try:
+                with open(archivo) as f:
+                    for linea in f:
+                        if linea.startswith(campo):
+                            return int(linea.split()[1])
+            except OSError:
+                continue
+        return 0
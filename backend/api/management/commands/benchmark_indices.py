@@ -0,0 +1,169 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from api.models import Contacto, Post
+
+
+class Rollback(Exception):
+    """Descarta los datos sembrados al terminar"""
+
+
+@contextmanager
+def fechas_manuales(*campos):
+    # auto_now_add pisa cualquier fecha en bulk_create: se desactiva mientras se siembra
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+@contextmanager
+def base_desechable():
+    """
+    Crea una base de prueba migrada desde cero (test_<nombre> en PostgreSQL, un archivo
+    temporal en SQLite) y la destruye al salir: el benchmark borra índices y siembra
+    filas, así que nunca corre sobre la base configurada.
+    """
+    original = connection.settings_dict['NAME']
+    test = connection.settings_dict['TEST']
+    nombre_test, temporal = test.get('NAME'), None
+    if connection.vendor == 'sqlite' and not nombre_test:
+        # En disco y no en memoria, para que los tiempos se parezcan a los de la base real
+        temporal = tempfile.mkdtemp(prefix='benchmark-indices-')
+        test['NAME'] = os.path.join(temporal, 'benchmark.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(original, verbosity=0)
+        test['NAME'] = nombre_test
+        if temporal:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+
+class Command(BaseCommand):
+    help = ('Compara planes y tiempos de las consultas de Post y Contacto con y sin sus índices, '
+            'sobre datos sembrados en una base de prueba que se crea y se destruye al terminar')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=100000, help='Posts y contactos a sembrar')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Ejecuciones por consulta')
+
+    def handle(self, *args, **options):
+        self.repeticiones = max(1, options['repeticiones'])
+        with base_desechable() as nombre:
+            self.stdout.write(f'Base de prueba: {nombre}')
+            try:
+                with transaction.atomic():
+                    self._sembrar(options['cantidad'])
+                    con_indices = self._medir('con índices')
+                    self._borrar_indices()
+                    sin_indices = self._medir('sin índices')
+                    raise Rollback
+            except Rollback:
+                pass
+
+        self.stdout.write('\nResumen (mediana en ms):')
+        for nombre in con_indices:
+            antes, despues = sin_indices[nombre], con_indices[nombre]
+            self.stdout.write(f'  {nombre:<32} {antes:9.3f} -> {despues:9.3f}  (x{antes / max(despues, 1e-6):.1f})')
+        self.stdout.write(self.style.SUCCESS('Benchmark terminado; la base de prueba se destruyó'))
+
+    def _consultas(self):
+        hace_30_dias = timezone.now() - timedelta(days=30)
+        return {
+            'posts activos': Post.objects.filter(activo=True).order_by('-fecha_creacion')[:12],
+            'posts activos por categoría': (
+                Post.objects.filter(activo=True, categoria='tutorial').order_by('-fecha_creacion')[:12]
+            ),
+            'posts destacados': (
+                Post.objects.filter(activo=True, destacado=True).order_by('-fecha_creacion')[:12]
+            ),
+            'posts por estado (staff)': Post.objects.filter(estado='revision').order_by('-fecha_creacion')[:12],
+            'contactos últimos 30 días': (
+                Contacto.objects.filter(fecha__gte=hace_30_dias).order_by('-fecha')[:100]
+            ),
+            'contactos recientes (admin)': Contacto.objects.order_by('-fecha', 'ticket')[:100],
+        }
+
+    def _sembrar(self, cantidad):
+        self.stdout.write(f'Sembrando {cantidad} posts y {cantidad} contactos...')
+        ahora = timezone.now()
+        aleatorio = random.Random(42)
+        categorias = [c for c, _ in Post.CATEGORIA_CHOICES]
+        estados = [e for e, _ in Post.ESTADO_CHOICES]
+
+        with fechas_manuales(Post._meta.get_field('fecha_creacion'), Contacto._meta.get_field('fecha')):
+            for inicio in range(0, cantidad, 5000):
+                fin = min(inicio + 5000, cantidad)
+                Post.objects.bulk_create([
+                    Post(
+                        titulo=f'Post de prueba {i}',
+                        slug=f'benchmark-post-{i}',
+                        resumen='Resumen de prueba',
+                        contenido='<p>Contenido de prueba</p>',
+                        categoria=aleatorio.choice(categorias),
+                        estado=aleatorio.choice(estados),
+                        activo=aleatorio.random() < 0.3,
+                        destacado=aleatorio.random() < 0.02,
+                        fecha_creacion=ahora - timedelta(minutes=aleatorio.randint(0, 3 * 365 * 24 * 60)),
+                    )
+                    for i in range(inicio, fin)
+                ])
+                Contacto.objects.bulk_create([
+                    Contacto(
+                        ticket=f'BENCH-{i:07d}',
+                        nombre='Nombre',
+                        apellido='Apellido',
+                        telefono='+56900000000',
+                        correo=f'contacto{i}@example.com',
+                        mensaje='Mensaje de prueba',
+                        fecha=ahora - timedelta(minutes=aleatorio.randint(0, 3 * 365 * 24 * 60)),
+                    )
+                    for i in range(inicio, fin)
+                ])
+        self._analizar()
+
+    def _analizar(self):
+        # Estadísticas al día para que el planificador elija con datos reales
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ANALYZE api_post')
+                cursor.execute('ANALYZE api_contacto')
+            else:
+                cursor.execute('ANALYZE')
+
+    def _borrar_indices(self):
+        with connection.cursor() as cursor:
+            for modelo in (Post, Contacto):
+                for indice in modelo._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(indice.name)}')
+        self._analizar()
+
+    def _medir(self, etiqueta):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {etiqueta} =='))
+        tiempos = {}
+        for nombre, queryset in self._consultas().items():
+            muestras = []
+            for _ in range(self.repeticiones):
+                inicio = time.perf_counter()
+                list(queryset._chain())
+                muestras.append((time.perf_counter() - inicio) * 1000)
+            tiempos[nombre] = statistics.median(muestras)
+
+            self.stdout.write(f'{nombre}: {tiempos[nombre]:.3f} ms')
+            for linea in queryset.explain().splitlines():
+                self.stdout.write(f'    {linea}')
+        return tiempos
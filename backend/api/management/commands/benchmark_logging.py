@@ -0,0 +1,123 @@
+import logging
+import logging.config
+import statistics
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+# LOGGING tal como estaba antes de backend/log.py: todo a DEBUG, escrito en el request
+LOGGING_ANTERIOR = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'DEBUG',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': 'DEBUG',
+            'propagate': True,
+        },
+    },
+}
+
+
+class Destino:
+    """stderr simulado: cuenta líneas y opcionalmente tarda como un pipe lento"""
+
+    def __init__(self, archivo, latencia):
+        self.archivo = archivo
+        self.latencia = latencia
+        self.lineas = 0
+
+    def write(self, texto):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.lineas += texto.count('\n')
+        return self.archivo.write(texto)
+
+    def flush(self):
+        self.archivo.flush()
+
+
+class Command(BaseCommand):
+    help = ('Compara la latencia por request con el logging anterior (DEBUG, escritura síncrona) '
+            'y con LOGGING actual (cola, JSON y muestreo)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', default='/api/tecnologias/,/api/posts/,/api/no-existe/',
+                            help='Rutas pedidas en ronda (la 404 genera un warning de django.request)')
+        parser.add_argument('--requests', type=int, default=500, help='Requests medidos por configuración')
+        parser.add_argument('--destino', default='/dev/null', help='Archivo que recibe lo escrito en stderr')
+        parser.add_argument('--latencia-destino', type=float, default=0,
+                            help='ms por escritura, para simular un colector de logs lento')
+        parser.add_argument('--sql', action='store_true',
+                            help='Genera los logs de cada consulta SQL, como con DEBUG=True')
+
+    def handle(self, *args, **options):
+        rutas = [r.strip() for r in options['rutas'].split(',') if r.strip()]
+        host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h), 'localhost')
+        client = Client(HTTP_HOST=host)
+
+        resultados = {}
+        for nombre, config in (('anterior', LOGGING_ANTERIOR), ('actual', settings.LOGGING)):
+            resultados[nombre] = self._medir(nombre, config, client, rutas, options)
+
+        self.stdout.write('\nResumen (ms por request):')
+        self.stdout.write(f"  {'config':<10}{'media':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'líneas':>9}")
+        for nombre, r in resultados.items():
+            self.stdout.write(
+                f"  {nombre:<10}{r['media']:>8.2f}{r['p50']:>8.2f}{r['p95']:>8.2f}{r['p99']:>8.2f}{r['lineas']:>9}"
+            )
+        antes, despues = resultados['anterior']['media'], resultados['actual']['media']
+        self.stdout.write(self.style.SUCCESS(
+            f'Latencia media {antes:.2f} -> {despues:.2f} ms ({(antes - despues) / antes * 100:.0f}% menos)'
+        ))
+
+    def _medir(self, nombre, config, client, rutas, options):
+        stderr = sys.stderr
+        with open(options['destino'], 'w') as archivo:
+            destino = Destino(archivo, options['latencia_destino'] / 1000)
+            sys.stderr = destino
+            connection.force_debug_cursor = options['sql']
+            try:
+                logging.config.dictConfig(config)
+                for i in range(20):
+                    client.get(rutas[i % len(rutas)])
+                destino.lineas = 0
+
+                muestras = []
+                for i in range(max(1, options['requests'])):
+                    inicio = time.perf_counter()
+                    client.get(rutas[i % len(rutas)])
+                    muestras.append((time.perf_counter() - inicio) * 1000)
+                # Cerrar los handlers vacía la cola antes de contar líneas
+                logging.config.dictConfig({'version': 1, 'disable_existing_loggers': False})
+            finally:
+                connection.force_debug_cursor = False
+                sys.stderr = stderr
+                logging.config.dictConfig(settings.LOGGING)
+
+        ordenadas = sorted(muestras)
+        resultado = {
+            'media': statistics.mean(ordenadas),
+            'p50': statistics.median(ordenadas),
+            'p95': ordenadas[int(len(ordenadas) * 0.95) - 1],
+            'p99': ordenadas[int(len(ordenadas) * 0.99) - 1],
+            'lineas': destino.lineas,
+        }
+        self.stdout.write(
+            f"{nombre}: media {resultado['media']:.2f} ms, p95 {resultado['p95']:.2f} ms, "
+            f"{resultado['lineas']} líneas de log"
+        )
+        return resultado
@@ -0,0 +1,199 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from openpyxl import load_workbook
+
+from api.models import Producto
+from api.search import indexar_productos
+
+# Columnas importables: todo lo editable salvo la PK y las columnas generadas
+CAMPOS = [
+    f.name for f in Producto._meta.concrete_fields
+    if not f.primary_key and not f.generated
+]
+CAMPOS_ACTUALIZABLES = [c for c in CAMPOS if c != 'id_producto']
+
+
+class Command(BaseCommand):
+    help = 'Importa un listado de proveedor (CSV, XLSX o JSON) con upserts por lotes sobre id_producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo del proveedor')
+        parser.add_argument('--formato', choices=['csv', 'xlsx', 'json', 'jsonl'],
+                            help='Formato del archivo (por defecto se deduce de la extensión)')
+        parser.add_argument('--delimitador', default=',', help='Separador de columnas para CSV')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Filas por lote/transacción')
+        parser.add_argument('--errores', help='Archivo CSV donde se escriben las filas rechazadas')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe el archivo {ruta}')
+
+        formato = options['formato'] or ruta.suffix.lstrip('.').lower()
+        lectores = {
+            'csv': lambda: self._leer_csv(ruta, options['delimitador']),
+            'xlsx': lambda: self._leer_xlsx(ruta),
+            'json': lambda: self._leer_json(ruta),
+            'jsonl': lambda: self._leer_jsonl(ruta),
+            'ndjson': lambda: self._leer_jsonl(ruta),
+        }
+        if formato not in lectores:
+            raise CommandError(f'Formato no soportado: {formato}')
+
+        ruta_errores = Path(options['errores'] or f'{ruta}.errores.csv')
+        chunk_size = max(1, options['chunk_size'])
+
+        self.stats = {'leidas': 0, 'creadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'errores': 0}
+        self._archivo_errores = None
+        self._ruta_errores = ruta_errores
+        inicio = time.monotonic()
+
+        try:
+            lote = []
+            for num_fila, fila in lectores[formato]():
+                self.stats['leidas'] += 1
+                producto = self._validar(num_fila, fila)
+                if producto is not None:
+                    lote.append(producto)
+                if len(lote) >= chunk_size:
+                    self._procesar_lote(lote)
+                    lote = []
+            self._procesar_lote(lote)
+        finally:
+            if self._archivo_errores:
+                self._archivo_errores.close()
+
+        duracion = max(time.monotonic() - inicio, 1e-9)
+        s = self.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"{s['leidas']} filas en {duracion:.2f}s ({s['leidas'] / duracion:.0f} filas/s): "
+            f"{s['creadas']} creadas, {s['actualizadas']} actualizadas, "
+            f"{s['sin_cambios']} sin cambios, {s['errores']} con errores"
+        ))
+        if s['errores']:
+            self.stdout.write(self.style.WARNING(f'Detalle de errores en {ruta_errores}'))
+
+    # --- Lectores (todos en streaming salvo JSON, que es un arreglo) ---
+
+    def _leer_csv(self, ruta, delimitador):
+        with open(ruta, newline='', encoding='utf-8-sig') as f:
+            for num_fila, fila in enumerate(csv.DictReader(f, delimiter=delimitador), start=2):
+                yield num_fila, fila
+
+    def _leer_xlsx(self, ruta):
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [str(c).strip() if c is not None else '' for c in next(filas, [])]
+            for num_fila, valores in enumerate(filas, start=2):
+                yield num_fila, dict(zip(encabezados, valores))
+        finally:
+            libro.close()
+
+    def _leer_json(self, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        if not isinstance(datos, list):
+            raise CommandError('El JSON debe ser un arreglo de productos')
+        for num_fila, fila in enumerate(datos, start=1):
+            # Acepta también el formato de dumpdata ({"model", "fields"})
+            yield num_fila, fila.get('fields', fila) if isinstance(fila, dict) else {}
+
+    def _leer_jsonl(self, ruta):
+        # Una línea mal formada es una fila rechazada más, no aborta la importación
+        with open(ruta, encoding='utf-8') as f:
+            for num_fila, linea in enumerate(f, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    fila = ValidationError(f'JSON inválido: {e.msg} (columna {e.colno})')
+                if not isinstance(fila, (dict, ValidationError)):
+                    fila = ValidationError('La línea no es un objeto JSON')
+                yield num_fila, fila
+
+    # --- Validación y escritura ---
+
+    def _validar(self, num_fila, fila):
+        if isinstance(fila, ValidationError):
+            self._registrar_error(num_fila, '', fila)
+            return None
+
+        datos = {}
+        for campo in CAMPOS:
+            valor = fila.get(campo)
+            if isinstance(valor, str):
+                valor = valor.strip()
+            if valor is None:
+                valor = ''
+            datos[campo] = valor
+
+        # Las celdas vacías toman el default del modelo; las obligatorias fallan en full_clean
+        producto = Producto(**{c: v for c, v in datos.items() if v != ''})
+        producto.normalizar_vehiculo()
+        try:
+            # Equivale a full_clean sin validate_unique: la unicidad de id_producto la
+            # resuelve el upsert, no una consulta por fila. clean() (años) solo corre
+            # si los campos ya se convirtieron a sus tipos.
+            producto.clean_fields()
+            producto.clean()
+        except ValidationError as e:
+            self._registrar_error(num_fila, datos.get('id_producto', ''), e)
+            return None
+        return producto
+
+    def _procesar_lote(self, lote):
+        if not lote:
+            return
+
+        # Si un id se repite dentro del lote gana la última fila
+        por_id = {p.id_producto: p for p in lote}
+        existentes = {
+            fila['id_producto']: fila
+            for fila in Producto.objects.filter(id_producto__in=list(por_id)).values(*CAMPOS)
+        }
+
+        cambiados = []
+        for id_producto, producto in por_id.items():
+            actual = existentes.get(id_producto)
+            if actual is None:
+                self.stats['creadas'] += 1
+            elif any(getattr(producto, c) != actual[c] for c in CAMPOS_ACTUALIZABLES):
+                self.stats['actualizadas'] += 1
+            else:
+                self.stats['sin_cambios'] += 1
+                continue
+            cambiados.append(producto)
+
+        if not cambiados:
+            return
+
+        with transaction.atomic():
+            Producto.objects.bulk_create(
+                cambiados,
+                update_conflicts=True,
+                unique_fields=['id_producto'],
+                update_fields=CAMPOS_ACTUALIZABLES,
+            )
+            # bulk_create no emite post_save: reindexar la búsqueda a mano
+            indexar_productos(Producto.objects.filter(id_producto__in=[p.id_producto for p in cambiados]))
+
+    def _registrar_error(self, num_fila, id_producto, error):
+        self.stats['errores'] += 1
+        if self._archivo_errores is None:
+            self._archivo_errores = open(self._ruta_errores, 'w', newline='', encoding='utf-8')
+            self._escritor_errores = csv.writer(self._archivo_errores)
+            self._escritor_errores.writerow(['fila', 'id_producto', 'error'])
+
+        if hasattr(error, 'message_dict'):
+            detalle = '; '.join(f'{campo}: {" ".join(msgs)}' for campo, msgs in error.message_dict.items())
+        else:
+            detalle = ' '.join(error.messages)
+        self._escritor_errores.writerow([num_fila, id_producto, detalle])
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.image_proxy import limpiar_cache
+
+
+class Command(BaseCommand):
+    help = ('Borra del cache de imágenes en disco las menos usadas hasta quedar bajo '
+            'IMAGE_PROXY_MAX_DISCO (para cron; el proxy también lo hace en segundo plano)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int, default=settings.IMAGE_PROXY_MAX_DISCO,
+                            help='Tamaño máximo del cache en bytes')
+
+    def handle(self, *args, **options):
+        borradas, total = limpiar_cache(max_bytes=options['max_bytes'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{borradas} imágenes borradas, el cache ocupa {total / 1024 / 1024:.1f} MB'
+        ))
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+# Huella de los estáticos de origen con la que se generó STATIC_ROOT
+ARCHIVO_HUELLA = '.huella_estaticos'
+IGNORAR = ['CVS', '.*', '*~']
+
+
+class Command(BaseCommand):
+    help = ('Prepara el despliegue: en el build, collectstatic solo si cambiaron los estáticos '
+            '(--sin-migraciones); en la fase release, las migraciones pendientes (--sin-estaticos). '
+            'La fase release corre en un contenedor efímero: lo que escribe en disco no llega al web')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-migraciones', action='store_true',
+                            help='Solo estáticos (p. ej. en el build, sin base de datos)')
+        parser.add_argument('--sin-estaticos', action='store_true', help='Solo migraciones')
+        parser.add_argument('--forzar', action='store_true', help='Ejecuta collectstatic aunque no haya cambios')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        inicio = time.perf_counter()
+        if not options['sin_migraciones']:
+            self._paso('migraciones', self._migrar)
+        if not options['sin_estaticos']:
+            self._paso('estáticos', self._recolectar_estaticos, options['forzar'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Despliegue preparado en {(time.perf_counter() - inicio) * 1000:.0f} ms'
+        ))
+
+    def _paso(self, nombre, funcion, *args):
+        inicio = time.perf_counter()
+        detalle = funcion(*args)
+        self.stdout.write(f'{nombre}: {detalle} ({(time.perf_counter() - inicio) * 1000:.0f} ms)')
+
+    def _migrar(self):
+        # Camino rápido: sin migraciones pendientes no se corre migrate (ni sus señales
+        # post_migrate, que revisan permisos y content types de todos los modelos)
+        executor = MigrationExecutor(connection)
+        pendientes = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not pendientes:
+            return 'sin migraciones pendientes'
+        call_command('migrate', interactive=False, verbosity=self.verbosity)
+        return f'{len(pendientes)} migraciones aplicadas'
+
+    def _recolectar_estaticos(self, forzar):
+        huella = self._huella_estaticos()
+        archivo_huella = os.path.join(settings.STATIC_ROOT, ARCHIVO_HUELLA)
+        manifest = getattr(staticfiles_storage, 'manifest_name', None)
+
+        if not forzar and self._leer(archivo_huella) == huella and (
+            manifest is None or os.path.exists(os.path.join(settings.STATIC_ROOT, manifest))
+        ):
+            return 'sin cambios, collectstatic omitido'
+
+        call_command('collectstatic', interactive=False, verbosity=max(0, self.verbosity - 1))
+        with open(archivo_huella, 'w') as f:
+            f.write(huella)
+        return 'collectstatic ejecutado'
+
+    def _huella_estaticos(self):
+        """SHA-256 de rutas y contenido de todos los estáticos de origen, más la configuración de salida"""
+        archivos = []
+        for finder in finders.get_finders():
+            for ruta, storage in finder.list(IGNORAR):
+                prefijo = getattr(storage, 'prefix', None) or ''
+                archivos.append((os.path.join(prefijo, ruta), storage.path(ruta)))
+
+        digest = hashlib.sha256()
+        digest.update(f'{settings.STATIC_URL}|{settings.STORAGES["staticfiles"]["BACKEND"]}'.encode())
+        for destino, origen in sorted(archivos):
+            digest.update(destino.encode() + b'\0')
+            with open(origen, 'rb') as f:
+                for bloque in iter(lambda: f.read(1 << 16), b''):
+                    digest.update(bloque)
+        return digest.hexdigest()
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta) as f:
+                return f.read().strip()
+        except OSError:
+            return None
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.correo import LOTE, procesar_pendientes
+from api.models import CorreoPendiente
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes del outbox, con reintentos y backoff exponencial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE, help='Correos por pasada')
+        parser.add_argument('--continuo', action='store_true', help='Sigue revisando el outbox indefinidamente')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera cuando no hay pendientes')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            intentados = procesar_pendientes(limite=max(1, options['lote']), log=self.stdout.write)
+            total += intentados
+            if intentados:
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        fallidos = CorreoPendiente.objects.filter(estado=CorreoPendiente.FALLIDO).count()
+        self.stdout.write(self.style.SUCCESS(f'{total} correos procesados ({fallidos} fallidos en total)'))
@@ -0,0 +1,92 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Inunda POST /api/contacto/ contra un servidor en marcha y mide la latencia de una URL '
+            'sonda para comprobar que los workers siguen respondiendo')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base del servidor')
+        parser.add_argument('--hilos', type=int, default=20, help='Hilos enviando el formulario')
+        parser.add_argument('--duracion', type=float, default=15, help='Segundos de prueba')
+        parser.add_argument('--ips', type=int, default=1,
+                            help='IPs distintas simuladas con X-Forwarded-For (1 = un solo atacante). '
+                                 'Solo cuenta si el servidor confía en un proxy (NUM_PROXIES > 0): '
+                                 'simula IPs que ese proxy habría agregado')
+        parser.add_argument('--sonda', default='/api/tecnologias/', help='URL medida durante la inundación')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        fin = time.monotonic() + options['duracion']
+        ips = [f'203.0.113.{i % 250 + 1}' if i < 250 else f'198.51.{i // 250}.{i % 250 + 1}'
+               for i in range(max(1, options['ips']))]
+
+        estados = Counter()
+        estados_lock = threading.Lock()
+        latencias_post = []
+        latencias_sonda = []
+
+        def inundar():
+            session = requests.Session()
+            while time.monotonic() < fin:
+                ticket = f'CARGA-{uuid.uuid4().hex[:12]}'
+                inicio = time.perf_counter()
+                try:
+                    r = session.post(
+                        f'{base}/api/contacto/',
+                        json={
+                            'ticket': ticket, 'nombre': 'Carga', 'apellido': 'Prueba',
+                            'telefono': '+56900000000', 'correo': f'{ticket}@example.com',
+                            'mensaje': 'Prueba de carga',
+                        },
+                        headers={'X-Forwarded-For': random.choice(ips)},
+                        timeout=10,
+                    )
+                    estado = r.status_code
+                except requests.RequestException:
+                    estado = 'error'
+                with estados_lock:
+                    estados[estado] += 1
+                    latencias_post.append((time.perf_counter() - inicio) * 1000)
+
+        def sondear():
+            session = requests.Session()
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                try:
+                    session.get(f'{base}{options["sonda"]}', timeout=10)
+                    latencias_sonda.append((time.perf_counter() - inicio) * 1000)
+                except requests.RequestException:
+                    latencias_sonda.append(10_000)
+                time.sleep(0.1)
+
+        hilos = [threading.Thread(target=inundar) for _ in range(max(1, options['hilos']))]
+        hilos.append(threading.Thread(target=sondear))
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        total = sum(estados.values())
+        self.stdout.write(f"POST /api/contacto/: {total} requests ({total / options['duracion']:.0f}/s)")
+        for estado, cantidad in sorted(estados.items(), key=lambda e: str(e[0])):
+            self.stdout.write(f'  {estado}: {cantidad}')
+        self.stdout.write(f'  latencia POST: {self._resumen(latencias_post)}')
+        self.stdout.write(f'Sonda {options["sonda"]}: {self._resumen(latencias_sonda)}')
+        self.stdout.write(self.style.SUCCESS('Prueba de carga terminada'))
+
+    def _resumen(self, latencias):
+        if not latencias:
+            return 'sin datos'
+        ordenadas = sorted(latencias)
+        p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+        return (f'p50 {statistics.median(ordenadas):.1f} ms, p95 {p95:.1f} ms, '
+                f'máx {ordenadas[-1]:.1f} ms ({len(ordenadas)} muestras)')
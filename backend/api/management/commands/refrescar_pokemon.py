@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from api.pokemon_refresh import refrescar
+from api.pokemon_sync import FuenteDump, FuenteTCGdex
+
+
+class Command(BaseCommand):
+    help = ('Refresca en segundo plano los sets y precios de cartas Pokémon vencidos, '
+            'priorizando las cartas más vistas y las más antiguas')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Directorio con un dump grabado de TCGdex en lugar de la API')
+        parser.add_argument('--concurrencia', type=int, default=4, help='Llamadas simultáneas a TCGdex')
+        parser.add_argument('--por-minuto', type=int, default=120, help='Máximo de llamadas a TCGdex por minuto')
+        parser.add_argument('--horas', type=float, default=24, help='Antigüedad para refrescar una carta')
+        parser.add_argument('--minutos-populares', type=float, default=30,
+                            help='Antigüedad para refrescar una carta popular')
+        parser.add_argument('--umbral-populares', type=int, default=20,
+                            help='Visitas a partir de las cuales una carta es popular')
+        parser.add_argument('--horas-sets', type=float, default=24, help='Antigüedad para refrescar un set')
+        parser.add_argument('--limite', type=int,
+                            help='Cartas por ciclo (por defecto las que caben en el presupuesto del intervalo)')
+        parser.add_argument('--continuo', action='store_true', help='Repite el ciclo indefinidamente')
+        parser.add_argument('--intervalo', type=int, default=300, help='Segundos entre ciclos en modo continuo')
+
+    def handle(self, *args, **options):
+        fuente = FuenteDump(options['desde']) if options['desde'] else FuenteTCGdex()
+        por_minuto = max(1, options['por_minuto'])
+        limite = options['limite'] or max(1, por_minuto * options['intervalo'] // 60)
+
+        while True:
+            inicio = time.monotonic()
+            stats = refrescar(
+                fuente,
+                concurrencia=max(1, options['concurrencia']),
+                por_minuto=por_minuto,
+                edad=timedelta(hours=options['horas']),
+                edad_populares=timedelta(minutes=options['minutos_populares']),
+                umbral_populares=options['umbral_populares'],
+                edad_sets=timedelta(hours=options['horas_sets']),
+                limite=limite,
+                log=self.stdout.write,
+            )
+            duracion = time.monotonic() - inicio
+            self.stdout.write(self.style.SUCCESS(
+                f"{stats['sets']} sets y {stats['cartas']} cartas refrescados en {duracion:.1f}s "
+                f"({stats['errores']} errores)"
+            ))
+
+            if not options['continuo']:
+                break
+            time.sleep(max(0, options['intervalo'] - duracion))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.models import Producto
+from api.search import indexar_productos
+
+
+class Command(BaseCommand):
+    help = 'Regenera el índice de búsqueda del catálogo de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        total = 0
+        lote = []
+
+        for producto in Producto.objects.iterator(chunk_size=chunk_size):
+            lote.append(producto)
+            if len(lote) >= chunk_size:
+                total += indexar_productos(lote)
+                lote = []
+        total += indexar_productos(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'Se reindexaron {total} productos'))
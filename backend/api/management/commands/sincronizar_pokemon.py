@@ -0,0 +1,37 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from api.pokemon_sync import FuenteDump, FuenteTCGdex, sincronizar_catalogo
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza el espejo local de sets y cartas Pokémon (PokemonSet/PokemonCard) desde TCGdex'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Directorio con un dump grabado de TCGdex en lugar de la API')
+        parser.add_argument('--grabar', help='Guarda las respuestas de la API como dump en este directorio')
+        parser.add_argument('--sets', help='IDs de sets separados por coma (por defecto todos)')
+        parser.add_argument('--completo', action='store_true',
+                            help='Vuelve a descargar todas las cartas en vez de solo las que faltan')
+
+    def handle(self, *args, **options):
+        if options['desde']:
+            fuente = FuenteDump(options['desde'])
+        else:
+            fuente = FuenteTCGdex(grabar_en=options['grabar'])
+
+        set_ids = set(options['sets'].split(',')) if options['sets'] else None
+
+        try:
+            stats = sincronizar_catalogo(
+                fuente,
+                set_ids=set_ids,
+                incremental=not options['completo'],
+                log=self.stdout.write,
+            )
+        except (requests.RequestException, OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer el listado de sets: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['sets']} sets y {stats['cartas']} cartas sincronizados "
+            f"({stats['sets_omitidos']} sets ya completos, {stats['errores']} errores)"
+        ))
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 19:31
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia fija del tokenizador de api/search.py tal como era en esta migración: el módulo
+# vivo puede cambiar (o dejar de existir) y una migración debe dar siempre el mismo resultado.
+# Si el tokenizador cambia, el índice se regenera con reindexar_productos.
+CAMPOS_BUSQUEDA = [
+    'descripcion', 'marca', 'modelo', 'version', 'posicion',
+    'ubicacion', 'lado', 'proveedor', 'marca_prod',
+]
+MAX_LARGO_TOKEN = 50
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Productos por lote: memoria acotada aunque el catálogo sea grande
+LOTE = 2000
+
+
+def _tokenizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return [t[:MAX_LARGO_TOKEN] for t in _TOKEN_RE.findall(texto)]
+
+
+def _documento(producto):
+    partes = [getattr(producto, campo, '') for campo in CAMPOS_BUSQUEDA]
+    return ' '.join(_tokenizar(' '.join(str(p) for p in partes if p)))
+
+
+def indexar_existentes(apps, schema_editor):
+    Producto = apps.get_model('api', 'Producto')
+    ProductoIndice = apps.get_model('api', 'ProductoIndice')
+    ProductoToken = apps.get_model('api', 'ProductoToken')
+
+    ultimo = 0
+    while True:
+        lote = list(Producto.objects.filter(pk__gt=ultimo).order_by('pk').only(*CAMPOS_BUSQUEDA)[:LOTE])
+        if not lote:
+            break
+        indices, tokens = [], []
+        for producto in lote:
+            documento = _documento(producto)
+            indices.append(ProductoIndice(producto_id=producto.pk, documento=documento))
+            tokens.extend(ProductoToken(producto_id=producto.pk, token=t) for t in set(documento.split()))
+        ProductoIndice.objects.bulk_create(indices, batch_size=1000)
+        ProductoToken.objects.bulk_create(tokens, batch_size=1000)
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_alter_post_options_post_fuentes_post_keywords_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoIndice',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='indice', serialize=False, to='api.producto')),
+                ('documento', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductoToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='api.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'producto'], name='producto_token_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_productoindice_productotoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['marca', 'modelo', 'anio_desde', 'anio_hasta'], name='producto_fitment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['anio_desde', 'anio_hasta'], name='producto_anios_idx'),
+        ),
+    ]
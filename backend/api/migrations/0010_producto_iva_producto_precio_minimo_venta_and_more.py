@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 19:32
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_producto_producto_fitment_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='iva',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('precio_costo'), '*', models.Value(Decimal('0.19'))), output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='precio_minimo_venta',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('precio_costo'), '*', models.Value(Decimal('1.666'))), output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='precio_venta',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('precio_costo'), '*', models.Value(833)), '/', models.Value(400000))), '*', models.Value(1000)), '+', models.Value(990)), output_field=models.DecimalField(decimal_places=0, max_digits=12)),
+        ),
+    ]
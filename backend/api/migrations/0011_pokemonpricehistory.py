@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_producto_iva_producto_precio_minimo_venta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokemonPriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_id', models.CharField(max_length=50)),
+                ('source', models.CharField(choices=[('tcgplayer', 'TCGPlayer'), ('cardmarket', 'Cardmarket')], max_length=10)),
+                ('date', models.DateField()),
+                ('low', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('mid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('high', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('market', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('currency', models.CharField(max_length=3)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('card_id', 'date', 'source'), name='pokemon_precio_dia_unico')],
+            },
+        ),
+    ]
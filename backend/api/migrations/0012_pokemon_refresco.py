@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_pokemonpricehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemoncard',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pokemonset',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='pokemoncard',
+            index=models.Index(fields=['last_updated'], name='pokemon_card_refresco_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 19:48
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Copia fija de api/blog.py tal como era en esta migración: el módulo vivo puede cambiar
+PALABRAS_POR_MINUTO = 200
+PALABRAS_EXTRACTO = 40
+LARGO_EXTRACTO = 300
+_ESPACIOS_RE = re.compile(r'\s+')
+_BLOQUE_RE = re.compile(r'</(p|div|h[1-6]|li|blockquote|pre|tr)>|<br\s*/?>', re.IGNORECASE)
+
+LOTE = 500
+
+
+def _texto_plano(contenido):
+    texto = strip_tags(_BLOQUE_RE.sub(' ', contenido or ''))
+    return _ESPACIOS_RE.sub(' ', html.unescape(texto)).strip()
+
+
+def calcular_existentes(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+
+    ultimo = 0
+    while True:
+        posts = list(Post.objects.filter(pk__gt=ultimo).order_by('pk').only('id', 'contenido')[:LOTE])
+        if not posts:
+            break
+        for post in posts:
+            texto = _texto_plano(post.contenido)
+            post.tiempo_lectura = max(1, math.ceil(len(texto.split()) / PALABRAS_POR_MINUTO))
+            post.extracto = Truncator(texto).words(PALABRAS_EXTRACTO)[:LARGO_EXTRACTO]
+        Post.objects.bulk_update(posts, ['tiempo_lectura', 'extracto'])
+        ultimo = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_pokemon_refresco'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='extracto',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tiempo_lectura',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Minutos estimados de lectura.'),
+        ),
+        migrations.RunPython(calcular_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 6.0 on 2026-10-18 19:52
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Copia fija de api/blog.py tal como era en esta migración: el módulo vivo puede cambiar
+_ESPACIOS_RE = re.compile(r'\s+')
+_BLOQUE_RE = re.compile(r'</(p|div|h[1-6]|li|blockquote|pre|tr)>|<br\s*/?>', re.IGNORECASE)
+
+LOTE = 500
+
+
+def _texto_plano(contenido):
+    texto = strip_tags(_BLOQUE_RE.sub(' ', contenido or ''))
+    return _ESPACIOS_RE.sub(' ', html.unescape(texto)).strip()
+
+
+def _documento_busqueda(post):
+    tags = post.tags if isinstance(post.tags, list) else []
+    partes = [post.resumen, _texto_plano(post.contenido), ' '.join(str(t) for t in tags), post.keywords]
+    return ' '.join(p for p in partes if p)
+
+
+def calcular_documentos(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+
+    ultimo = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=ultimo).order_by('pk')
+            .only('id', 'resumen', 'contenido', 'tags', 'keywords')[:LOTE]
+        )
+        if not posts:
+            break
+        for post in posts:
+            post.documento_busqueda = _documento_busqueda(post)
+        Post.objects.bulk_update(posts, ['documento_busqueda'])
+        ultimo = posts[-1].pk
+
+
+# SQLite: tabla FTS5 de contenido externo sobre api_post, sincronizada por triggers
+SQLITE_CREAR = [
+    """
+    CREATE VIRTUAL TABLE api_post_fts USING fts5(
+        titulo, documento_busqueda,
+        content='api_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER api_post_fts_ai AFTER INSERT ON api_post BEGIN
+        INSERT INTO api_post_fts(rowid, titulo, documento_busqueda)
+        VALUES (new.id, new.titulo, new.documento_busqueda);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_ad AFTER DELETE ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, titulo, documento_busqueda)
+        VALUES ('delete', old.id, old.titulo, old.documento_busqueda);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_au AFTER UPDATE OF titulo, documento_busqueda ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, titulo, documento_busqueda)
+        VALUES ('delete', old.id, old.titulo, old.documento_busqueda);
+        INSERT INTO api_post_fts(rowid, titulo, documento_busqueda)
+        VALUES (new.id, new.titulo, new.documento_busqueda);
+    END
+    """,
+    "INSERT INTO api_post_fts(api_post_fts) VALUES ('rebuild')",
+]
+SQLITE_BORRAR = [
+    'DROP TRIGGER IF EXISTS api_post_fts_au',
+    'DROP TRIGGER IF EXISTS api_post_fts_ad',
+    'DROP TRIGGER IF EXISTS api_post_fts_ai',
+    'DROP TABLE IF EXISTS api_post_fts',
+]
+
+# PostgreSQL: índice GIN sobre la misma expresión que usa api/post_search.py
+POSTGRES_CREAR = [
+    """
+    CREATE INDEX post_busqueda_gin ON api_post USING GIN (
+        (setweight(to_tsvector('spanish', titulo), 'A') ||
+         setweight(to_tsvector('spanish', documento_busqueda), 'B'))
+    )
+    """,
+]
+POSTGRES_BORRAR = ['DROP INDEX IF EXISTS post_busqueda_gin']
+
+
+def _ejecutar(schema_editor, por_motor):
+    for sql in por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_CREAR, 'postgresql': POSTGRES_CREAR})
+
+
+def borrar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_BORRAR, 'postgresql': POSTGRES_BORRAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_post_tiempo_lectura_extracto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='documento_busqueda',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(calcular_documentos, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
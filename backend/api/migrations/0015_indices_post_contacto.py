@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_post_documento_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contacto',
+            index=models.Index(fields=['-fecha', 'ticket'], name='contacto_fecha_ticket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fecha_creacion'], name='post_activos_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['categoria', '-fecha_creacion'], name='post_activos_categoria_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('activo', True), ('destacado', True)), fields=['-fecha_creacion'], name='post_destacados_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['estado', '-fecha_creacion'], name='post_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-fecha_creacion'], name='post_fecha_idx'),
+        ),
+    ]
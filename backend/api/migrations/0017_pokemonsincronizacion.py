@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_correopendiente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokemonSincronizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completada', models.DateTimeField()),
+                ('sets', models.PositiveIntegerField(default=0)),
+                ('cartas', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
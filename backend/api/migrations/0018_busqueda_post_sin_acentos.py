@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 20:40
+
+from django.db import migrations
+
+# PostgreSQL: 'spanish' con unaccent antes del stemmer, para que el índice quede sin
+# acentos igual que las consultas (api/post_search.py las arma con search.tokenizar).
+# El SQL queda fijo aquí: no depende de cómo evolucione post_search.
+POSTGRES_CREAR = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    'CREATE TEXT SEARCH CONFIGURATION espanol_sin_acentos (COPY = pg_catalog.spanish)',
+    """
+    ALTER TEXT SEARCH CONFIGURATION espanol_sin_acentos
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem
+    """,
+    'DROP INDEX IF EXISTS post_busqueda_gin',
+    """
+    CREATE INDEX post_busqueda_gin ON api_post USING GIN (
+        (setweight(to_tsvector('espanol_sin_acentos', titulo), 'A') ||
+         setweight(to_tsvector('espanol_sin_acentos', documento_busqueda), 'B'))
+    )
+    """,
+]
+POSTGRES_BORRAR = [
+    'DROP INDEX IF EXISTS post_busqueda_gin',
+    """
+    CREATE INDEX post_busqueda_gin ON api_post USING GIN (
+        (setweight(to_tsvector('spanish', titulo), 'A') ||
+         setweight(to_tsvector('spanish', documento_busqueda), 'B'))
+    )
+    """,
+    'DROP TEXT SEARCH CONFIGURATION IF EXISTS espanol_sin_acentos',
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    # SQLite ya quita acentos en el tokenizer de FTS5 (remove_diacritics 2)
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in sentencias:
+            schema_editor.execute(sql)
+
+
+def crear(apps, schema_editor):
+    _ejecutar(schema_editor, POSTGRES_CREAR)
+
+
+def borrar(apps, schema_editor):
+    _ejecutar(schema_editor, POSTGRES_BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_pokemonsincronizacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, borrar),
+    ]
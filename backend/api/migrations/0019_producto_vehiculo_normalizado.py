@@ -0,0 +1,37 @@
+from django.db import migrations
+
+LOTE = 2000
+
+
+def normalizar(valor):
+    # Copia congelada de models.normalizar_vehiculo
+    return valor.strip().upper()
+
+
+def normalizar_vehiculos(apps, schema_editor):
+    """Marca y modelo existentes en mayúsculas, como los guarda ahora Producto.save()"""
+    Producto = apps.get_model('api', 'Producto')
+    ultimo = 0
+    while True:
+        lote = list(Producto.objects.filter(id__gt=ultimo).order_by('id').only('id', 'marca', 'modelo')[:LOTE])
+        if not lote:
+            return
+        ultimo = lote[-1].id
+        cambiados = []
+        for producto in lote:
+            marca, modelo = normalizar(producto.marca), normalizar(producto.modelo)
+            if (marca, modelo) != (producto.marca, producto.modelo):
+                producto.marca, producto.modelo = marca, modelo
+                cambiados.append(producto)
+        Producto.objects.bulk_update(cambiados, ['marca', 'modelo'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_busqueda_post_sin_acentos'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_vehiculos, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
 from django.db import models
-from decimal import Decimal, ROUND_UP
+from django.db.models import F, Q
+from django.db.models.functions import Floor
+from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .blog import CAMPOS_BUSQUEDA_POST, campos_derivados, documento_busqueda
+
 
 class Proyecto(models.Model):
     nombre = models.CharField(max_length=100)
@@ -28,6 +33,10 @@ class Tecnologia(models.Model):
         return self.nombre
 
 
+def normalizar_vehiculo(valor):
+    return valor.strip().upper() if isinstance(valor, str) else valor
+
+
 class Producto(models.Model):
     id_producto = models.CharField(max_length=20, unique=True)
     proveedor = models.CharField(max_length=100)
@@ -47,23 +56,51 @@ class Producto(models.Model):
     precio_costo = models.DecimalField(max_digits=10, decimal_places=0)
     cantidad = models.IntegerField(default=0)
 
+    # Precios calculados por la base de datos (columnas generadas almacenadas)
+    # IVA 19%
+    iva = models.GeneratedField(
+        expression=F('precio_costo') * Decimal('0.19'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
+    # (costo + IVA) * 1.4
+    precio_minimo_venta = models.GeneratedField(
+        expression=F('precio_costo') * Decimal('1.666'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
+    # Mínimo * 1.25 redondeado a miles hacia abajo + 990.
+    # 1.19 * 1.4 * 1.25 = 833 / 400 exacto: aritmética entera, sin errores de coma flotante en SQLite
+    precio_venta = models.GeneratedField(
+        expression=Floor(F('precio_costo') * 833 / 400000) * 1000 + 990,
+        output_field=models.DecimalField(max_digits=12, decimal_places=0),
+        db_persist=True,
+        db_index=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Compatibilidad vehicular: marca + modelo + rango de años
+            models.Index(fields=['marca', 'modelo', 'anio_desde', 'anio_hasta'], name='producto_fitment_idx'),
+            models.Index(fields=['anio_desde', 'anio_hasta'], name='producto_anios_idx'),
+        ]
+
     def clean(self):
         if self.anio_desde > self.anio_hasta:
             raise ValidationError("El año de inicio no puede ser mayor al año de fin.")
 
-    @property
-    def iva(self):
-        return self.precio_costo * Decimal('0.19')
+    def normalizar_vehiculo(self):
+        """
+        Marca y modelo en mayúsculas y sin espacios en los extremos: /fitment/ los compara
+        por igualdad para usar producto_fitment_idx. importar_catalogo lo llama también,
+        porque bulk_create no pasa por save().
+        """
+        self.marca = normalizar_vehiculo(self.marca)
+        self.modelo = normalizar_vehiculo(self.modelo)
 
-    @property
-    def precio_minimo_venta(self):
-        return (self.precio_costo + self.iva) * Decimal('1.4')
-
-    @property
-    def precio_venta(self):
-        precio = self.precio_minimo_venta * Decimal('1.25')
-        miles = int(precio // 1000)
-        return (miles * 1000) + 990
+    def save(self, *args, **kwargs):
+        self.normalizar_vehiculo()
+        super().save(*args, **kwargs)
 
     @property
     def nombre_completo(self):
@@ -85,6 +122,29 @@ class Producto(models.Model):
         return f"{self.id_producto} - {self.descripcion}"
 
 
+class ProductoIndice(models.Model):
+    """Documento de búsqueda normalizado (sin acentos, minúsculas) de un producto"""
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, primary_key=True, related_name='indice')
+    documento = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.documento}"
+
+
+class ProductoToken(models.Model):
+    """Índice invertido token -> producto para la búsqueda del catálogo"""
+    token = models.CharField(max_length=50)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='tokens')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'producto'], name='producto_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.producto_id}"
+
+
 class Contacto(models.Model):
     ticket = models.CharField(max_length=50, unique=True)
     nombre = models.CharField(max_length=100)
@@ -94,9 +154,54 @@ class Contacto(models.Model):
     mensaje = models.TextField()
     fecha = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Listado del admin: más recientes primero y filtro por rango de fechas
+            models.Index(fields=['-fecha', 'ticket'], name='contacto_fecha_ticket_idx'),
+        ]
+
     def __str__(self):
         return f"{self.ticket} - {self.nombre} {self.apellido}"
 
+
+class CorreoPendiente(models.Model):
+    """Outbox de correos: se inserta junto al contacto y lo envía un worker con reintentos"""
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (ENVIANDO, 'Enviando'),
+        (ENVIADO, 'Enviado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    # Clave de idempotencia (ticket + tipo): un mismo correo no se encola ni se envía dos veces
+    clave = models.CharField(max_length=100, unique=True)
+    contacto = models.ForeignKey(Contacto, on_delete=models.CASCADE, related_name='correos', null=True, blank=True)
+    remitente = models.CharField(max_length=200)
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    # Siguiente reintento; mientras está ENVIANDO, vencimiento del bloqueo del worker
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    id_proveedor = models.CharField(max_length=100, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.clave} ({self.estado})"
+
 class PokemonCard(models.Model):
     """Cache de cartas de la API pokemontcg.io"""
     card_id = models.CharField(max_length=50, unique=True)  # ID de la API
@@ -130,9 +235,14 @@ class PokemonCard(models.Model):
     
     # Metadata
     last_updated = models.DateTimeField(auto_now=True)
+    # Visitas al detalle (se acumulan en memoria y se vuelcan por lotes); priorizan el refresco
+    view_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['name', 'set_release_date']
+        indexes = [
+            models.Index(fields=['last_updated'], name='pokemon_card_refresco_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.set_name}"
@@ -147,6 +257,7 @@ class PokemonSet(models.Model):
     release_date = models.DateField(null=True, blank=True)
     logo_url = models.URLField(blank=True)
     symbol_url = models.URLField(blank=True)
+    last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-release_date']
@@ -154,6 +265,47 @@ class PokemonSet(models.Model):
     def __str__(self):
         return f"{self.name} ({self.series})"
 
+
+class PokemonSincronizacion(models.Model):
+    """
+    Marca del espejo local: una fila que se escribe al terminar sin errores una
+    sincronización de todos los sets. Hasta entonces búsquedas y filtros van a TCGdex.
+    """
+    completada = models.DateTimeField()
+    sets = models.PositiveIntegerField(default=0)
+    cartas = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sincronización {self.completada:%Y-%m-%d %H:%M} ({self.sets} sets, {self.cartas} cartas)"
+
+
+class PokemonPriceHistory(models.Model):
+    """Historial de precios: una fila por carta, fuente y día (solo se agregan filas)"""
+    SOURCE_CHOICES = [
+        ('tcgplayer', 'TCGPlayer'),
+        ('cardmarket', 'Cardmarket'),
+    ]
+
+    card_id = models.CharField(max_length=50)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    date = models.DateField()
+
+    # Cardmarket: low, avg (mid) y trend (market); no informa máximo
+    low = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    mid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    high = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    market = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            # Su índice (card_id, date, source) atiende las series por carta y rango de fechas
+            models.UniqueConstraint(fields=['card_id', 'date', 'source'], name='pokemon_precio_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} {self.source} {self.date}"
+
 class Post(models.Model):
     ESTADO_CHOICES = [
         ('borrador', 'Borrador'),
@@ -192,14 +344,40 @@ class Post(models.Model):
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     publicado = models.BooleanField(default=True)
     destacado = models.BooleanField(default=False)
+    # --- Derivados del contenido (se calculan al guardar, para el índice del blog) ---
+    tiempo_lectura = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutos estimados de lectura.")
+    extracto = models.CharField(max_length=300, blank=True, editable=False)
+    # Texto sin HTML para la búsqueda (FTS5 en SQLite, tsvector + GIN en PostgreSQL)
+    documento_busqueda = models.TextField(blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.titulo)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'contenido' in update_fields:
+            for campo, valor in campos_derivados(self.contenido).items():
+                setattr(self, campo, valor)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'tiempo_lectura', 'extracto'}
+
+        if update_fields is None or set(update_fields) & set(CAMPOS_BUSQUEDA_POST):
+            self.documento_busqueda = documento_busqueda(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'documento_busqueda'}
         super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            # El público solo ve activos y siempre ordenado por fecha: índices parciales
+            models.Index(fields=['-fecha_creacion'], condition=Q(activo=True), name='post_activos_fecha_idx'),
+            models.Index(fields=['categoria', '-fecha_creacion'], condition=Q(activo=True), name='post_activos_categoria_idx'),
+            models.Index(fields=['-fecha_creacion'], condition=Q(activo=True, destacado=True), name='post_destacados_idx'),
+            # Staff ve todos los posts y filtra por estado
+            models.Index(fields=['estado', '-fecha_creacion'], name='post_estado_fecha_idx'),
+            models.Index(fields=['-fecha_creacion'], name='post_fecha_idx'),
+        ]
         verbose_name = "Artículo"
         verbose_name_plural = "Artículos"
     
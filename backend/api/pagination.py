@@ -0,0 +1,31 @@
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductoCursorPagination(CursorPagination):
+    """Paginación por keyset sobre id: el costo de cada página no crece con el offset"""
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class OrderingConDesempate(OrderingFilter):
+    """
+    OrderingFilter que siempre termina en 'id'. Con CursorPagination hace falta un orden total:
+    con empates en precio_venta o años, el orden entre páginas no está definido y el
+    cursor puede repetir o saltarse filas.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if not any(campo.lstrip('-') in ('id', 'pk') for campo in ordering):
+            ordering.append('id')
+        return ordering
+
+
+class PostPagination(PageNumberPagination):
+    """Índice del blog por páginas numeradas ({count, next, previous, results})"""
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
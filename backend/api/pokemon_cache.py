@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from django.db import connection
+
+from . import cache_backends
+
+# Namespace 'pokemon' de CACHES (ver settings). Aciertos y fallos los cuenta el backend
+# en cada get(); aquí solo se suman las entradas vencidas y los misses coalescidos
+NAMESPACE = 'pokemon'
+cache = ConnectionProxy(caches, NAMESPACE)
+
+logger = logging.getLogger(__name__)
+
+# Segundos que una entrada se considera fresca, por endpoint
+TTL = {
+    'search': 30 * 60,
+    'card': 10 * 60,        # trae precios: minutos
+    'sets': 6 * 60 * 60,    # catálogos casi estáticos: horas
+    'types': 12 * 60 * 60,
+    'rarities': 12 * 60 * 60,
+    'local_catalog': 5 * 60,
+    'history': 60 * 60,     # el historial suma un punto por día
+}
+TTL_DEFECTO = 10 * 60
+
+# Tras vencer, la entrada se sigue sirviendo (stale) este múltiplo del TTL
+# mientras se refresca en segundo plano
+FACTOR_STALE = 4
+
+# Espera máxima de una petición que se sumó a una llamada en curso (single-flight)
+ESPERA_MAXIMA = 15
+# Intervalo de sondeo cuando la llamada la hace otro worker
+INTERVALO_SONDEO = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Llamadas upstream en curso en este proceso, por clave
+_vuelos = {}
+_vuelos_lock = threading.Lock()
+
+
+class _Vuelo:
+    """Una llamada upstream en curso que otros hilos pueden esperar"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+def cache_key(endpoint, params=None):
+    """Clave estable para (endpoint, params) sin importar orden ni valores vacíos"""
+    limpios = {k: v for k, v in (params or {}).items() if v not in (None, '')}
+    digest = hashlib.sha1(json.dumps(limpios, sort_keys=True).encode()).hexdigest()
+    return f'pokemon:{endpoint}:{digest}'
+
+
+def cached(endpoint, params, loader):
+    """
+    Devuelve el valor cacheado de loader() para (endpoint, params).
+    Si la entrada está vencida se responde con ella y se refresca en segundo plano.
+    Las excepciones de loader() en un miss se propagan y no se cachean.
+    """
+    key = cache_key(endpoint, params)
+    entry = cache.get(key)
+
+    if entry is not None:
+        if entry['fresh_until'] <= time.time():
+            cache_backends.contar(NAMESPACE, 'stale')
+            _refresh_in_background(endpoint, key, loader)
+        return entry['value']
+
+    return _single_flight(endpoint, key, loader)
+
+
+def store(endpoint, params, value):
+    """Guarda un valor ya obtenido (p. ej. por el refresco programado) como entrada fresca"""
+    _store(endpoint, cache_key(endpoint, params), value)
+
+
+def en_segundo_plano(func, *args):
+    """Ejecuta func(*args) en el pool de hilos de fondo de la cache"""
+    return _get_executor().submit(func, *args)
+
+
+def stats():
+    """Contadores del namespace sumando todos los workers; 'hit' son solo las entradas frescas"""
+    contadores = cache_backends.leer_contadores([NAMESPACE])[NAMESPACE]
+    aciertos, fallos = contadores['hit'], contadores['miss']
+    return {
+        'hit': aciertos - contadores['stale'],
+        'stale': contadores['stale'],
+        'miss': fallos,
+        'coalesced_local': contadores['coalesced_local'],
+        'coalesced_remote': contadores['coalesced_remote'],
+        'hit_rate': round(aciertos / (aciertos + fallos), 4) if aciertos + fallos else None,
+    }
+
+
+def _single_flight(endpoint, key, loader):
+    """
+    Deduplica misses concurrentes de la misma clave: dentro del proceso los hilos
+    esperan al primero; entre workers, un lock en la cache (cache.add) deja pasar
+    a uno solo y el resto espera a que la entrada aparezca.
+
+    La parte entre workers requiere una cache compartida con add() atómico
+    (`atomico` en api.cache_backends: Redis, o archivos con flock en un nodo).
+    Con otro backend (p. ej. LocMem por proceso) solo se deduplica dentro del proceso.
+    """
+    with _vuelos_lock:
+        vuelo = _vuelos.get(key)
+        lider = vuelo is None
+        if lider:
+            vuelo = _vuelos[key] = _Vuelo()
+
+    if not lider:
+        cache_backends.contar(NAMESPACE, 'coalesced_local')
+        if vuelo.evento.wait(ESPERA_MAXIMA):
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+        return loader()
+
+    try:
+        vuelo.valor = _cargar_con_lock(endpoint, key, loader)
+        return vuelo.valor
+    except Exception as e:
+        vuelo.error = e
+        raise
+    finally:
+        vuelo.evento.set()
+        with _vuelos_lock:
+            _vuelos.pop(key, None)
+
+
+def _cargar_con_lock(endpoint, key, loader):
+    if not getattr(cache, 'atomico', False):
+        # Sin add() atómico el lock dejaría pasar a varios workers: no hay coalescing remoto
+        value = loader()
+        _store(endpoint, key, value)
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, ESPERA_MAXIMA):
+        try:
+            value = loader()
+            _store(endpoint, key, value)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Otro worker ya está consultando: esperar su resultado
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_SONDEO)
+        # Leer el lock antes que la entrada: si ya se liberó, la entrada (si hubo éxito) está escrita.
+        # El sondeo no cuenta como fallos: el miss ya se contó una vez
+        with cache_backends.sin_contar():
+            lock_liberado = cache.get(lock_key) is None
+            entry = cache.get(key)
+        if entry is not None:
+            cache_backends.contar(NAMESPACE, 'coalesced_remote')
+            return entry['value']
+        if lock_liberado:
+            break
+
+    # El otro worker falló o tardó demasiado: consultar directamente
+    value = loader()
+    _store(endpoint, key, value)
+    return value
+
+
+def _store(endpoint, key, value):
+    ttl = TTL.get(endpoint, TTL_DEFECTO)
+    cache.set(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl * FACTOR_STALE)
+
+
+def _refresh_in_background(endpoint, key, loader):
+    # add() es atómico en los backends de api.cache_backends (Redis, o flock en archivos):
+    # un solo refresco por clave aunque haya varios workers
+    if not cache.add(f'{key}:refreshing', 1, 60):
+        return
+    _get_executor().submit(_refresh, endpoint, key, loader)
+
+
+def _refresh(endpoint, key, loader):
+    try:
+        _store(endpoint, key, loader())
+    except Exception:
+        logger.exception('Error al refrescar %s', key)
+    finally:
+        cache.delete(f'{key}:refreshing')
+        connection.close()
+
+
+def _get_executor():
+    # Perezoso: no crear hilos antes del fork de gunicorn
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pokemon-refresh')
+    return _executor
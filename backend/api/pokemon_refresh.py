@@ -0,0 +1,156 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import pokemon_cache
+from .models import PokemonCard, PokemonSet
+from .pokemon_sync import (
+    LOTE_CARTAS, guardar_precios, historial_de_carta, precios_por_fuente,
+    set_a_modelo, snapshot_precios,
+)
+
+logger = logging.getLogger(__name__)
+
+# Visitas acumuladas en memoria antes de volcarlas a PokemonCard.view_count
+VOLCAR_CADA = 30         # segundos
+VOLCAR_MAXIMO = 500      # ids distintos
+
+_vistas = Counter()
+_vistas_lock = threading.Lock()
+_ultimo_volcado = time.monotonic()
+
+
+def registrar_vista(card_id):
+    """Cuenta una visita al detalle de una carta sin escribir en la base en el request"""
+    global _ultimo_volcado
+    with _vistas_lock:
+        _vistas[card_id] += 1
+        if len(_vistas) < VOLCAR_MAXIMO and time.monotonic() - _ultimo_volcado < VOLCAR_CADA:
+            return
+        pendientes = dict(_vistas)
+        _vistas.clear()
+        _ultimo_volcado = time.monotonic()
+    pokemon_cache.en_segundo_plano(_volcar_vistas, pendientes)
+
+
+def _volcar_vistas(pendientes):
+    # Un UPDATE por cantidad de visitas, no por carta
+    por_cantidad = {}
+    for card_id, n in pendientes.items():
+        por_cantidad.setdefault(n, []).append(card_id)
+    try:
+        for n, card_ids in por_cantidad.items():
+            PokemonCard.objects.filter(card_id__in=card_ids).update(view_count=F('view_count') + n)
+    except Exception:
+        logger.exception('Error al guardar visitas de cartas')
+    finally:
+        connection.close()
+
+
+@atexit.register
+def _volcar_al_salir():
+    with _vistas_lock:
+        pendientes = dict(_vistas)
+        _vistas.clear()
+    if pendientes:
+        _volcar_vistas(pendientes)
+
+
+class LimiteTasa:
+    """Reparte las llamadas upstream: como máximo por_minuto, espaciadas de forma pareja"""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto
+        self.siguiente = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self):
+        with self.lock:
+            ahora = time.monotonic()
+            turno = max(self.siguiente, ahora)
+            self.siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def cartas_pendientes(edad, edad_populares, umbral_populares, limite):
+    """
+    Cartas vencidas en orden de prioridad: más vistas primero y, a igual número de
+    visitas, la actualización más antigua. Las populares vencen antes.
+    """
+    ahora = timezone.now()
+    vencidas = Q(last_updated__lt=ahora - edad) | Q(
+        view_count__gte=umbral_populares, last_updated__lt=ahora - edad_populares
+    )
+    return list(
+        PokemonCard.objects.filter(vencidas)
+        .order_by('-view_count', 'last_updated')
+        .values_list('card_id', flat=True)[:limite]
+    )
+
+
+def refrescar(fuente, concurrencia, por_minuto, edad, edad_populares, umbral_populares,
+              edad_sets, limite, log=logger.info):
+    """
+    Un ciclo de refresco: primero los sets vencidos y luego las cartas vencidas por
+    prioridad, con a lo más `concurrencia` llamadas simultáneas y `por_minuto` por minuto.
+    Cada lote se confirma al terminar (last_updated), así un reinicio retoma donde quedó.
+    """
+    stats = {'sets': 0, 'cartas': 0, 'errores': 0}
+    tasa = LimiteTasa(por_minuto)
+
+    def leer(metodo, item_id):
+        tasa.esperar()
+        try:
+            return item_id, metodo(item_id)
+        except (requests.RequestException, OSError, ValueError) as e:
+            log(f"Error al refrescar {item_id}: {e}")
+            return item_id, None
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='pokemon-scheduler') as pool:
+        set_ids = list(
+            PokemonSet.objects.filter(last_updated__lt=timezone.now() - edad_sets)
+            .order_by('last_updated').values_list('set_id', flat=True)
+        )
+        for set_id, data in pool.map(lambda s: leer(fuente.set, s), set_ids):
+            if data is None:
+                stats['errores'] += 1
+                continue
+            pokemon_set = set_a_modelo(data)
+            PokemonSet.objects.filter(set_id=set_id).update(
+                name=pokemon_set.name,
+                series=pokemon_set.series,
+                total_cards=pokemon_set.total_cards,
+                release_date=pokemon_set.release_date,
+                logo_url=pokemon_set.logo_url,
+                symbol_url=pokemon_set.symbol_url,
+                last_updated=timezone.now(),
+            )
+            stats['sets'] += 1
+
+        card_ids = cartas_pendientes(edad, edad_populares, umbral_populares, limite)
+        hoy = timezone.localdate()
+        for i in range(0, len(card_ids), LOTE_CARTAS):
+            cartas, historial = [], []
+            for card_id, data in pool.map(lambda c: leer(fuente.card, c), card_ids[i:i + LOTE_CARTAS]):
+                if data is None:
+                    stats['errores'] += 1
+                    continue
+                cartas.append((card_id, snapshot_precios(precios_por_fuente(data))))
+                historial.extend(historial_de_carta(data, hoy))
+                # El detalle queda fresco en cache: el request no tiene que ir a TCGdex
+                pokemon_cache.store('card', {'id': card_id}, data)
+
+            guardar_precios(cartas, historial)
+            stats['cartas'] += len(cartas)
+            log(f"{stats['cartas']}/{len(card_ids)} cartas refrescadas")
+
+    return stats
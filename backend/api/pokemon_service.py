@@ -1,109 +1,340 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import Avg, Max, Min
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import cache_backends, pokemon_cache
+from .models import PokemonCard, PokemonPriceHistory, PokemonSet, PokemonSincronizacion
+
+logger = logging.getLogger(__name__)
+
+# Paginación de búsquedas
+PAGE_SIZE = 60
+MAX_PAGE_SIZE = 250
+
+# Historial de precios: días por defecto y agregación según el rango pedido,
+# para que una serie nunca pase de unos cientos de puntos
+HISTORY_DAYS = 90
+HISTORY_MAX_DAYS = 5 * 365
+HISTORY_INTERVALS = ('day', 'week', 'month')
+
+_session = None
+_session_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Sesión HTTP compartida (thread-safe) hacia TCGdex: pool de conexiones keep-alive,
+    reintentos con backoff para GET y compresión. Se crea en el primer uso, ya dentro
+    del worker de gunicorn, para no heredar sockets a través del fork.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=settings.TCGDEX_RETRIES,
+                backoff_factor=settings.TCGDEX_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.TCGDEX_POOL_SIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+                'User-Agent': 'FehuDevelopers/1.0 (+https://fehudevelopers.cl)',
+            })
+            _session = session
+    return _session
+
+
+def _en_paralelo(func):
+    """
+    Ejecuta func() en el pool de hilos de TCGdex (tantos hilos como conexiones del pool
+    HTTP). Cierra la conexión a la base de datos que el hilo haya abierto.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Perezoso: no crear hilos antes del fork de gunicorn
+            _executor = ThreadPoolExecutor(max_workers=settings.TCGDEX_POOL_SIZE, thread_name_prefix='tcgdex')
+
+    def ejecutar():
+        try:
+            return func()
+        finally:
+            connection.close()
+
+    return _executor.submit(ejecutar)
 
-TCGDEX_API = "https://api.tcgdex.net/v2/en"
 
 class PokemonTCGService:
+
+    @staticmethod
+    def _get(path, params=None):
+        """GET a TCGdex; lanza requests.RequestException si falla"""
+        response = get_session().get(
+            f"{settings.TCGDEX_API_URL}/{path}",
+            params=params if params else None,
+            timeout=(settings.TCGDEX_CONNECT_TIMEOUT, settings.TCGDEX_READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def has_local_catalog():
+        """
+        True si sincronizar_pokemon terminó una pasada completa. Con un espejo a medias
+        (una carta guardada, un set con --sets) búsquedas, sets, tipos y rarezas
+        quedarían truncados: hasta la marca se consulta TCGdex.
+        """
+        # Consulta interna de cada request: no cuenta en las estadísticas de la cache
+        with cache_backends.sin_contar():
+            return pokemon_cache.cached('local_catalog', None, PokemonSincronizacion.objects.exists)
     
     @staticmethod
-    def search_cards(name=None, set_id=None, types=None, rarity=None):
+    def search_cards(name=None, set_id=None, types=None, rarity=None, page=1, page_size=PAGE_SIZE):
+        # Filtros normalizados: la misma búsqueda escrita distinto comparte entrada de cache
+        params = {
+            'name': (name or '').strip().lower(),
+            'set': (set_id or '').strip(),
+            'type': (types or '').strip().lower(),
+            'rarity': (rarity or '').strip().lower(),
+        }
+        page = max(1, page)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
         try:
-            params = {}
-            if name:
-                params['name'] = name
-            if set_id:
-                params['set'] = set_id
-            if types:
-                params['type'] = types
-            if rarity:
-                params['rarity'] = rarity
-            
-            response = requests.get(
-                f"{TCGDEX_API}/cards",
-                params=params if params else None,
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            cards = []
-            if isinstance(data, list):
-                for card in data[:100]:
-                    cards.append(PokemonTCGService._parse_card_list(card))
-            
-            return {
-                'cards': cards,
-                'totalCount': len(cards)
-            }
+            if PokemonTCGService.has_local_catalog():
+                return pokemon_cache.cached(
+                    'search', {**params, 'page': page, 'page_size': page_size},
+                    lambda: PokemonTCGService._search_local(params, page, page_size)
+                )
+
+            # TCGdex no pagina: se cachea la lista completa (ya reducida) una vez y
+            # cada página es un slice de esa entrada
+            cards = pokemon_cache.cached('search', params, lambda: PokemonTCGService._search_upstream(params))
+            start = (page - 1) * page_size
+            return PokemonTCGService._page(cards[start:start + page_size], len(cards), page, page_size)
         except requests.RequestException as e:
-            print(f"Error al buscar cartas: {e}")
-            return {'cards': [], 'totalCount': 0}
+            logger.warning('Error al buscar cartas: %s', e)
+            return PokemonTCGService._page([], 0, page, page_size)
+
+    @staticmethod
+    def _page(cards, total, page, page_size):
+        return {
+            'cards': cards,
+            'totalCount': total,
+            'page': page,
+            'pageSize': page_size,
+            'totalPages': -(-total // page_size),
+        }
+
+    @staticmethod
+    def _search_upstream(params):
+        data = PokemonTCGService._get("cards", {k: v for k, v in params.items() if v})
+        if not isinstance(data, list):
+            return []
+        return [PokemonTCGService._parse_card_list(card) for card in data]
+
+    @staticmethod
+    def _search_local(params, page, page_size):
+        queryset = PokemonCard.objects.all()
+        if params['name']:
+            queryset = queryset.filter(name__icontains=params['name'])
+        if params['set']:
+            queryset = queryset.filter(set_id=params['set'])
+        if params['type']:
+            # JSONField guarda ["Fire", ...]; buscar el valor entre comillas evita coincidencias parciales
+            queryset = queryset.filter(types__icontains=f'"{params["type"]}"')
+        if params['rarity']:
+            queryset = queryset.filter(rarity__iexact=params['rarity'])
+
+        # Meta.ordering (name, set_release_date) tiene empates: card_id hace el orden total
+        # para que las páginas no repitan ni salten cartas
+        queryset = queryset.order_by('name', 'set_release_date', 'card_id')
+        start = (page - 1) * page_size
+        campos = ('card_id', 'name', 'image_small', 'image_large', 'set_name', 'rarity')
+        cards = [
+            {
+                'id': card['card_id'],
+                'name': card['name'],
+                'image_small': card['image_small'] or None,
+                'image_large': card['image_large'] or None,
+                'set_name': card['set_name'],
+                'rarity': card['rarity'] or None,
+            }
+            for card in queryset.values(*campos)[start:start + page_size]
+        ]
+        return PokemonTCGService._page(cards, queryset.count(), page, page_size)
     
     @staticmethod
-    def get_card(card_id):
+    def get_card(card_id, fields=None):
         try:
-            response = requests.get(
-                f"{TCGDEX_API}/cards/{card_id}",
-                timeout=15
+            # Se cachea el JSON de TCGdex; el parseo es barato y ocurre por request
+            data = pokemon_cache.cached(
+                'card', {'id': card_id}, lambda: PokemonTCGService._get(f"cards/{card_id}")
             )
-            response.raise_for_status()
-            data = response.json()
-            return PokemonTCGService._parse_card_detail(data)
+            return PokemonTCGService._parse_card_detail(data, fields)
         except requests.RequestException as e:
-            print(f"Error al obtener carta {card_id}: {e}")
+            logger.warning('Error al obtener carta %s: %s', card_id, e)
             return None
     
+    @staticmethod
+    def get_price_history(card_id, days=HISTORY_DAYS, interval=None):
+        """
+        Serie de precios de una carta por fuente, agregada en la base de datos por
+        día, semana o mes (por defecto según el rango pedido).
+        """
+        days = max(1, min(days, HISTORY_MAX_DAYS))
+        if interval not in HISTORY_INTERVALS:
+            interval = 'day' if days <= 90 else 'week' if days <= 730 else 'month'
+
+        params = {'id': card_id, 'days': days, 'interval': interval}
+        return pokemon_cache.cached(
+            'history', params, lambda: PokemonTCGService._price_history(card_id, days, interval)
+        )
+
+    @staticmethod
+    def _price_history(card_id, days, interval):
+        desde = timezone.localdate() - timedelta(days=days)
+        filas = (
+            PokemonPriceHistory.objects
+            .filter(card_id=card_id, date__gte=desde)
+            .annotate(period=Trunc('date', interval))
+            .values('source', 'period')
+            .annotate(
+                low=Min('low'),
+                mid=Avg('mid'),
+                high=Max('high'),
+                market=Avg('market'),
+                currency=Max('currency'),
+            )
+            .order_by('source', 'period')
+        )
+
+        series = {}
+        for fila in filas:
+            serie = series.setdefault(fila['source'], {'currency': fila['currency'], 'points': []})
+            serie['points'].append({
+                'date': fila['period'].isoformat(),
+                'low': _redondear(fila['low']),
+                'mid': _redondear(fila['mid']),
+                'high': _redondear(fila['high']),
+                'market': _redondear(fila['market']),
+            })
+        return {'card_id': card_id, 'days': days, 'interval': interval, 'series': series}
+
     @staticmethod
     def get_sets():
         try:
-            response = requests.get(
-                f"{TCGDEX_API}/sets",
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            sets = []
-            if isinstance(data, list):
-                for s in data:
-                    sets.append({
-                        'id': s.get('id'),
-                        'name': s.get('name'),
-                        'series': s.get('serie', {}).get('name', '') if isinstance(s.get('serie'), dict) else '',
-                        'logo': s.get('logo'),
-                        'symbol': s.get('symbol'),
-                    })
-            return sets
+            return pokemon_cache.cached('sets', None, PokemonTCGService._sets)
         except requests.RequestException as e:
-            print(f"Error al obtener sets: {e}")
+            logger.warning('Error al obtener sets: %s', e)
             return []
+
+    @staticmethod
+    def _sets():
+        if PokemonTCGService.has_local_catalog():
+            return [
+                {
+                    'id': s.set_id,
+                    'name': s.name,
+                    'series': s.series,
+                    'logo': s.logo_url or None,
+                    'symbol': s.symbol_url or None,
+                }
+                for s in PokemonSet.objects.all()
+            ]
+
+        data = PokemonTCGService._get("sets")
+        
+        sets = []
+        if isinstance(data, list):
+            for s in data:
+                sets.append({
+                    'id': s.get('id'),
+                    'name': s.get('name'),
+                    'series': s.get('serie', {}).get('name', '') if isinstance(s.get('serie'), dict) else '',
+                    'logo': s.get('logo'),
+                    'symbol': s.get('symbol'),
+                })
+        return sets
     
     @staticmethod
     def get_rarities():
         try:
-            response = requests.get(
-                f"{TCGDEX_API}/rarities",
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data if isinstance(data, list) else []
+            return pokemon_cache.cached('rarities', None, PokemonTCGService._rarities)
         except requests.RequestException as e:
-            print(f"Error al obtener rarezas: {e}")
+            logger.warning('Error al obtener rarezas: %s', e)
             return []
+
+    @staticmethod
+    def _rarities():
+        if PokemonTCGService.has_local_catalog():
+            return list(
+                PokemonCard.objects.exclude(rarity='')
+                .order_by('rarity').values_list('rarity', flat=True).distinct()
+            )
+
+        data = PokemonTCGService._get("rarities")
+        return data if isinstance(data, list) else []
     
     @staticmethod
     def get_types():
         try:
-            response = requests.get(
-                f"{TCGDEX_API}/types",
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data if isinstance(data, list) else []
+            return pokemon_cache.cached('types', None, PokemonTCGService._types)
         except requests.RequestException as e:
-            print(f"Error al obtener tipos: {e}")
+            logger.warning('Error al obtener tipos: %s', e)
             return []
+
+    @staticmethod
+    def _types():
+        if PokemonTCGService.has_local_catalog():
+            types = set()
+            for card_types in PokemonCard.objects.values_list('types', flat=True).distinct():
+                types.update(card_types or [])
+            return sorted(types)
+
+        data = PokemonTCGService._get("types")
+        return data if isinstance(data, list) else []
+    
+    @staticmethod
+    def get_filters():
+        """
+        Sets, tipos y rarezas para una sola ida y vuelta del cliente. Cada uno sale de su
+        entrada de cache (stale-while-revalidate); sin espejo local, los que falten se
+        piden a TCGdex a la vez y el request espera solo a la llamada más lenta.
+        """
+        getters = {
+            'sets': PokemonTCGService.get_sets,
+            'types': PokemonTCGService.get_types,
+            'rarities': PokemonTCGService.get_rarities,
+        }
+        if PokemonTCGService.has_local_catalog():
+            return {nombre: getter() for nombre, getter in getters.items()}
+        futuros = {nombre: _en_paralelo(getter) for nombre, getter in getters.items()}
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
     
     @staticmethod
     def _parse_card_list(card):
@@ -118,83 +349,97 @@ class PokemonTCGService:
         }
     
     @staticmethod
-    def _parse_card_detail(card):
+    def _parse_card_detail(card, fields=None):
+        """
+        Detalle de una carta. Con fields (iterable de secciones de SECCIONES_CARTA)
+        solo se construyen esas secciones; 'id' va siempre.
+        """
         if not card:
             return None
-        
-        image_base = card.get('image')
-        set_data = card.get('set') or {}
-        if not isinstance(set_data, dict):
-            set_data = {}
-        
-        pricing_data = card.get('pricing') or {}
-        if not isinstance(pricing_data, dict):
-            pricing_data = {}
-        
-        # Extraer precios de Cardmarket (EUR)
-        cardmarket = pricing_data.get('cardmarket') or {}
-        if not isinstance(cardmarket, dict):
-            cardmarket = {}
-        
-        cardmarket_prices = {
-            'low': cardmarket.get('low'),
-            'avg': cardmarket.get('avg'),
-            'trend': cardmarket.get('trend'),
-            'avg1': cardmarket.get('avg1'),
-            'avg7': cardmarket.get('avg7'),
-            'avg30': cardmarket.get('avg30'),
-            'currency': cardmarket.get('unit', 'EUR'),
-            'updated': cardmarket.get('updated'),
-        }
-        
-        # Extraer precios de TCGPlayer (USD)
-        tcgplayer = pricing_data.get('tcgplayer') or {}
-        if not isinstance(tcgplayer, dict):
-            tcgplayer = {}
-        
-        tcgplayer_holofoil = tcgplayer.get('holofoil') or {}
-        tcgplayer_normal = tcgplayer.get('normal') or {}
-        
-        # Usar holofoil si existe, sino normal
-        tcg_prices = tcgplayer_holofoil if tcgplayer_holofoil else tcgplayer_normal
-        if not isinstance(tcg_prices, dict):
-            tcg_prices = {}
-        
-        tcgplayer_prices = {
-            'low': tcg_prices.get('lowPrice'),
-            'mid': tcg_prices.get('midPrice'),
-            'high': tcg_prices.get('highPrice'),
-            'market': tcg_prices.get('marketPrice'),
-            'currency': tcgplayer.get('unit', 'USD'),
-            'updated': tcgplayer.get('updated'),
-        }
-        
-        return {
-            'id': card.get('id'),
-            'name': card.get('name'),
-            'types': card.get('types') or [],
-            'hp': card.get('hp'),
-            'set': {
-                'id': set_data.get('id'),
-                'name': set_data.get('name'),
-                'series': set_data.get('serie', {}).get('name', '') if isinstance(set_data.get('serie'), dict) else '',
-                'logo': set_data.get('logo'),
-            },
-            'rarity': card.get('rarity'),
-            'number': card.get('localId'),
-            'artist': card.get('illustrator'),
-            'images': {
-                'small': f"{image_base}/low.webp" if image_base else None,
-                'large': f"{image_base}/high.webp" if image_base else None,
-            },
-            'attacks': card.get('attacks') or [],
-            'weaknesses': card.get('weaknesses') or [],
-            'resistances': card.get('resistances') or [],
-            'retreat': card.get('retreat'),
-            'description': card.get('description'),
-            'abilities': card.get('abilities') or [],
-            'prices': {
-                'tcgplayer': tcgplayer_prices,
-                'cardmarket': cardmarket_prices,
-            }
-        }
\ No newline at end of file
+
+        if fields is None:
+            secciones = SECCIONES_CARTA
+        else:
+            secciones = {k: v for k, v in SECCIONES_CARTA.items() if k == 'id' or k in fields}
+        return {nombre: construir(card) for nombre, construir in secciones.items()}
+
+
+def _redondear(valor):
+    return round(float(valor), 2) if valor is not None else None
+
+
+def _dict(valor):
+    return valor if isinstance(valor, dict) else {}
+
+
+def _set_de_carta(card):
+    set_data = _dict(card.get('set'))
+    return {
+        'id': set_data.get('id'),
+        'name': set_data.get('name'),
+        'series': _dict(set_data.get('serie')).get('name', ''),
+        'logo': set_data.get('logo'),
+    }
+
+
+def _imagenes_de_carta(card):
+    image_base = card.get('image')
+    return {
+        'small': f"{image_base}/low.webp" if image_base else None,
+        'large': f"{image_base}/high.webp" if image_base else None,
+    }
+
+
+def _precios_de_carta(card):
+    pricing_data = _dict(card.get('pricing'))
+
+    # Extraer precios de Cardmarket (EUR)
+    cardmarket = _dict(pricing_data.get('cardmarket'))
+    cardmarket_prices = {
+        'low': cardmarket.get('low'),
+        'avg': cardmarket.get('avg'),
+        'trend': cardmarket.get('trend'),
+        'avg1': cardmarket.get('avg1'),
+        'avg7': cardmarket.get('avg7'),
+        'avg30': cardmarket.get('avg30'),
+        'currency': cardmarket.get('unit', 'EUR'),
+        'updated': cardmarket.get('updated'),
+    }
+
+    # Extraer precios de TCGPlayer (USD); usar holofoil si existe, sino normal
+    tcgplayer = _dict(pricing_data.get('tcgplayer'))
+    tcg_prices = _dict(tcgplayer.get('holofoil') or tcgplayer.get('normal'))
+    tcgplayer_prices = {
+        'low': tcg_prices.get('lowPrice'),
+        'mid': tcg_prices.get('midPrice'),
+        'high': tcg_prices.get('highPrice'),
+        'market': tcg_prices.get('marketPrice'),
+        'currency': tcgplayer.get('unit', 'USD'),
+        'updated': tcgplayer.get('updated'),
+    }
+
+    return {
+        'tcgplayer': tcgplayer_prices,
+        'cardmarket': cardmarket_prices,
+    }
+
+
+# Secciones del detalle de una carta (?fields=) y cómo se construye cada una
+SECCIONES_CARTA = {
+    'id': lambda card: card.get('id'),
+    'name': lambda card: card.get('name'),
+    'types': lambda card: card.get('types') or [],
+    'hp': lambda card: card.get('hp'),
+    'set': _set_de_carta,
+    'rarity': lambda card: card.get('rarity'),
+    'number': lambda card: card.get('localId'),
+    'artist': lambda card: card.get('illustrator'),
+    'images': _imagenes_de_carta,
+    'attacks': lambda card: card.get('attacks') or [],
+    'weaknesses': lambda card: card.get('weaknesses') or [],
+    'resistances': lambda card: card.get('resistances') or [],
+    'retreat': lambda card: card.get('retreat'),
+    'description': lambda card: card.get('description'),
+    'abilities': lambda card: card.get('abilities') or [],
+    'prices': _precios_de_carta,
+}
@@ -0,0 +1,344 @@
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import pokemon_cache
+from .models import PokemonCard, PokemonPriceHistory, PokemonSet, PokemonSincronizacion
+from .pokemon_service import PokemonTCGService
+
+logger = logging.getLogger(__name__)
+
+# Cartas por upsert
+LOTE_CARTAS = 200
+# Puntos de historial por INSERT
+LOTE_HISTORIAL = 1000
+
+CAMPOS_CARTA = [
+    'name', 'supertype', 'subtypes', 'types', 'hp',
+    'set_id', 'set_name', 'set_series', 'set_release_date',
+    'rarity', 'number', 'artist', 'image_small', 'image_large',
+    'price_low', 'price_mid', 'price_high', 'price_market', 'price_currency',
+    'last_updated',
+]
+
+
+class FuenteTCGdex:
+    """Lee de la API de TCGdex; con grabar_en guarda cada respuesta como dump reutilizable"""
+
+    def __init__(self, grabar_en=None):
+        self.grabar_en = Path(grabar_en) if grabar_en else None
+
+    def sets(self):
+        return self._leer('sets')
+
+    def set(self, set_id):
+        return self._leer(f'sets/{set_id}')
+
+    def card(self, card_id):
+        return self._leer(f'cards/{card_id}')
+
+    def _leer(self, path):
+        data = PokemonTCGService._get(path)
+        if self.grabar_en:
+            destino = self.grabar_en / f'{path}.json'
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        return data
+
+
+class FuenteDump:
+    """
+    Dump grabado de TCGdex (sets.json, sets/<id>.json, cards/<id>.json).
+    Mismo formato que FuenteTCGdex(grabar_en=...), sirve de stand-in sin red.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+
+    def sets(self):
+        return self._leer('sets')
+
+    def set(self, set_id):
+        return self._leer(f'sets/{set_id}')
+
+    def card(self, card_id):
+        return self._leer(f'cards/{card_id}')
+
+    def _leer(self, path):
+        with open(self.directorio / f'{path}.json', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def _decimal(valor):
+    if valor is None:
+        return None
+    try:
+        return Decimal(str(valor)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _fecha(valor):
+    if not valor:
+        return None
+    return parse_date(str(valor).replace('/', '-'))
+
+
+def set_a_modelo(data):
+    """Convierte el detalle de un set de TCGdex en PokemonSet (sin guardar)"""
+    serie = data.get('serie') if isinstance(data.get('serie'), dict) else {}
+    card_count = data.get('cardCount') if isinstance(data.get('cardCount'), dict) else {}
+    return PokemonSet(
+        set_id=data.get('id'),
+        name=data.get('name') or '',
+        series=serie.get('name', ''),
+        total_cards=card_count.get('total') or 0,
+        release_date=_fecha(data.get('releaseDate')),
+        logo_url=data.get('logo') or '',
+        symbol_url=data.get('symbol') or '',
+    )
+
+
+def precios_por_fuente(data):
+    """
+    Precios de una carta de TCGdex por fuente: {fuente: (low, mid, high, market, moneda)}.
+    Solo incluye las fuentes que traen algún precio.
+    """
+    prices = PokemonTCGService._parse_card_detail(data, fields=['prices'])['prices']
+    tcgplayer = prices['tcgplayer']
+    cardmarket = prices['cardmarket']
+
+    fuentes = {}
+    if any(tcgplayer[k] is not None for k in ('low', 'mid', 'high', 'market')):
+        fuentes['tcgplayer'] = (
+            tcgplayer['low'], tcgplayer['mid'], tcgplayer['high'], tcgplayer['market'],
+            tcgplayer['currency'] or 'USD',
+        )
+    if any(cardmarket[k] is not None for k in ('low', 'avg', 'trend')):
+        fuentes['cardmarket'] = (
+            cardmarket['low'], cardmarket['avg'], None, cardmarket['trend'],
+            cardmarket['currency'] or 'EUR',
+        )
+    return fuentes
+
+
+def carta_a_modelo(data, pokemon_set):
+    """Convierte el detalle de una carta de TCGdex en PokemonCard (sin guardar)"""
+    image_base = data.get('image')
+
+    # TCGPlayer (USD) si trae precios, sino Cardmarket (EUR)
+    low, mid, high, market, currency = snapshot_precios(precios_por_fuente(data))
+
+    return PokemonCard(
+        card_id=data.get('id'),
+        name=data.get('name') or '',
+        supertype=data.get('category') or '',
+        subtypes=[t for t in (data.get('stage'), data.get('trainerType'), data.get('energyType')) if t],
+        types=data.get('types') or [],
+        hp=str(data.get('hp') or ''),
+        set_id=pokemon_set.set_id,
+        set_name=pokemon_set.name,
+        set_series=pokemon_set.series,
+        set_release_date=pokemon_set.release_date,
+        rarity=data.get('rarity') or '',
+        number=str(data.get('localId') or ''),
+        artist=data.get('illustrator') or '',
+        image_small=f"{image_base}/low.webp" if image_base else '',
+        image_large=f"{image_base}/high.webp" if image_base else '',
+        price_low=_decimal(low),
+        price_mid=_decimal(mid),
+        price_high=_decimal(high),
+        price_market=_decimal(market),
+        price_currency=currency,
+    )
+
+
+def snapshot_precios(fuentes):
+    """Precio que se guarda en PokemonCard: TCGPlayer si trae, sino Cardmarket"""
+    return fuentes.get('tcgplayer') or fuentes.get('cardmarket') or (None, None, None, None, 'EUR')
+
+
+def historial_de_carta(data, fecha):
+    """Filas de PokemonPriceHistory (una por fuente con precios) para el detalle de una carta"""
+    return [
+        PokemonPriceHistory(
+            card_id=data.get('id'),
+            source=source,
+            date=fecha,
+            low=_decimal(low),
+            mid=_decimal(mid),
+            high=_decimal(high),
+            market=_decimal(market),
+            currency=currency[:3],
+        )
+        for source, (low, mid, high, market, currency) in precios_por_fuente(data).items()
+    ]
+
+
+def guardar_historial(filas):
+    """
+    Agrega puntos al historial. Si la carta ya tiene punto ese día se reemplaza por
+    la lectura más reciente; los días anteriores nunca se tocan.
+    """
+    for i in range(0, len(filas), LOTE_HISTORIAL):
+        PokemonPriceHistory.objects.bulk_create(
+            filas[i:i + LOTE_HISTORIAL],
+            update_conflicts=True,
+            unique_fields=['card_id', 'date', 'source'],
+            update_fields=['low', 'mid', 'high', 'market', 'currency'],
+        )
+
+
+def guardar_cartas(cartas):
+    """Upsert por card_id"""
+    if cartas:
+        PokemonCard.objects.bulk_create(
+            cartas,
+            update_conflicts=True,
+            unique_fields=['card_id'],
+            update_fields=CAMPOS_CARTA,
+        )
+
+
+def sincronizar_catalogo(fuente, set_ids=None, incremental=True, log=logger.info):
+    """
+    Llena PokemonSet/PokemonCard desde una fuente (API o dump).
+    En modo incremental se saltan los sets completos y solo se piden las cartas que faltan.
+    Una pasada por todos los sets sin errores deja la marca de PokemonSincronizacion:
+    desde ahí búsquedas y filtros usan el espejo local en vez de TCGdex.
+    """
+    stats = {'sets': 0, 'sets_omitidos': 0, 'cartas': 0, 'errores': 0}
+    hoy = timezone.localdate()
+
+    for brief in fuente.sets() or []:
+        set_id = brief.get('id')
+        if not set_id or (set_ids and set_id not in set_ids):
+            continue
+
+        card_count = brief.get('cardCount') if isinstance(brief.get('cardCount'), dict) else {}
+        total = card_count.get('total') or 0
+        existentes = set(PokemonCard.objects.filter(set_id=set_id).values_list('card_id', flat=True))
+
+        if incremental and total and len(existentes) >= total and PokemonSet.objects.filter(set_id=set_id).exists():
+            stats['sets_omitidos'] += 1
+            continue
+
+        try:
+            detalle = fuente.set(set_id)
+        except (requests.RequestException, OSError, ValueError) as e:
+            log(f"Error al obtener set {set_id}: {e}")
+            stats['errores'] += 1
+            continue
+
+        pokemon_set = set_a_modelo(detalle)
+        PokemonSet.objects.update_or_create(
+            set_id=pokemon_set.set_id,
+            defaults={
+                'name': pokemon_set.name,
+                'series': pokemon_set.series,
+                'total_cards': pokemon_set.total_cards,
+                'release_date': pokemon_set.release_date,
+                'logo_url': pokemon_set.logo_url,
+                'symbol_url': pokemon_set.symbol_url,
+            }
+        )
+        stats['sets'] += 1
+
+        lote, historial = [], []
+        for brief_card in detalle.get('cards') or []:
+            card_id = brief_card.get('id')
+            if not card_id or (incremental and card_id in existentes):
+                continue
+            try:
+                data = fuente.card(card_id)
+                lote.append(carta_a_modelo(data, pokemon_set))
+                historial.extend(historial_de_carta(data, hoy))
+            except (requests.RequestException, OSError, ValueError) as e:
+                log(f"Error al obtener carta {card_id}: {e}")
+                stats['errores'] += 1
+                continue
+
+            if len(lote) >= LOTE_CARTAS:
+                guardar_cartas(lote)
+                guardar_historial(historial)
+                stats['cartas'] += len(lote)
+                lote, historial = [], []
+
+        guardar_cartas(lote)
+        guardar_historial(historial)
+        stats['cartas'] += len(lote)
+        log(f"Set {set_id}: {pokemon_set.name} sincronizado")
+
+    if set_ids is None and not stats['errores']:
+        marcar_sincronizacion()
+    elif set_ids is None:
+        log("Hubo errores: el espejo local sigue sin marcarse como completo")
+    return stats
+
+
+def marcar_sincronizacion():
+    PokemonSincronizacion.objects.update_or_create(pk=1, defaults={
+        'completada': timezone.now(),
+        'sets': PokemonSet.objects.count(),
+        'cartas': PokemonCard.objects.count(),
+    })
+    # Sin esperar el TTL de la entrada anterior (False)
+    pokemon_cache.store('local_catalog', None, True)
+
+
+def actualizar_precios(fuente, card_ids, log=logger.info):
+    """
+    Vuelve a leer el detalle de las cartas indicadas: actualiza el snapshot de
+    precios de PokemonCard y agrega el punto del día al historial, por lotes.
+    """
+    stats = {'cartas': 0, 'puntos': 0, 'errores': 0}
+    hoy = timezone.localdate()
+    card_ids = list(card_ids)
+
+    for i in range(0, len(card_ids), LOTE_CARTAS):
+        cartas, historial = [], []
+        for card_id in card_ids[i:i + LOTE_CARTAS]:
+            try:
+                data = fuente.card(card_id)
+            except (requests.RequestException, OSError, ValueError) as e:
+                log(f"Error al obtener carta {card_id}: {e}")
+                stats['errores'] += 1
+                continue
+            cartas.append((card_id, snapshot_precios(precios_por_fuente(data))))
+            historial.extend(historial_de_carta(data, hoy))
+
+        guardar_precios(cartas, historial)
+        stats['cartas'] += len(cartas)
+        stats['puntos'] += len(historial)
+        log(f"{stats['cartas']}/{len(card_ids)} cartas actualizadas")
+
+    return stats
+
+
+def guardar_precios(cartas, historial):
+    """Snapshot de precios [(card_id, (low, mid, high, market, moneda))] + historial, en una transacción"""
+    ahora = timezone.now()
+    snapshot = dict(cartas)
+    modelos = list(PokemonCard.objects.filter(card_id__in=list(snapshot)).only('id', 'card_id'))
+    for carta in modelos:
+        low, mid, high, market, currency = snapshot[carta.card_id]
+        carta.price_low = _decimal(low)
+        carta.price_mid = _decimal(mid)
+        carta.price_high = _decimal(high)
+        carta.price_market = _decimal(market)
+        carta.price_currency = currency
+        # bulk_update no aplica auto_now
+        carta.last_updated = ahora
+
+    with transaction.atomic():
+        PokemonCard.objects.bulk_update(
+            modelos,
+            ['price_low', 'price_mid', 'price_high', 'price_market', 'price_currency', 'last_updated'],
+        )
+        guardar_historial(historial)
@@ -0,0 +1,47 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from django.utils.http import http_date
+
+# Alias compartido por todos los workers (archivos en el nodo o Redis entre réplicas, ver
+# settings.CACHE_BACKEND): invalidar aquí borra la entrada para todos. Con una cache por
+# proceso (LocMem) los demás workers seguirían sirviendo la versión anterior hasta el TTL
+cache = ConnectionProxy(caches, 'posts')
+
+# Los posts publicados casi no cambian y cada guardado invalida su entrada:
+# el TTL solo acota lo que se queda en cache sin visitas
+TTL = 24 * 60 * 60
+
+CACHE_KEY = 'post:slug:{}'
+
+
+def obtener(slug):
+    """Entrada cacheada de un post ({'data', 'etag', 'last_modified'}) o None"""
+    return cache.get(CACHE_KEY.format(slug))
+
+
+def guardar(post, data):
+    """Guarda la respuesta ya serializada de un post junto con sus validadores HTTP"""
+    entrada = {
+        'data': data,
+        'etag': etag(post),
+        'last_modified': int(post.fecha_actualizacion.timestamp()),
+    }
+    cache.set(CACHE_KEY.format(post.slug), entrada, TTL)
+    return entrada
+
+
+def invalidar(*slugs):
+    cache.delete_many([CACHE_KEY.format(s) for s in slugs if s])
+
+
+def etag(post):
+    """ETag fuerte derivado de fecha_actualizacion (cambia en cada guardado)"""
+    return '"post-{}-{:x}"'.format(post.pk, int(post.fecha_actualizacion.timestamp() * 1_000_000))
+
+
+def encabezados(response, entrada):
+    response['ETag'] = entrada['etag']
+    response['Last-Modified'] = http_date(entrada['last_modified'])
+    # El navegador revalida siempre; si no hubo cambios recibe un 304 sin cuerpo
+    response['Cache-Control'] = 'public, no-cache'
+    return response
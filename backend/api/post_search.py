@@ -0,0 +1,152 @@
+import html
+
+from django.db import connection
+from django.db.models import BooleanField, Case, CharField, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .search import tokenizar
+
+# Máximo de resultados rankeados que devuelve una búsqueda (SQLite)
+MAX_RESULTADOS = 200
+
+# Marcas de resaltado que no aparecen en el texto: el HTML se arma al final, ya escapado
+INICIO_MARCA = '\x02'
+FIN_MARCA = '\x03'
+
+# Peso del título frente al resto del documento (bm25 en SQLite)
+PESO_TITULO = 10.0
+
+# Configuración 'spanish' con unaccent antes del stemmer (migración 0018): documento e índice
+# quedan sin acentos igual que la consulta, que viene de tokenizar()
+CONFIG_PG = 'espanol_sin_acentos'
+_VECTOR_PG = (
+    f"setweight(to_tsvector('{CONFIG_PG}', api_post.titulo), 'A') || "
+    f"setweight(to_tsvector('{CONFIG_PG}', api_post.documento_busqueda), 'B')"
+)
+_CONSULTA_PG = f"to_tsquery('{CONFIG_PG}', %s)"
+
+
+# Triggers que mantienen api_post_fts al día (creados en la migración 0014). Cuando una
+# migración posterior hace que SQLite reconstruya api_post (AlterField, RemoveField...),
+# la tabla nueva no los tiene: asegurar_triggers_sqlite los vuelve a crear tras migrate
+TRIGGERS_SQLITE = {
+    'api_post_fts_ai': """
+        CREATE TRIGGER IF NOT EXISTS api_post_fts_ai AFTER INSERT ON api_post BEGIN
+            INSERT INTO api_post_fts(rowid, titulo, documento_busqueda)
+            VALUES (new.id, new.titulo, new.documento_busqueda);
+        END
+    """,
+    'api_post_fts_ad': """
+        CREATE TRIGGER IF NOT EXISTS api_post_fts_ad AFTER DELETE ON api_post BEGIN
+            INSERT INTO api_post_fts(api_post_fts, rowid, titulo, documento_busqueda)
+            VALUES ('delete', old.id, old.titulo, old.documento_busqueda);
+        END
+    """,
+    'api_post_fts_au': """
+        CREATE TRIGGER IF NOT EXISTS api_post_fts_au AFTER UPDATE OF titulo, documento_busqueda ON api_post BEGIN
+            INSERT INTO api_post_fts(api_post_fts, rowid, titulo, documento_busqueda)
+            VALUES ('delete', old.id, old.titulo, old.documento_busqueda);
+            INSERT INTO api_post_fts(rowid, titulo, documento_busqueda)
+            VALUES (new.id, new.titulo, new.documento_busqueda);
+        END
+    """,
+}
+
+
+def asegurar_triggers_sqlite(conexion):
+    """
+    Recrea los triggers de api_post_fts que falten y, si faltaba alguno, reconstruye el
+    índice (pudo perder cambios mientras no estaban). Devuelve los triggers recreados.
+    No hace nada fuera de SQLite o si la tabla FTS todavía no existe.
+    """
+    if conexion.vendor != 'sqlite':
+        return []
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'api_post_fts' "
+            "OR (type = 'trigger' AND tbl_name = 'api_post')"
+        )
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        if 'api_post_fts' not in existentes:
+            return []
+        faltantes = [nombre for nombre in TRIGGERS_SQLITE if nombre not in existentes]
+        for nombre in faltantes:
+            cursor.execute(TRIGGERS_SQLITE[nombre])
+        if faltantes:
+            cursor.execute("INSERT INTO api_post_fts(api_post_fts) VALUES ('rebuild')")
+    return faltantes
+
+
+def buscar_posts(queryset, q):
+    """
+    Filtra queryset por la búsqueda q y lo ordena por relevancia. Cada post trae
+    `rank` y `resaltado` (fragmento con las coincidencias marcadas, ver resaltado_html).
+    """
+    tokens = tokenizar(q)
+    if not tokens:
+        return queryset.none()
+
+    if connection.vendor == 'sqlite':
+        return _buscar_sqlite(queryset, tokens)
+    if connection.vendor == 'postgresql':
+        return _buscar_postgres(queryset, tokens)
+
+    # Otros motores: sin índice, coincidencia simple
+    filtro = Q()
+    for token in tokens:
+        filtro &= Q(titulo__icontains=token) | Q(documento_busqueda__icontains=token)
+    return queryset.filter(filtro).annotate(
+        rank=Value(0.0, output_field=FloatField()),
+        resaltado=Value('', output_field=CharField()),
+    ).order_by('-fecha_creacion')
+
+
+def resaltado_html(texto):
+    """Escapa el fragmento resaltado y convierte las marcas en <mark>"""
+    if not texto:
+        return texto
+    return html.escape(texto).replace(INICIO_MARCA, '<mark>').replace(FIN_MARCA, '</mark>')
+
+
+def _buscar_sqlite(queryset, tokens):
+    # Cada token como prefijo entre comillas: el texto del usuario nunca es sintaxis FTS5
+    consulta = ' '.join(f'"{t}"*' for t in tokens)
+    # Los filtros del queryset (activo, categoría, ...) van en la misma consulta, contra
+    # api_post y antes del LIMIT: si no, los mejores resultados podrían ser todos descartados
+    filtrados, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT api_post_fts.rowid, bm25(api_post_fts, {PESO_TITULO}, 1.0) AS rank,
+                   snippet(api_post_fts, 1, %s, %s, '…', 24)
+            FROM api_post_fts
+            WHERE api_post_fts MATCH %s AND api_post_fts.rowid IN ({filtrados})
+            ORDER BY rank
+            LIMIT %s
+            """,
+            [INICIO_MARCA, FIN_MARCA, consulta, *params, MAX_RESULTADOS],
+        )
+        filas = cursor.fetchall()
+
+    if not filas:
+        return queryset.none()
+
+    # bm25 es negativo (más negativo = más relevante); se expone como puntaje positivo
+    return queryset.filter(pk__in=[f[0] for f in filas]).annotate(
+        rank=Case(*[When(pk=pk, then=Value(-rank)) for pk, rank, _ in filas], output_field=FloatField()),
+        resaltado=Case(*[When(pk=pk, then=Value(snip)) for pk, _, snip in filas], output_field=CharField()),
+    ).order_by('-rank')
+
+
+def _buscar_postgres(queryset, tokens):
+    consulta = ' & '.join(f'{t}:*' for t in tokens)
+    opciones = f'StartSel={INICIO_MARCA}, StopSel={FIN_MARCA}, MaxWords=35, MinWords=15'
+    return queryset.alias(
+        coincide=RawSQL(f'({_VECTOR_PG}) @@ {_CONSULTA_PG}', [consulta], output_field=BooleanField()),
+    ).filter(coincide=True).annotate(
+        rank=RawSQL(f'ts_rank({_VECTOR_PG}, {_CONSULTA_PG})', [consulta], output_field=FloatField()),
+        resaltado=RawSQL(
+            f"ts_headline('{CONFIG_PG}', api_post.documento_busqueda, {_CONSULTA_PG}, %s)",
+            [consulta, opciones], output_field=CharField(),
+        ),
+    ).order_by('-rank')
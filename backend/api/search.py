@@ -0,0 +1,104 @@
+import re
+import unicodedata
+
+from django.db import transaction
+
+# Campos de Producto que forman el documento de búsqueda
+CAMPOS_BUSQUEDA_PRODUCTO = [
+    'descripcion', 'marca', 'modelo', 'version', 'posicion',
+    'ubicacion', 'lado', 'proveedor', 'marca_prod',
+]
+
+MAX_LARGO_TOKEN = 50
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Sufijo que cierra el rango de un prefijo: token >= t AND token < t + U+FFFF
+# usa el índice B-tree tanto en SQLite como en PostgreSQL (LIKE no siempre lo hace).
+_FIN_PREFIJO = '\uffff'
+
+
+def normalizar(texto):
+    """Quita acentos y pasa a minúsculas"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.casefold()
+
+
+def tokenizar(texto):
+    """Divide un texto normalizado en tokens alfanuméricos"""
+    return [t[:MAX_LARGO_TOKEN] for t in _TOKEN_RE.findall(normalizar(texto))]
+
+
+def documento_producto(producto):
+    """Documento de búsqueda desnormalizado de un producto"""
+    partes = [getattr(producto, campo, '') for campo in CAMPOS_BUSQUEDA_PRODUCTO]
+    return ' '.join(tokenizar(' '.join(str(p) for p in partes if p)))
+
+
+def indexar_productos(productos):
+    """
+    Regenera el índice de búsqueda de los productos dados.
+    Los productos cuyo documento no cambió se omiten.
+    """
+    from .models import ProductoIndice, ProductoToken
+
+    productos = [p for p in productos if p.pk]
+    if not productos:
+        return 0
+
+    actuales = dict(
+        ProductoIndice.objects
+        .filter(producto_id__in=[p.pk for p in productos])
+        .values_list('producto_id', 'documento')
+    )
+
+    cambiados = {}
+    for producto in productos:
+        documento = documento_producto(producto)
+        if actuales.get(producto.pk) != documento:
+            cambiados[producto.pk] = documento
+
+    if not cambiados:
+        return 0
+
+    with transaction.atomic():
+        ids = list(cambiados)
+        ProductoToken.objects.filter(producto_id__in=ids).delete()
+        ProductoIndice.objects.filter(producto_id__in=ids).delete()
+        ProductoIndice.objects.bulk_create(
+            [ProductoIndice(producto_id=pk, documento=doc) for pk, doc in cambiados.items()]
+        )
+        ProductoToken.objects.bulk_create(
+            [
+                ProductoToken(producto_id=pk, token=token)
+                for pk, doc in cambiados.items()
+                for token in set(doc.split())
+            ],
+            batch_size=1000,
+        )
+    return len(cambiados)
+
+
+def buscar_productos(queryset, search):
+    """
+    Filtra el queryset con el índice invertido.
+    Cada término es un rango por prefijo sobre ProductoToken.token, así que
+    una búsqueda de varios términos cuesta lo mismo que varias de un término.
+    Los términos de 4 dígitos se interpretan como año de compatibilidad.
+    """
+    from .models import ProductoToken
+
+    for termino in search.split():
+        if termino.isdigit() and len(termino) == 4:
+            anio = int(termino)
+            queryset = queryset.filter(anio_desde__lte=anio, anio_hasta__gte=anio)
+            continue
+
+        for token in tokenizar(termino):
+            ids = ProductoToken.objects.filter(
+                token__gte=token, token__lt=token + _FIN_PREFIJO
+            ).values('producto_id')
+            queryset = queryset.filter(id__in=ids)
+
+    return queryset
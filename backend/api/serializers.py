@@ -1,6 +1,30 @@
 from rest_framework import serializers
 from .models import Proyecto, Tecnologia, Producto, Contacto
 
+
+def campos_solicitados(request):
+    """Conjunto de campos pedidos en ?fields=a,b,c (None si no se pidió ninguno)"""
+    if request is None:
+        return None
+    campos = {c.strip() for c in request.query_params.get('fields', '').split(',') if c.strip()}
+    return campos or None
+
+
+class SparseFieldsMixin:
+    """
+    Serializa solo los campos pedidos en ?fields= (sparse fieldsets). Los campos que
+    no se piden se quitan antes de serializar, así tampoco se calculan. Los nombres
+    desconocidos se ignoran e 'id' va siempre, como en el detalle de cartas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_solicitados(self.context.get('request'))
+        if campos:
+            for nombre in set(self.fields) - campos - {'id'}:
+                self.fields.pop(nombre)
+
+
 class ProyectoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Proyecto
@@ -11,7 +35,7 @@ class TecnologiaSerializer(serializers.ModelSerializer):
         model = Tecnologia
         fields = '__all__'
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     iva = serializers.DecimalField(max_digits=10, decimal_places=0, read_only=True)
     precio_minimo_venta = serializers.DecimalField(max_digits=10, decimal_places=0, read_only=True)
     precio_venta = serializers.DecimalField(max_digits=10, decimal_places=0, read_only=True)
@@ -28,17 +52,25 @@ class ContactoSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 from .models import Post
+from .post_search import resaltado_html
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = '__all__'
 
-class PostListSerializer(serializers.ModelSerializer):
+# Columnas de Post que usa la tarjeta del índice (el listado hace .only() sobre ellas)
+CAMPOS_POST_LISTA = ['id', 'titulo', 'slug', 'resumen', 'extracto', 'tiempo_lectura', 'imagen', 'categoria', 'estado', 'activo', 'tags', 'fecha_creacion', 'destacado']
 
-    imagen = serializers.ImageField(required=False, allow_null=True)
+class PostListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Tarjeta del índice del blog: sin contenido, con extracto y tiempo de lectura precalculados"""
+    # Solo en búsquedas (?q=): fragmento con las coincidencias en <mark>
+    resaltado = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'titulo', 'slug', 'resumen', 'imagen', 'contenido', 'categoria', 'estado', 'activo', 'tags', 'fecha_creacion', 'destacado']
-        read_only_fields = ['slug', 'fecha_creacion']
\ No newline at end of file
+        fields = CAMPOS_POST_LISTA + ['resaltado']
+        read_only_fields = ['slug', 'fecha_creacion']
+
+    def get_resaltado(self, obj):
+        return resaltado_html(getattr(obj, 'resaltado', None))
@@ -0,0 +1,40 @@
+import logging
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import post_cache, post_search
+from .models import Post, Producto
+from .search import indexar_productos
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Producto)
+def indexar_producto(sender, instance, **kwargs):
+    """Mantiene el índice de búsqueda al guardar un producto (también en loaddata)"""
+    indexar_productos([instance])
+
+
+@receiver(pre_save, sender=Post)
+def recordar_slug_anterior(sender, instance, **kwargs):
+    """Si el slug cambia, la entrada cacheada del slug anterior también se invalida"""
+    if instance.pk:
+        instance._slug_anterior = Post.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidar_post(sender, instance, **kwargs):
+    slugs = (instance.slug, getattr(instance, '_slug_anterior', None))
+    post_cache.invalidar(*slugs)
+    # Un request concurrente pudo volver a cachear la versión anterior antes del commit
+    transaction.on_commit(lambda: post_cache.invalidar(*slugs))
+
+
+def restaurar_triggers_busqueda(sender, using, **kwargs):
+    """post_migrate (conectado en ApiConfig.ready): SQLite borra los triggers del FTS de posts al reconstruir api_post"""
+    faltantes = post_search.asegurar_triggers_sqlite(connections[using])
+    if faltantes:
+        logger.warning('Triggers de búsqueda de posts recreados: %s (índice reconstruido)', ', '.join(faltantes))
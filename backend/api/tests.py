@@ -1,3 +1,1066 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+from PIL import Image
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import (
+    cache_backends, correo, image_proxy, pokemon_cache, pokemon_refresh, pokemon_service, post_cache, post_search,
+)
+from .models import (
+    Contacto, CorreoPendiente, PokemonCard, PokemonPriceHistory, PokemonSet, PokemonSincronizacion, Post, Producto,
+)
+from .pokemon_service import PokemonTCGService
+from .pokemon_sync import FuenteDump, actualizar_precios, sincronizar_catalogo
+from .search import buscar_productos
+from .post_search import buscar_posts
+from .throttling import ContactoPostIPThrottle
+
+# Dump grabado de TCGdex (formato de sincronizar_pokemon --grabar)
+DUMP_TCGDEX = Path(__file__).parent / 'fixtures' / 'tcgdex'
+
+
+class CacheTemporal:
+    """
+    Las pruebas que usan la cache trabajan en archivos dentro de un directorio temporal
+    por clase, vacío al empezar cada prueba: nunca se limpia la cache configurada
+    (el Redis de REDIS_URL o el CACHE_DIR que comparten los servidores de desarrollo).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        directorio = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directorio.cleanup)
+        ajustes = override_settings(CACHES={
+            alias: {
+                'BACKEND': 'api.cache_backends.FileBasedCache',
+                'LOCATION': os.path.join(directorio.name, alias),
+                'KEY_PREFIX': f'prueba:{alias}',
+                'NAMESPACE': alias,
+            }
+            for alias in ('default', *settings.CACHE_NAMESPACES)
+        })
+        ajustes.enable()
+        cls.addClassCleanup(ajustes.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+
+class TokenBucketThrottleTests(CacheTemporal, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+
+    def _permitir(self, **extra):
+        throttle = ContactoPostIPThrottle()
+        request = self.factory.post('/api/contacto/', **extra)
+        return throttle.allow_request(request, None), throttle
+
+    def test_rafaga_hasta_la_capacidad(self):
+        capacidad = ContactoPostIPThrottle().capacidad
+        resultados = [self._permitir()[0] for _ in range(capacidad)]
+        permitido, throttle = self._permitir()
+
+        self.assertTrue(all(resultados))
+        self.assertFalse(permitido)
+        self.assertGreater(throttle.wait(), 0)
+
+    def test_concurrentes_no_superan_la_capacidad(self):
+        capacidad = ContactoPostIPThrottle().capacidad
+        resultados = []
+        barrera = threading.Barrier(capacidad * 4)
+
+        def pedir():
+            barrera.wait()
+            resultados.append(self._permitir()[0])
+
+        hilos = [threading.Thread(target=pedir) for _ in range(capacidad * 4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(resultados.count(True), capacidad)
+
+    def test_otro_metodo_no_consume(self):
+        throttle = ContactoPostIPThrottle()
+        for _ in range(throttle.capacidad * 2):
+            self.assertTrue(throttle.allow_request(self.factory.get('/api/contacto/'), None))
+
+    def _agotar(self, rest_framework, cabeceras):
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            capacidad = ContactoPostIPThrottle().capacidad
+            return [
+                self._permitir(HTTP_X_FORWARDED_FOR=cabeceras(i), REMOTE_ADDR='10.0.0.1')[0]
+                for i in range(capacidad + 1)
+            ]
+
+    def test_sin_proxy_ignora_x_forwarded_for(self):
+        config = {**api_settings.user_settings, 'NUM_PROXIES': 0}
+        resultados = self._agotar(config, lambda i: f'203.0.113.{i}')
+        self.assertFalse(resultados[-1])
+
+    def test_con_proxy_usa_la_ip_que_agrega_el_proxy(self):
+        # El cliente inventa la primera IP; el proxy agrega la real al final
+        config = {**api_settings.user_settings, 'NUM_PROXIES': 1}
+        resultados = self._agotar(config, lambda i: f'203.0.113.{i}, 198.51.100.7')
+        self.assertFalse(resultados[-1])
+
+
+class ProductoCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Varios productos con el mismo precio y años: el orden pedido tiene empates
+        for i in range(7):
+            Producto.objects.create(
+                id_producto=f'P{i}', proveedor='Prov', codigo_proveedor=f'C{i}', descripcion=f'Repuesto {i}',
+                marca='TOYOTA', modelo='YARIS', anio_desde=2010 + i % 2, anio_hasta=2015, marca_prod='X',
+                precio_costo=10000 + (i % 2) * 5000,
+            )
+
+    def _recorrer(self, **params):
+        client = APIClient()
+        ids = []
+        respuesta = client.get('/api/productos/', {'page_size': 2, **params})
+        while True:
+            self.assertEqual(respuesta.status_code, 200)
+            ids += [producto['id'] for producto in respuesta.data['results']]
+            if not respuesta.data['next']:
+                return ids
+            respuesta = client.get(respuesta.data['next'])
+
+    def test_recorre_todas_las_paginas(self):
+        ids = self._recorrer()
+        self.assertEqual(ids, sorted(Producto.objects.values_list('id', flat=True)))
+
+    def test_orden_con_empates_no_repite_ni_salta(self):
+        for ordering in ('precio_venta', '-precio_venta', 'anio_desde', '-anio_hasta,precio_venta'):
+            with self.subTest(ordering=ordering):
+                ids = self._recorrer(ordering=ordering)
+                self.assertCountEqual(ids, Producto.objects.values_list('id', flat=True))
+                esperado = Producto.objects.order_by(*ordering.split(','), 'id').values_list('id', flat=True)
+                self.assertEqual(ids, list(esperado))
+
+
+def producto(id_producto, marca='TOYOTA', modelo='YARIS', anio_desde=2015, anio_hasta=2019, **kwargs):
+    kwargs.setdefault('descripcion', f'Repuesto {id_producto}')
+    return Producto.objects.create(
+        id_producto=id_producto, proveedor='Prov', codigo_proveedor=id_producto,
+        marca=marca, modelo=modelo, anio_desde=anio_desde, anio_hasta=anio_hasta, marca_prod='X',
+        precio_costo=10000, **kwargs,
+    )
+
+
+class FitmentTests(TestCase):
+    def _fitment(self, **params):
+        return APIClient().get('/api/productos/fitment/', params)
+
+    def _ids(self, **params):
+        respuesta = self._fitment(**params)
+        self.assertEqual(respuesta.status_code, 200)
+        return [p['id_producto'] for p in respuesta.data['results']]
+
+    def test_rango_de_anios_inclusivo(self):
+        producto('YARIS-15-19')
+        producto('YARIS-10-14', anio_desde=2010, anio_hasta=2014)
+        producto('COROLLA', modelo='COROLLA')
+
+        self.assertEqual(self._ids(marca='toyota', modelo='yaris', anio=2017), ['YARIS-15-19'])
+        self.assertEqual(self._ids(marca='toyota', modelo='yaris', anio=2015), ['YARIS-15-19'])
+        self.assertEqual(self._ids(marca='toyota', modelo='yaris', anio=2014), ['YARIS-10-14'])
+        self.assertEqual(self._ids(marca='toyota', modelo='yaris', anio=2020), [])
+        # Sin modelo: todos los Toyota de ese año
+        self.assertEqual(sorted(self._ids(marca='TOYOTA', anio=2017)), ['COROLLA', 'YARIS-15-19'])
+
+    def test_marca_y_modelo_se_guardan_en_mayusculas(self):
+        guardado = producto('MINUS', marca=' toyota', modelo='Yaris ')
+        self.assertEqual((guardado.marca, guardado.modelo), ('TOYOTA', 'YARIS'))
+
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = Path(directorio) / 'catalogo.csv'
+            archivo.write_text(
+                'id_producto,proveedor,codigo_proveedor,descripcion,marca,modelo,anio_desde,anio_hasta,marca_prod,precio_costo\n'
+                'IMPORTADO,Prov,C1,Pastillas,toyota,yaris,2015,2019,X,10000\n',
+                encoding='utf-8',
+            )
+            call_command('importar_catalogo', str(archivo), stdout=io.StringIO())
+
+        self.assertEqual(sorted(self._ids(marca='Toyota', modelo='Yaris', anio=2017)), ['IMPORTADO', 'MINUS'])
+
+    def test_paginado_por_cursor(self):
+        for i in range(5):
+            producto(f'P{i}')
+
+        respuesta = self._fitment(marca='toyota', anio=2017, page_size=2)
+        ids = [p['id_producto'] for p in respuesta.data['results']]
+        while respuesta.data['next']:
+            respuesta = APIClient().get(respuesta.data['next'])
+            ids += [p['id_producto'] for p in respuesta.data['results']]
+
+        self.assertEqual(ids, [f'P{i}' for i in range(5)])
+
+    def test_requiere_marca_y_anio(self):
+        self.assertEqual(self._fitment(marca='toyota').status_code, 400)
+        self.assertEqual(self._fitment(anio=2017).status_code, 400)
+
+
+class BusquedaProductosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bujia = producto('BUJ-1', descripcion='Bujía de encendido', marca='TOYOTA', modelo='YARIS')
+        cls.bomba = producto('BOM-1', descripcion='Bomba de agua', marca='TOYOTA', modelo='COROLLA',
+                             anio_desde=2008, anio_hasta=2013)
+        cls.pastillas = producto('PAS-1', descripcion='Pastillas de freno', marca='NISSAN', modelo='VERSA')
+
+    def _buscar(self, texto):
+        return sorted(buscar_productos(Producto.objects.all(), texto).values_list('id_producto', flat=True))
+
+    def test_varios_terminos_son_and_por_prefijo(self):
+        self.assertEqual(self._buscar('toyota'), ['BOM-1', 'BUJ-1'])
+        self.assertEqual(self._buscar('toy bom'), ['BOM-1'])
+        self.assertEqual(self._buscar('toyota freno'), [])
+
+    def test_sin_importar_acentos_ni_mayusculas(self):
+        for texto in ('bujia', 'BUJÍA', 'Bují'):
+            with self.subTest(texto=texto):
+                self.assertEqual(self._buscar(texto), ['BUJ-1'])
+
+    def test_anio_con_texto(self):
+        self.assertEqual(self._buscar('toyota 2017'), ['BUJ-1'])
+        self.assertEqual(self._buscar('toyota 2010'), ['BOM-1'])
+        self.assertEqual(self._buscar('2017 freno'), ['PAS-1'])
+        self.assertEqual(self._buscar('bomba 2017'), [])
+
+    def test_editar_reindexa_por_post_save(self):
+        self.bomba.descripcion = 'Radiador'
+        self.bomba.save()
+
+        self.assertEqual(self._buscar('bomba'), [])
+        self.assertEqual(self._buscar('radiador toyota'), ['BOM-1'])
+
+    def test_endpoint_search(self):
+        respuesta = APIClient().get('/api/productos/', {'search': 'bujia yaris 2016'})
+        self.assertEqual([p['id_producto'] for p in respuesta.data['results']], ['BUJ-1'])
+
+
+class ExportarProductosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            producto(f'P{i}', descripcion='Bujía' if i % 2 else 'Filtro')
+
+    def _exportar(self, **params):
+        respuesta = APIClient().get('/api/productos/export/', params)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+        return [json.loads(linea) for linea in b''.join(respuesta.streaming_content).decode().splitlines()]
+
+    def test_exporta_todas_las_filas_por_lotes(self):
+        filas = self._exportar(chunk_size=3)
+
+        self.assertEqual([f['id'] for f in filas], list(Producto.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(filas[0]['id_producto'], 'P0')
+        self.assertIn('precio_venta', filas[0])
+
+    def test_respeta_search_y_fields(self):
+        filas = self._exportar(search='bujia', fields='id_producto')
+
+        self.assertEqual([f['id_producto'] for f in filas], ['P1', 'P3', 'P5'])
+        self.assertEqual(set(filas[0]), {'id', 'id_producto'})
+
+
+class ImportarCatalogoTests(TestCase):
+    ENCABEZADO = 'id_producto,proveedor,codigo_proveedor,descripcion,marca,modelo,anio_desde,anio_hasta,marca_prod,precio_costo'
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def _importar(self, nombre, contenido):
+        archivo = self.directorio / nombre
+        archivo.write_text(contenido, encoding='utf-8')
+        salida = io.StringIO()
+        call_command('importar_catalogo', str(archivo), stdout=salida)
+        return salida.getvalue(), archivo.with_name(f'{nombre}.errores.csv')
+
+    def test_importa_e_indexa(self):
+        salida, errores = self._importar('catalogo.csv', '\n'.join([
+            self.ENCABEZADO,
+            'P1,Prov,C1,Bujía de encendido,toyota,yaris,2015,2019,NGK,10000',
+            'P2,Prov,C2,Bomba de agua,nissan,versa,2012,2018,GMB,25000',
+        ]))
+
+        self.assertIn('2 creadas', salida)
+        self.assertFalse(errores.exists())
+        p1 = Producto.objects.get(id_producto='P1')
+        self.assertEqual((p1.marca, p1.anio_hasta, p1.precio_costo), ('TOYOTA', 2019, Decimal('10000')))
+        # bulk_create no emite post_save: el comando indexa el lote
+        self.assertEqual(list(buscar_productos(Producto.objects.all(), 'bujia')), [p1])
+
+    def test_filas_rechazadas_van_al_archivo_de_errores(self):
+        salida, errores = self._importar('catalogo.jsonl', '\n'.join([
+            '{"id_producto": "P1", "proveedor": "Prov", "codigo_proveedor": "C1", "descripcion": "Filtro", '
+            '"marca": "KIA", "modelo": "RIO", "anio_desde": 2010, "anio_hasta": 2015, "marca_prod": "X", "precio_costo": 5000}',
+            '{"id_producto": "P2", "proveedor": "Prov", "codigo_proveedor": "C2", "descripcion": "Filtro", '
+            '"marca": "KIA", "modelo": "RIO", "anio_desde": 2016, "anio_hasta": 2012, "marca_prod": "X", "precio_costo": 5000}',
+            '{"id_producto": "P3", "descripcion": sin comillas}',
+            '{"id_producto": "P4", "proveedor": "Prov", "codigo_proveedor": "C4", "descripcion": "Filtro", '
+            '"marca": "KIA", "modelo": "RIO", "anio_desde": 2010, "anio_hasta": 2015, "marca_prod": "X"}',
+            '["no", "es", "un", "objeto"]',
+        ]))
+
+        self.assertIn('1 creadas', salida)
+        self.assertIn('4 con errores', salida)
+        self.assertEqual(list(Producto.objects.values_list('id_producto', flat=True)), ['P1'])
+        with open(errores, newline='', encoding='utf-8') as f:
+            filas = list(csv.reader(f))[1:]
+        self.assertEqual([(fila[0], fila[1]) for fila in filas], [('2', 'P2'), ('3', ''), ('4', 'P4'), ('5', '')])
+        self.assertIn('año de inicio', filas[0][2])
+        self.assertIn('JSON inválido', filas[1][2])
+        self.assertIn('precio_costo', filas[2][2])
+
+    def test_reimportar_sin_cambios_no_escribe(self):
+        contenido = '\n'.join([self.ENCABEZADO, 'P1,Prov,C1,Filtro,KIA,RIO,2010,2015,X,5000'])
+        self._importar('catalogo.csv', contenido)
+
+        with mock.patch('api.management.commands.importar_catalogo.indexar_productos') as indexar, \
+                mock.patch.object(Producto.objects, 'bulk_create') as bulk_create:
+            salida, _ = self._importar('catalogo.csv', contenido)
+
+        self.assertIn('0 creadas, 0 actualizadas, 1 sin cambios', salida)
+        bulk_create.assert_not_called()
+        indexar.assert_not_called()
+
+        salida, _ = self._importar('catalogo.csv', contenido.replace('5000', '6000'))
+        self.assertIn('1 actualizadas', salida)
+        self.assertEqual(Producto.objects.get().precio_costo, Decimal('6000'))
+
+    def test_xlsx(self):
+        libro = Workbook()
+        libro.active.append(self.ENCABEZADO.split(','))
+        libro.active.append(['P1', 'Prov', 'C1', 'Filtro', 'kia', 'rio', 2010, 2015, 'X', 5000])
+        archivo = self.directorio / 'catalogo.xlsx'
+        libro.save(archivo)
+
+        call_command('importar_catalogo', str(archivo), stdout=io.StringIO())
+
+        self.assertEqual(Producto.objects.get().modelo, 'RIO')
+
+
+class CamposParcialesTests(CacheTemporal, TestCase):
+    CARTA = {
+        'id': 'base1-4', 'name': 'Charizard', 'image': 'https://assets.tcgdex.net/en/base/base1/4',
+        'attacks': [{'name': 'Fire Spin'}], 'pricing': {'tcgplayer': {'holofoil': {'marketPrice': 350}}},
+    }
+
+    def test_detalle_de_carta_solo_construye_lo_pedido(self):
+        secciones = {**pokemon_service.SECCIONES_CARTA, 'attacks': mock.Mock(return_value=[])}
+        with mock.patch.object(PokemonTCGService, '_get', return_value=self.CARTA), \
+                mock.patch.object(pokemon_service, 'SECCIONES_CARTA', secciones):
+            respuesta = self.client.get('/api/pokemon/card/base1-4/', {'fields': 'images,prices,desconocido'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(respuesta.json()), {'id', 'images', 'prices'})
+        self.assertEqual(respuesta.json()['prices']['tcgplayer']['market'], 350)
+        secciones['attacks'].assert_not_called()
+
+    def test_productos(self):
+        producto('P1')
+        respuesta = APIClient().get('/api/productos/', {'fields': 'id_producto,precio_venta,desconocido'})
+
+        self.assertEqual(set(respuesta.data['results'][0]), {'id', 'id_producto', 'precio_venta'})
+        # Sin ?fields= van todos
+        self.assertIn('nombre_completo', APIClient().get('/api/productos/').data['results'][0])
+
+    def test_posts(self):
+        post = Post.objects.create(titulo='Primer título', resumen='Resumen', contenido='<p>x</p>', activo=True)
+
+        listado = APIClient().get('/api/posts/', {'fields': 'titulo'})
+        self.assertEqual(listado.data['results'], [{'id': post.id, 'titulo': 'Primer título'}])
+
+        # El detalle con ?fields= no se cachea: la entrada completa sigue disponible
+        detalle = APIClient().get(f'/api/posts/slug/{post.slug}/', {'fields': 'slug,contenido'})
+        self.assertEqual(set(detalle.data), {'id', 'slug', 'contenido'})
+        self.assertIsNone(post_cache.obtener(post.slug))
+
+
+class FuenteConError(FuenteDump):
+    def card(self, card_id):
+        if card_id == 'base1-58':
+            raise OSError('sin respuesta')
+        return super().card(card_id)
+
+
+class EspejoPokemonTests(CacheTemporal, TestCase):
+    # Respuestas de TCGdex cuando el espejo no está completo
+    UPSTREAM = {
+        'cards': [{'id': 'xy1-1', 'name': 'Pikachu', 'image': None, 'set': {'name': 'XY'}, 'rarity': 'Common'}],
+        'sets': [{'id': 'xy1', 'name': 'XY', 'serie': {'name': 'XY'}, 'logo': None, 'symbol': None}],
+        'types': ['Fire', 'Grass', 'Lightning', 'Water'],
+        'rarities': ['Common', 'Rare'],
+    }
+
+    def _sincronizar(self, fuente=None, **kwargs):
+        return sincronizar_catalogo(fuente or FuenteDump(DUMP_TCGDEX), log=lambda mensaje: None, **kwargs)
+
+    def _upstream(self):
+        return mock.patch.object(PokemonTCGService, '_get', side_effect=lambda path, params=None: self.UPSTREAM[path])
+
+    def test_carta_suelta_no_activa_el_espejo(self):
+        pokemon_set = PokemonSet.objects.create(set_id='base1', name='Base Set', series='Base')
+        PokemonCard.objects.create(card_id='base1-58', name='Pikachu', set_id=pokemon_set.set_id,
+                                   set_name=pokemon_set.name, types=['Lightning'], rarity='Common')
+
+        with self._upstream() as get:
+            resultado = PokemonTCGService.search_cards(name='pikachu')
+            sets = PokemonTCGService.get_sets()
+            types = PokemonTCGService.get_types()
+
+        self.assertEqual([c['id'] for c in resultado['cards']], ['xy1-1'])
+        self.assertEqual([s['id'] for s in sets], ['xy1'])
+        self.assertEqual(types, self.UPSTREAM['types'])
+        self.assertEqual(get.call_count, 3)
+
+    def test_sincronizacion_de_un_set_no_marca_el_espejo(self):
+        self._sincronizar(set_ids={'base1'})
+
+        self.assertEqual(PokemonCard.objects.count(), 2)
+        self.assertFalse(PokemonSincronizacion.objects.exists())
+        self.assertFalse(PokemonTCGService.has_local_catalog())
+
+    def test_sincronizacion_con_errores_no_marca_el_espejo(self):
+        stats = self._sincronizar(FuenteConError(DUMP_TCGDEX))
+
+        self.assertEqual(stats['errores'], 1)
+        self.assertFalse(PokemonSincronizacion.objects.exists())
+
+    def test_sincronizacion_completa_activa_el_espejo(self):
+        # Antes de sincronizar queda en cache que no hay espejo
+        self.assertFalse(PokemonTCGService.has_local_catalog())
+        stats = self._sincronizar()
+
+        self.assertEqual((stats['sets'], stats['cartas'], stats['errores']), (2, 3, 0))
+        marca = PokemonSincronizacion.objects.get()
+        self.assertEqual((marca.sets, marca.cartas), (2, 3))
+
+        with mock.patch.object(PokemonTCGService, '_get', side_effect=AssertionError('TCGdex')):
+            resultado = PokemonTCGService.search_cards(name='pikachu')
+            sets = PokemonTCGService.get_sets()
+            types = PokemonTCGService.get_types()
+            rarities = PokemonTCGService.get_rarities()
+
+        self.assertEqual(sorted(c['id'] for c in resultado['cards']), ['base1-58', 'sv03.5-025'])
+        self.assertEqual([s['id'] for s in sets], ['sv03.5', 'base1'])
+        self.assertEqual(types, ['Fire', 'Lightning'])
+        self.assertEqual(rarities, ['Common', 'Rare Holo'])
+
+    def test_endpoint_filtros(self):
+        self._sincronizar()
+
+        with mock.patch.object(PokemonTCGService, '_get', side_effect=AssertionError('TCGdex')):
+            respuesta = self.client.get('/api/pokemon/filters/')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['types'], ['Fire', 'Lightning'])
+        self.assertEqual(len(respuesta.json()['sets']), 2)
+        self.assertEqual(self.client.post('/api/pokemon/filters/').status_code, 405)
+
+    def test_filtros_sin_espejo_piden_a_tcgdex_en_paralelo(self):
+        barrera = threading.Barrier(3, timeout=5)
+
+        def get(path, params=None):
+            # Solo pasa si las tres llamadas están en curso a la vez
+            barrera.wait()
+            return self.UPSTREAM[path]
+
+        with mock.patch.object(PokemonTCGService, '_get', side_effect=get):
+            filtros = PokemonTCGService.get_filters()
+
+        self.assertEqual([s['id'] for s in filtros['sets']], ['xy1'])
+        self.assertEqual(filtros['types'], self.UPSTREAM['types'])
+        self.assertEqual(filtros['rarities'], self.UPSTREAM['rarities'])
+
+        # Ya en cache: no se vuelve a consultar
+        with mock.patch.object(PokemonTCGService, '_get', side_effect=AssertionError('TCGdex')):
+            self.assertEqual(PokemonTCGService.get_filters(), filtros)
+
+    def test_paginas_locales_sin_repetir_con_empates(self):
+        self._sincronizar()
+        pokemon_set = PokemonSet.objects.get(set_id='base1')
+        # Mismo nombre y set: solo card_id desempata
+        PokemonCard.objects.bulk_create([
+            PokemonCard(card_id=f'base1-{100 + i}', name='Energía', set_id=pokemon_set.set_id,
+                        set_name=pokemon_set.name, set_release_date=pokemon_set.release_date)
+            for i in (3, 0, 4, 1, 2)
+        ])
+
+        ids = []
+        for page in (1, 2, 3):
+            resultado = PokemonTCGService.search_cards(name='energía', page=page, page_size=2)
+            ids += [c['id'] for c in resultado['cards']]
+
+        self.assertEqual(resultado['totalCount'], 5)
+        self.assertEqual(ids, [f'base1-{100 + i}' for i in range(5)])
+
+    def test_incremental_tras_errores_completa_y_marca(self):
+        self._sincronizar(FuenteConError(DUMP_TCGDEX))
+        stats = self._sincronizar()
+
+        self.assertEqual(stats['cartas'], 1)
+        self.assertTrue(PokemonSincronizacion.objects.exists())
+
+
+class PokemonCacheStatsTests(CacheTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache_backends.volcar()
+        cache_backends.reiniciar_contadores()
+
+    def test_contadores_por_lotes_sin_contar_el_espejo(self):
+        # Dentro del intervalo de volcado: ningún request escribe contadores en la cache
+        with mock.patch.object(cache_backends, '_ultimo_volcado', time.monotonic()), \
+                mock.patch.object(PokemonTCGService, '_get', return_value=['Fire']) as get:
+            for _ in range(3):
+                self.assertEqual(PokemonTCGService.get_types(), ['Fire'])
+            self.assertIsNone(caches['default'].get(cache_backends.STATS_KEY.format('pokemon', 'hit')))
+
+        stats = pokemon_cache.stats()
+
+        self.assertEqual(get.call_count, 1)
+        # has_local_catalog() lee la cache en cada llamada pero no cuenta
+        self.assertEqual((stats['hit'], stats['stale'], stats['miss']), (2, 0, 1))
+        self.assertEqual(stats['hit_rate'], round(2 / 3, 4))
+
+    def test_vencida_cuenta_como_stale(self):
+        pokemon_cache.cached('types', None, lambda: ['Fire'])
+        key = pokemon_cache.cache_key('types')
+        with cache_backends.sin_contar():
+            entrada = pokemon_cache.cache.get(key)
+        pokemon_cache.cache.set(key, {**entrada, 'fresh_until': 0})
+
+        with mock.patch.object(pokemon_cache, '_refresh_in_background') as refresco:
+            self.assertEqual(pokemon_cache.cached('types', None, lambda: ['Water']), ['Fire'])
+
+        refresco.assert_called_once()
+        stats = pokemon_cache.stats()
+        self.assertEqual((stats['hit'], stats['stale'], stats['miss']), (0, 1, 1))
+
+
+class SingleFlightTests(CacheTemporal, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache_backends.volcar()
+        cache_backends.reiniciar_contadores()
+
+    def test_misses_concurrentes_cargan_una_vez(self):
+        llamadas = []
+        liberar = threading.Event()
+
+        def loader():
+            llamadas.append(1)
+            # Retener la carga hasta que todos los hilos hayan pedido la clave
+            liberar.wait(5)
+            return {'id': 'base1-4'}
+
+        resultados = []
+        hilos = [
+            threading.Thread(target=lambda: resultados.append(pokemon_cache.cached('card', {'id': 'base1-4'}, loader)))
+            for _ in range(8)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        # Los 7 que llegan tarde quedan esperando al primero
+        limite = time.monotonic() + 5
+        while pokemon_cache.stats()['coalesced_local'] < 7 and time.monotonic() < limite:
+            time.sleep(0.01)
+        liberar.set()
+        for hilo in hilos:
+            hilo.join(5)
+
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, [{'id': 'base1-4'}] * 8)
+        self.assertEqual(pokemon_cache.stats()['coalesced_local'], 7)
+
+    def test_error_del_lider_llega_a_los_que_esperan(self):
+        with self.assertRaises(OSError):
+            pokemon_cache.cached('card', {'id': 'x'}, mock.Mock(side_effect=OSError('TCGdex caído')))
+        # El error no se cachea
+        self.assertEqual(pokemon_cache.cached('card', {'id': 'x'}, lambda: 'ok'), 'ok')
+
+    def test_espera_la_carga_de_otro_worker(self):
+        key = pokemon_cache.cache_key('card', {'id': 'base1-4'})
+        # Otro worker tomó el lock y guarda su resultado un momento después
+        pokemon_cache.cache.add(f'{key}:lock', 1, pokemon_cache.ESPERA_MAXIMA)
+        otro_worker = threading.Timer(0.2, pokemon_cache._store, ['card', key, {'id': 'base1-4'}])
+        otro_worker.start()
+        self.addCleanup(otro_worker.cancel)
+
+        loader = mock.Mock(side_effect=AssertionError('no debía consultar TCGdex'))
+        self.assertEqual(pokemon_cache.cached('card', {'id': 'base1-4'}, loader), {'id': 'base1-4'})
+        self.assertEqual(pokemon_cache.stats()['coalesced_remote'], 1)
+
+
+class BusquedaPostsTests(CacheTemporal, TestCase):
+    def _post(self, titulo, contenido='<p>Texto</p>', **kwargs):
+        return Post.objects.create(titulo=titulo, resumen='Resumen', contenido=contenido, **kwargs)
+
+    def test_sin_importar_acentos(self):
+        post = self._post('Optimización de imágenes', activo=True)
+
+        for q in ('optimizacion', 'OPTIMIZACIÓN', 'imagenes'):
+            with self.subTest(q=q):
+                self.assertEqual(list(buscar_posts(Post.objects.all(), q)), [post])
+
+    def test_prefijos_y_titulo_primero(self):
+        en_contenido = self._post('Notas', '<p>Un repaso de caché en Django</p>', activo=True)
+        en_titulo = self._post('Caché con Redis', activo=True)
+
+        resultados = list(buscar_posts(Post.objects.all(), 'cach'))
+        self.assertEqual(resultados, [en_titulo, en_contenido])
+        self.assertIn('<mark>', post_search.resaltado_html(resultados[1].resaltado))
+
+    def test_filtros_antes_del_limite(self):
+        # Los posts inactivos son los más relevantes y llenarían el límite
+        for i in range(3):
+            self._post(f'Django Django Django {i}', activo=False)
+        activo = self._post('Notas', '<p>Algo de Django</p>', activo=True, categoria='tutorial')
+        self._post('Django en otra categoría', activo=True, categoria='noticia')
+
+        with mock.patch.object(post_search, 'MAX_RESULTADOS', 2):
+            resultados = buscar_posts(Post.objects.filter(activo=True, categoria='tutorial'), 'django')
+            self.assertEqual(list(resultados), [activo])
+
+    def test_indice_sigue_ediciones_y_borrados(self):
+        post = self._post('Guía de Docker', activo=True)
+
+        post.titulo = 'Guía de Kubernetes'
+        post.save()
+        self.assertEqual(list(buscar_posts(Post.objects.all(), 'docker')), [])
+        self.assertEqual(list(buscar_posts(Post.objects.all(), 'kubernetes')), [post])
+
+        post.delete()
+        self.assertEqual(list(buscar_posts(Post.objects.all(), 'kubernetes')), [])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM api_post_fts WHERE api_post_fts MATCH 'kubernetes'")
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+    @skipUnless(connection.vendor == 'sqlite', 'triggers FTS5 de SQLite')
+    def test_post_migrate_recrea_triggers_perdidos(self):
+        # Lo que deja una reconstrucción de api_post: la tabla nueva sin triggers
+        with connection.cursor() as cursor:
+            for nombre in post_search.TRIGGERS_SQLITE:
+                cursor.execute(f'DROP TRIGGER {nombre}')
+        perdido = self._post('Escrito sin triggers', activo=True)
+
+        emit_post_migrate_signal(verbosity=0, interactive=False, db=connection.alias)
+
+        self.assertEqual(post_search.asegurar_triggers_sqlite(connection), [])
+        # El índice se reconstruyó con lo escrito mientras faltaban
+        self.assertEqual(list(buscar_posts(Post.objects.all(), 'triggers')), [perdido])
+        perdido.titulo = 'Escrito con triggers nuevos'
+        perdido.save()
+        self.assertEqual(list(buscar_posts(Post.objects.all(), 'nuevos')), [perdido])
+
+    def test_endpoint_filtra_por_categoria(self):
+        self._post('Django avanzado', activo=True, categoria='noticia')
+        tutorial = self._post('Django desde cero', activo=True, categoria='tutorial')
+
+        respuesta = APIClient().get('/api/posts/', {'q': 'django', 'categoria': 'tutorial'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p['id'] for p in respuesta.data['results']], [tutorial.id])
+
+
+class RespuestaFalsa:
+    def __init__(self, status=200, location=None, contenido=b''):
+        self.status_code = status
+        self.headers = {'Location': location} if location else {}
+        self.contenido = contenido
+
+    @property
+    def is_redirect(self):
+        return 'Location' in self.headers
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, tamano):
+        yield self.contenido
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def png(ancho=8):
+    salida = io.BytesIO()
+    Image.new('RGB', (ancho, ancho), 'red').save(salida, 'PNG')
+    return salida.getvalue()
+
+
+class ImagenProxyTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=media.name, IMAGE_PROXY_HOSTS=['assets.tcgdex.net'])
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _descargar(self, respuestas):
+        with mock.patch.object(image_proxy.requests, 'get', side_effect=respuestas) as get:
+            return image_proxy.obtener_variante('https://assets.tcgdex.net/en/base/base1/4/low.png'), get
+
+    def test_redireccion_a_otro_host_rechazada(self):
+        with self.assertRaises(image_proxy.ImagenNoPermitida):
+            self._descargar([RespuestaFalsa(302, 'http://169.254.169.254/latest/meta-data/')])
+
+    def test_redireccion_en_el_mismo_host(self):
+        (ruta, content_type), get = self._descargar([
+            RespuestaFalsa(301, '/en/base/base1/4/low-v2.png'),
+            RespuestaFalsa(contenido=png()),
+        ])
+
+        self.assertEqual(content_type, 'image/png')
+        self.assertEqual(get.call_args.args[0], 'https://assets.tcgdex.net/en/base/base1/4/low-v2.png')
+        self.assertFalse(get.call_args.kwargs['allow_redirects'])
+
+    def test_demasiadas_redirecciones(self):
+        bucle = [RespuestaFalsa(302, '/otra.png')] * (image_proxy.MAX_REDIRECCIONES + 1)
+        with self.assertRaises(image_proxy.ImagenInvalida):
+            self._descargar(bucle)
+
+    def test_dimensiones_excesivas_rechazadas_sin_decodificar(self):
+        with override_settings(IMAGE_PROXY_MAX_PIXELES=399), \
+                mock.patch.object(image_proxy, '_redimensionar') as redimensionar:
+            with self.assertRaises(image_proxy.ImagenInvalida):
+                self._descargar([RespuestaFalsa(contenido=png(ancho=20))])
+
+        redimensionar.assert_not_called()
+        directorio = image_proxy._directorio('https://assets.tcgdex.net/en/base/base1/4/low.png')
+        self.assertFalse((directorio / 'original').exists())
+
+    def test_limpieza_en_otro_hilo_y_como_mucho_una_vez(self):
+        hilos = []
+        terminada = threading.Event()
+
+        def limpiar(max_bytes=None):
+            hilos.append(threading.current_thread().name)
+            terminada.set()
+            return 0, 0
+
+        with mock.patch.object(image_proxy, 'limpiar_cache', side_effect=limpiar):
+            self._descargar([RespuestaFalsa(contenido=png())])
+            self.assertTrue(terminada.wait(5))
+            # Otra descarga dentro de LIMPIEZA_CADA no vuelve a limpiar
+            with mock.patch.object(image_proxy.requests, 'get', return_value=RespuestaFalsa(contenido=png())):
+                image_proxy.obtener_variante('https://assets.tcgdex.net/en/base/base1/5/low.png')
+
+        self.assertEqual(hilos, ['limpieza-imagenes'])
+
+    def test_limpieza_borra_las_menos_usadas(self):
+        directorios = []
+        for i in range(4):
+            directorio = image_proxy._directorio(f'https://assets.tcgdex.net/{i}.png')
+            image_proxy._escribir(directorio / 'original', b'x' * 1000)
+            # La imagen 0 es la más antigua y la 3 la más reciente
+            os.utime(directorio / 'original', (1000 + i, 1000 + i))
+            directorios.append(directorio)
+
+        borradas, total = image_proxy.limpiar_cache(max_bytes=3000)
+
+        self.assertEqual((borradas, total), (2, 2000))
+        self.assertEqual([d.exists() for d in directorios], [False, False, True, True])
+
+    def test_uso_reciente_protege_de_la_limpieza(self):
+        antigua = image_proxy._directorio('https://assets.tcgdex.net/a.png')
+        nueva = image_proxy._directorio('https://assets.tcgdex.net/b.png')
+        for directorio, mtime in ((antigua, 1000), (nueva, 2000)):
+            image_proxy._escribir(directorio / 'original', b'x' * 1000)
+            os.utime(directorio / 'original', (mtime, mtime))
+        image_proxy._marcar_uso(antigua)
+
+        image_proxy.limpiar_cache(max_bytes=1500)
+
+        self.assertTrue(antigua.exists())
+        self.assertFalse(nueva.exists())
+
+
+class BackendContado(correo.FakeBackend):
+    """FakeBackend que además cuenta cada llamada a la API (aunque la clave ya se haya enviado)"""
+    llamadas = []
+    fallar = 0
+
+    def enviar(self, correo_pendiente):
+        BackendContado.llamadas.append(correo_pendiente.clave)
+        if BackendContado.fallar:
+            BackendContado.fallar -= 1
+            raise RuntimeError('Resend no disponible')
+        return super().enviar(correo_pendiente)
+
+
+@override_settings(CORREO_BACKEND='api.tests.BackendContado', CORREO_EN_PROCESO=False)
+class OutboxCorreosTests(TestCase):
+    def setUp(self):
+        correo.FakeBackend.enviados.clear()
+        BackendContado.llamadas.clear()
+        BackendContado.fallar = 0
+        self.contacto = Contacto.objects.create(
+            ticket='TCK-1', nombre='Ana', apellido='Pérez', telefono='+56900000000',
+            correo='ana@example.com', mensaje='Hola',
+        )
+        correo.encolar_correos_contacto(self.contacto)
+
+    def _vencer(self):
+        # Adelanta el reloj: el backoff (o el bloqueo del worker) ya pasó
+        CorreoPendiente.objects.update(proximo_intento=timezone.now())
+
+    def test_encola_dos_correos_una_vez(self):
+        correo.encolar_correos_contacto(self.contacto)
+
+        self.assertEqual(
+            sorted(CorreoPendiente.objects.values_list('clave', flat=True)), ['TCK-1:admin', 'TCK-1:cliente'],
+        )
+
+    def test_reclamo_concurrente_envia_una_sola_vez(self):
+        # Dos workers leen los mismos candidatos antes de que cualquiera los reclame
+        leidos = correo._candidatos(timezone.now(), correo.LOTE)
+        with mock.patch.object(correo, '_candidatos', return_value=leidos):
+            primero = correo.procesar_pendientes()
+            segundo = correo.procesar_pendientes()
+
+        self.assertEqual((primero, segundo), (2, 0))
+        self.assertEqual(sorted(BackendContado.llamadas), ['TCK-1:admin', 'TCK-1:cliente'])
+        self.assertEqual(CorreoPendiente.objects.filter(estado=CorreoPendiente.ENVIADO).count(), 2)
+
+    def test_reintenta_tras_un_fallo(self):
+        BackendContado.fallar = 2
+        correo.procesar_pendientes()
+
+        pendientes = CorreoPendiente.objects.filter(estado=CorreoPendiente.PENDIENTE)
+        self.assertEqual(pendientes.count(), 2)
+        self.assertTrue(all(c.intentos == 1 and c.ultimo_error for c in pendientes))
+        # Antes del backoff no se reintenta
+        self.assertEqual(correo.procesar_pendientes(), 0)
+
+        self._vencer()
+        self.assertEqual(correo.procesar_pendientes(), 2)
+        enviados = CorreoPendiente.objects.filter(estado=CorreoPendiente.ENVIADO)
+        self.assertEqual(sorted(c.intentos for c in enviados), [2, 2])
+        self.assertEqual(len(correo.FakeBackend.enviados), 2)
+
+    def test_fallido_tras_max_intentos(self):
+        BackendContado.fallar = 2 * correo.MAX_INTENTOS
+        for _ in range(correo.MAX_INTENTOS):
+            self._vencer()
+            correo.procesar_pendientes()
+
+        self.assertEqual(CorreoPendiente.objects.filter(estado=CorreoPendiente.FALLIDO).count(), 2)
+        self._vencer()
+        self.assertEqual(correo.procesar_pendientes(), 0)
+
+    def test_clave_de_idempotencia_no_reenvia(self):
+        # El worker envió pero murió antes de marcar ENVIADO: otro retoma el correo al vencer el bloqueo
+        reclamados = list(correo._reclamar(correo.LOTE))
+        backend = correo.get_backend()
+        for pendiente in reclamados:
+            backend.enviar(pendiente)
+
+        self._vencer()
+        self.assertEqual(correo.procesar_pendientes(), 2)
+
+        self.assertEqual(len(BackendContado.llamadas), 4)
+        self.assertEqual(sorted(e['clave'] for e in correo.FakeBackend.enviados), ['TCK-1:admin', 'TCK-1:cliente'])
+
+    def test_resend_recibe_la_clave(self):
+        pendiente = CorreoPendiente.objects.get(clave='TCK-1:cliente')
+        self.addCleanup(setattr, correo.resend, 'api_key', correo.resend.api_key)
+        with mock.patch.object(correo.resend.Emails, 'send', return_value={'id': 're_1'}) as send, \
+                override_settings(RESEND_API_KEY='re_prueba'):
+            self.assertEqual(correo.ResendBackend().enviar(pendiente), 're_1')
+
+        self.assertEqual(send.call_args.args[1], {'idempotency_key': 'TCK-1:cliente'})
+
+
+class CachePostsTests(CacheTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = Post.objects.create(titulo='Primer título', resumen='Resumen', contenido='<p>x</p>', activo=True)
+
+    def _detalle(self, slug=None):
+        return APIClient().get(f'/api/posts/slug/{slug or self.post.slug}/')
+
+    def test_cache_compartida_entre_workers(self):
+        self.assertIsInstance(caches['posts'], (cache_backends.FileBasedCache, cache_backends.RedisCache))
+        self.assertTrue(caches['posts'].atomico)
+
+    def test_guardar_invalida_el_detalle(self):
+        self.assertEqual(self._detalle().data['titulo'], 'Primer título')
+        self.assertIsNotNone(post_cache.obtener(self.post.slug))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.titulo = 'Título corregido'
+            self.post.save()
+
+        self.assertIsNone(post_cache.obtener(self.post.slug))
+        self.assertEqual(self._detalle().data['titulo'], 'Título corregido')
+
+    def test_cambio_de_slug_invalida_el_anterior(self):
+        anterior = self.post.slug
+        self._detalle()
+
+        self.post.slug = 'slug-nuevo'
+        self.post.save()
+
+        self.assertIsNone(post_cache.obtener(anterior))
+        self.assertEqual(self._detalle(anterior).status_code, 404)
+
+    def test_recache_antes_del_commit_se_invalida(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.titulo = 'Versión nueva'
+            self.post.save()
+            # Otro worker vuelve a cachear antes del commit
+            post_cache.guardar(self.post, {'titulo': 'Primer título'})
+
+        self.assertIsNone(post_cache.obtener(self.post.slug))
+
+
+class RefrescoPokemonTests(CacheTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        sincronizar_catalogo(FuenteDump(DUMP_TCGDEX), log=lambda mensaje: None)
+        hace = timezone.now() - timedelta(days=2)
+        PokemonCard.objects.update(last_updated=hace)
+        PokemonSet.objects.update(last_updated=timezone.now())
+        # base1-58 es la más vista; entre las otras dos, sv03.5-025 lleva más tiempo sin refrescar
+        PokemonCard.objects.filter(card_id='base1-58').update(view_count=50)
+        PokemonCard.objects.filter(card_id='sv03.5-025').update(last_updated=hace - timedelta(days=1))
+
+    def _refrescar(self, fuente=None, limite=10):
+        return pokemon_refresh.refrescar(
+            fuente or FuenteDump(DUMP_TCGDEX), concurrencia=2, por_minuto=6000,
+            edad=timedelta(hours=24), edad_populares=timedelta(minutes=30), umbral_populares=20,
+            edad_sets=timedelta(hours=24), limite=limite, log=lambda mensaje: None,
+        )
+
+    def _pendientes(self):
+        return pokemon_refresh.cartas_pendientes(timedelta(hours=24), timedelta(minutes=30), 20, 10)
+
+    def test_prioridad_mas_vistas_y_mas_antiguas(self):
+        self.assertEqual(self._pendientes(), ['base1-58', 'sv03.5-025', 'base1-4'])
+
+        # Una carta popular vence a los 30 minutos; una normal recién refrescada no
+        PokemonCard.objects.update(last_updated=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self._pendientes(), ['base1-58'])
+
+    def test_cada_ciclo_retoma_donde_quedo(self):
+        self.assertEqual(self._refrescar(limite=2)['cartas'], 2)
+        self.assertEqual(self._pendientes(), ['base1-4'])
+
+        self.assertEqual(self._refrescar()['cartas'], 1)
+        self.assertEqual(self._pendientes(), [])
+        self.assertEqual(self._refrescar(), {'sets': 0, 'cartas': 0, 'errores': 0})
+
+    def test_errores_quedan_pendientes(self):
+        stats = self._refrescar(FuenteConError(DUMP_TCGDEX))
+
+        self.assertEqual((stats['cartas'], stats['errores']), (2, 1))
+        self.assertEqual(self._pendientes(), ['base1-58'])
+
+    def test_deja_el_detalle_fresco_en_cache(self):
+        self._refrescar(limite=1)
+
+        with mock.patch.object(PokemonTCGService, '_get', side_effect=AssertionError('TCGdex')):
+            carta = PokemonTCGService.get_card('base1-58', fields={'name'})
+        self.assertEqual(carta, {'id': 'base1-58', 'name': 'Pikachu'})
+
+    def test_limite_de_tasa_espacia_las_llamadas(self):
+        tasa = pokemon_refresh.LimiteTasa(por_minuto=1200)
+        inicio = time.monotonic()
+        for _ in range(4):
+            tasa.esperar()
+        # 4 llamadas a 20 por segundo: la última sale 3 intervalos (0.15 s) después de la primera
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.14)
+
+
+class HistorialPreciosTests(CacheTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        sincronizar_catalogo(FuenteDump(DUMP_TCGDEX), log=lambda mensaje: None)
+
+    def _actualizar(self, dia, fuente=None):
+        with mock.patch('api.pokemon_sync.timezone.localdate', return_value=dia):
+            return actualizar_precios(fuente or FuenteDump(DUMP_TCGDEX), ['base1-4'], log=lambda mensaje: None)
+
+    def test_un_punto_por_carta_fuente_y_dia(self):
+        hoy = timezone.localdate()
+        # La sincronización ya dejó el punto de hoy; volver a leer lo reemplaza, no lo duplica
+        stats = self._actualizar(hoy)
+
+        self.assertEqual((stats['cartas'], stats['puntos']), (1, 2))
+        puntos = PokemonPriceHistory.objects.filter(card_id='base1-4')
+        self.assertEqual(sorted(puntos.values_list('source', flat=True)), ['cardmarket', 'tcgplayer'])
+        tcgplayer = puntos.get(source='tcgplayer')
+        self.assertEqual((tcgplayer.market, tcgplayer.currency), (Decimal('350.00'), 'USD'))
+
+    def test_dias_anteriores_no_se_tocan(self):
+        hoy = timezone.localdate()
+        PokemonPriceHistory.objects.filter(card_id='base1-4', source='tcgplayer').update(market=Decimal('300'))
+        self._actualizar(hoy + timedelta(days=1))
+
+        puntos = PokemonPriceHistory.objects.filter(card_id='base1-4', source='tcgplayer').order_by('date')
+        self.assertEqual([p.market for p in puntos], [Decimal('300.00'), Decimal('350.00')])
+        self.assertEqual(PokemonCard.objects.get(card_id='base1-4').price_market, Decimal('350.00'))
+
+    def test_endpoint_agrega_por_semana(self):
+        hoy = timezone.localdate()
+        PokemonPriceHistory.objects.all().delete()
+        PokemonPriceHistory.objects.bulk_create([
+            PokemonPriceHistory(card_id='base1-4', source='tcgplayer', date=hoy - timedelta(days=d),
+                                low=10 + d, mid=20, high=30 + d, market=20 + d, currency='USD')
+            for d in range(100)
+        ])
+
+        respuesta = self.client.get('/api/pokemon/card/base1-4/history/', {'days': 99, 'interval': 'week'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        serie = respuesta.json()['series']['tcgplayer']
+        self.assertEqual(serie['currency'], 'USD')
+        self.assertLessEqual(len(serie['points']), 16)
+        self.assertEqual(min(p['low'] for p in serie['points']), 10)
+        self.assertEqual(max(p['high'] for p in serie['points']), 30 + 99)
+        fechas = [p['date'] for p in serie['points']]
+        self.assertEqual(fechas, sorted(fechas))
+
+    def test_endpoint_intervalo_por_rango_y_dias_invalidos(self):
+        respuesta = self.client.get('/api/pokemon/card/base1-4/history/', {'days': 400})
+        self.assertEqual(respuesta.json()['interval'], 'week')
+        respuesta = self.client.get('/api/pokemon/card/base1-4/history/', {'days': 99999})
+        self.assertEqual((respuesta.json()['days'], respuesta.json()['interval']), (5 * 365, 'month'))
+        self.assertEqual(self.client.get('/api/pokemon/card/base1-4/history/', {'days': 'x'}).status_code, 400)
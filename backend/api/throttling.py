@@ -0,0 +1,141 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.utils.connection import ConnectionProxy
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+cache = ConnectionProxy(caches, 'throttle')
+
+PERIODOS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# Recarga y consumo en un solo paso dentro de Redis, con el reloj del servidor Redis
+# (los workers no dependen de tener la hora sincronizada)
+BUCKET_LUA = """
+local capacidad = tonumber(ARGV[1])
+local recarga = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local ahora = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local guardado = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+local tokens = tonumber(guardado[1]) or capacidad
+local ultimo = tonumber(guardado[2]) or ahora
+tokens = math.min(capacidad, tokens + math.max(0, ahora - ultimo) * recarga)
+local permitido = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    permitido = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ultimo', tostring(ahora))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {permitido, tostring(tokens)}
+"""
+
+# Backends sin actualizar() (p. ej. LocMem en desarrollo): solo atómico dentro del proceso
+_lock_local = threading.Lock()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket guardado en la cache de Django. La tasa usa el formato de DRF
+    ('5/hour' = ráfaga de hasta 5 y se recupera 1 cada 12 minutos) y se lee de
+    DEFAULT_THROTTLE_RATES[scope]. Se evalúa antes de la vista: un request
+    rechazado no toca la base de datos ni envía correos.
+
+    Leer, recargar y consumir es una sola operación atómica: un script Lua en
+    Redis o cache.actualizar() en el backend de archivos. Con get() + set()
+    sueltos, N requests simultáneos leían el mismo bucket y pasaban todos.
+    """
+    scope = None
+    # Métodos HTTP a los que aplica (None = todos)
+    metodos = None
+
+    def __init__(self):
+        self.capacidad, self.periodo = self.parse_rate(api_settings.DEFAULT_THROTTLE_RATES[self.scope])
+        self.recarga = self.capacidad / self.periodo  # tokens por segundo
+        self.espera = None
+
+    @staticmethod
+    def parse_rate(rate):
+        cantidad, periodo = rate.split('/')
+        return int(cantidad), PERIODOS[periodo[0]]
+
+    def get_ident_bucket(self, request, view):
+        """Identificador del bucket para este request (None = no se limita)"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if self.metodos is not None and request.method not in self.metodos:
+            return True
+        ident = self.get_ident_bucket(request, view)
+        if not ident:
+            return True
+
+        key = f'throttle:{self.scope}:{ident}'
+        if isinstance(caches['throttle'], RedisCache):
+            permitido, tokens = self._consumir_redis(key)
+        else:
+            permitido, tokens = self._consumir(key)
+
+        if not permitido:
+            self.espera = (1 - tokens) / self.recarga
+        return permitido
+
+    def _consumir_redis(self, key):
+        clave = cache.make_and_validate_key(key)
+        cliente = cache._cache.get_client(clave, write=True)
+        script = cliente.register_script(BUCKET_LUA)
+        permitido, tokens = script(keys=[clave], args=[self.capacidad, self.recarga, self.periodo])
+        return bool(permitido), float(tokens)
+
+    def _consumir(self, key):
+        ahora = time.time()
+
+        def consumir(guardado):
+            tokens, ultimo = guardado or (self.capacidad, ahora)
+            tokens = min(self.capacidad, tokens + max(0, ahora - ultimo) * self.recarga)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            return (tokens, ahora), (permitido, tokens)
+
+        actualizar = getattr(cache, 'actualizar', None)
+        if actualizar is not None:
+            return actualizar(key, consumir, self.periodo)
+        with _lock_local:
+            nuevo, resultado = consumir(cache.get(key))
+            cache.set(key, nuevo, self.periodo)
+            return resultado
+
+    def wait(self):
+        return self.espera
+
+
+class ContactoIPThrottle(TokenBucketThrottle):
+    """Cualquier request al endpoint de contacto, por IP"""
+    scope = 'contacto'
+
+    def get_ident_bucket(self, request, view):
+        return self.get_ident(request)
+
+
+class ContactoPostIPThrottle(ContactoIPThrottle):
+    """Envíos del formulario (escriben una fila y encolan correos), por IP"""
+    scope = 'contacto_post_ip'
+    metodos = ('POST',)
+
+
+class ContactoPostEmailThrottle(TokenBucketThrottle):
+    """Envíos del formulario por correo del remitente, aunque cambie de IP"""
+    scope = 'contacto_post_email'
+    metodos = ('POST',)
+
+    def get_ident_bucket(self, request, view):
+        try:
+            correo = request.data.get('correo')
+        except AttributeError:
+            return None
+        if not isinstance(correo, str):
+            return None
+        return correo.strip().lower()[:254] or None
@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ProyectoViewSet, TecnologiaViewSet, ProductoViewSet, ContactoViewSet, PostViewSet,
-    pokemon_search, pokemon_card_detail, pokemon_sets, pokemon_rarities, pokemon_types
+    pokemon_search, pokemon_card_detail, pokemon_card_history, pokemon_sets, pokemon_rarities, pokemon_types,
+    pokemon_filters, pokemon_cache_stats, imagen_proxy
 )
 
 router = DefaultRouter()
@@ -17,7 +18,12 @@ urlpatterns = [
     # Pokemon TCG
     path('pokemon/search/', pokemon_search, name='pokemon-search'),
     path('pokemon/card/<str:card_id>/', pokemon_card_detail, name='pokemon-card-detail'),
+    path('pokemon/card/<str:card_id>/history/', pokemon_card_history, name='pokemon-card-history'),
     path('pokemon/sets/', pokemon_sets, name='pokemon-sets'),
     path('pokemon/rarities/', pokemon_rarities, name='pokemon-rarities'),
     path('pokemon/types/', pokemon_types, name='pokemon-types'),
+    path('pokemon/filters/', pokemon_filters, name='pokemon-filters'),
+    path('pokemon/cache/stats/', pokemon_cache_stats, name='pokemon-cache-stats'),
+    # Proxy y miniaturas de imágenes externas
+    path('img/', imagen_proxy, name='imagen-proxy'),
 ]
\ No newline at end of file
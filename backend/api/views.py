@@ -1,22 +1,32 @@
+import logging
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
-from django.db.models import Q
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from .models import Proyecto, Tecnologia, Producto, Contacto
-from .serializers import ProyectoSerializer, TecnologiaSerializer, ProductoSerializer, ContactoSerializer
-import threading
-import resend
-import os
-from rest_framework.decorators import api_view, action
-from rest_framework.response import Response
-from .pokemon_service import PokemonTCGService
+from .serializers import ProyectoSerializer, TecnologiaSerializer, ProductoSerializer, ContactoSerializer, campos_solicitados
+from rest_framework.decorators import api_view, action, permission_classes
+from .pokemon_service import PokemonTCGService, PAGE_SIZE, HISTORY_DAYS
+from . import pokemon_cache
+from .correo import encolar_correos_contacto
+from .pokemon_refresh import registrar_vista
+from .search import buscar_productos
+from .post_search import buscar_posts
+from . import post_cache
+from django.utils.cache import get_conditional_response
+from . import image_proxy
+from .pagination import ProductoCursorPagination, PostPagination, OrderingConDesempate
+from .throttling import ContactoIPThrottle, ContactoPostIPThrottle, ContactoPostEmailThrottle
+from rest_framework.utils.encoders import JSONEncoder
 from .models import Post
-from .serializers import PostSerializer, PostListSerializer
-from django.core.cache import cache
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from .serializers import PostSerializer, PostListSerializer, CAMPOS_POST_LISTA
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django.shortcuts import get_object_or_404
 
+logger = logging.getLogger(__name__)
+
 
 
 class ProyectoViewSet(viewsets.ReadOnlyModelViewSet):
@@ -33,132 +43,97 @@ class ProductoViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Producto.objects.all()
     serializer_class = ProductoSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProductoCursorPagination
+    filter_backends = [OrderingConDesempate]
+    ordering_fields = ['id', 'precio_venta', 'anio_desde', 'anio_hasta']
+    ordering = ['id']
 
     def get_queryset(self):
         queryset = Producto.objects.all()
         search = self.request.query_params.get('search', None)
+        precio_min = self.request.query_params.get('precio_min')
+        precio_max = self.request.query_params.get('precio_max')
         
         if search:
-            terminos = search.split()
-            q = Q()
-            
-            for termino in terminos:
-                if termino.isdigit() and len(termino) == 4:
-                    anio = int(termino)
-                    q &= Q(anio_desde__lte=anio, anio_hasta__gte=anio)
-                else:
-                    q &= (
-                        Q(descripcion__icontains=termino) |
-                        Q(marca__icontains=termino) |
-                        Q(modelo__icontains=termino) |
-                        Q(version__icontains=termino) |
-                        Q(posicion__icontains=termino) |
-                        Q(ubicacion__icontains=termino) |
-                        Q(lado__icontains=termino) |
-                        Q(proveedor__icontains=termino) |
-                        Q(marca_prod__icontains=termino)
-                    )
-            
-            queryset = queryset.filter(q)
-        
-        return queryset
-
-def enviar_correos_async(contacto):
-    """Envía correos usando Resend"""
-    resend.api_key = os.environ.get('RESEND_API_KEY', '')
-    
-    if not resend.api_key:
-        print("ERROR: RESEND_API_KEY no configurada")
-        return
-    
-    # Correo al cliente
-    try:
-        resend.Emails.send({
-            "from": "Fehu Developers <contacto@fehudevelopers.cl>",
-            "to": [contacto.correo],
-            "subject": f"Hemos recibido tu solicitud - {contacto.ticket}",
-            "text": f"""
-Hola {contacto.nombre},
-
-Gracias por contactarnos. Hemos recibido tu solicitud correctamente.
-
-Tu número de ticket es: {contacto.ticket}
-
-Detalles de tu consulta:
-{contacto.mensaje}
+            queryset = buscar_productos(queryset, search)
 
-Nos pondremos en contacto contigo a la brevedad.
+        # precio_venta es una columna generada e indexada: el filtro corre en la base de datos
+        if precio_min and precio_min.isdigit():
+            queryset = queryset.filter(precio_venta__gte=int(precio_min))
 
-Saludos,
-Fehu Developers
-            """
-        })
-        print(f"Correo enviado al cliente: {contacto.correo}")
-    except Exception as e:
-        print(f"ERROR enviando correo al cliente: {e}")
+        if precio_max and precio_max.isdigit():
+            queryset = queryset.filter(precio_venta__lte=int(precio_max))
+        
+        return queryset
 
-    # Correo al administrador
-    try:
-        resend.Emails.send({
-            "from": "Fehu Developers <contacto@fehudevelopers.cl>",
-            "to": ["fehu.developers@gmail.com"],
-            "subject": f"Nueva solicitud de contacto - {contacto.ticket}",
-            "text": f"""
-Nueva solicitud de contacto recibida:
-
-Ticket: {contacto.ticket}
-Nombre: {contacto.nombre} {contacto.apellido}
-Teléfono: {contacto.telefono}
-Correo: {contacto.correo}
-
-Mensaje:
-{contacto.mensaje}
-            """
-        })
-        print(f"Correo enviado al admin")
-    except Exception as e:
-        print(f"ERROR enviando correo al admin: {e}")
-
-    # Correo al administrador
-    try:
-        resend.Emails.send({
-            "from": "Fehu Developers <onboarding@resend.dev>",
-            "to": ["fehu.developers@gmail.com"],
-            "subject": f"Nueva solicitud de contacto - {contacto.ticket}",
-            "text": f"""
-Nueva solicitud de contacto recibida:
-
-Ticket: {contacto.ticket}
-Nombre: {contacto.nombre} {contacto.apellido}
-Teléfono: {contacto.telefono}
-Correo: {contacto.correo}
-
-Mensaje:
-{contacto.mensaje}
-            """
-        })
-        print(f"Correo enviado al admin")
-    except Exception as e:
-        print(f"ERROR enviando correo al admin: {e}")
+    @action(detail=False, methods=['get'])
+    def fitment(self, request):
+        """Repuestos compatibles con un vehículo: ?marca=&modelo=&anio="""
+        marca = request.query_params.get('marca', '').strip().upper()
+        modelo = request.query_params.get('modelo', '').strip().upper()
+        anio = request.query_params.get('anio', '').strip()
+
+        if not marca or not anio.isdigit():
+            return Response({'error': 'Se requieren marca y anio'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Igualdad exacta en marca/modelo (se guardan en mayúsculas, ver
+        # Producto.normalizar_vehiculo) para que el filtro use producto_fitment_idx
+        queryset = Producto.objects.filter(marca=marca)
+        if modelo:
+            queryset = queryset.filter(modelo=modelo)
+        queryset = queryset.filter(anio_desde__lte=int(anio), anio_hasta__gte=int(anio))
+
+        # Mismo cursor (y ?ordering=) que el listado
+        page = self.paginate_queryset(self.filter_queryset(queryset))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Exporta el catálogo (respetando ?search=) como NDJSON en streaming"""
+        try:
+            chunk_size = max(1, min(int(request.query_params.get('chunk_size', 2000)), 10000))
+        except ValueError:
+            chunk_size = 2000
+
+        queryset = self.get_queryset().order_by('id')
+        encoder = JSONEncoder(ensure_ascii=False)
+        # Un solo serializer (ya recortado por ?fields=) para todas las filas
+        serializer = self.get_serializer()
+
+        def filas():
+            for producto in queryset.iterator(chunk_size=chunk_size):
+                yield encoder.encode(serializer.to_representation(producto)) + '\n'
+
+        response = StreamingHttpResponse(filas(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="productos.ndjson"'
+        return response
 
 class ContactoViewSet(viewsets.ModelViewSet):
     queryset = Contacto.objects.all()
     serializer_class = ContactoSerializer
+    throttle_classes = [ContactoIPThrottle, ContactoPostIPThrottle, ContactoPostEmailThrottle]
+
+    def get_permissions(self):
+        # El formulario es público; leer o modificar contactos es solo para el admin
+        if self.action == 'create':
+            return [permissions.AllowAny()]
+        return [permissions.IsAdminUser()]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        contacto = serializer.save()
 
-        # Enviar correos en segundo plano
-        thread = threading.Thread(target=enviar_correos_async, args=(contacto,))
-        thread.start()
+        # Contacto y correos en la misma transacción: si se guarda el contacto, sus
+        # correos quedan en el outbox aunque el proceso muera antes de enviarlos
+        with transaction.atomic():
+            contacto = serializer.save()
+            encolar_correos_contacto(contacto)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 @api_view(['GET'])
-permission_classes = [permissions.AllowAny]
-
+@permission_classes([permissions.AllowAny])
 def pokemon_search(request):
     name = request.query_params.get('name', '')
     set_id = request.query_params.get('set', '')
@@ -166,52 +141,106 @@ def pokemon_search(request):
     rarity = request.query_params.get('rarity', '')
     
     
+    try:
+        page = int(request.query_params.get('page', 1))
+        page_size = int(request.query_params.get('page_size', PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'page y page_size deben ser números'}, status=400)
+    
+    # PokemonTCGService cachea por búsqueda normalizada antes de ir a TCGdex
     result = PokemonTCGService.search_cards(
         name=name if name else None,
         set_id=set_id if set_id else None,
         types=types if types else None,
-        rarity=rarity if rarity else None
+        rarity=rarity if rarity else None,
+        page=page,
+        page_size=page_size
     )
-
-    cached_data = cache.get(result)
-    if cached_data is None:
-        cache.set('pokemon_search_result', result, 60 * 60)  # Cache for 60 minutes
-        return Response(result)
-    return Response(cached_data)
+    return Response(result)
 
 @api_view(['GET'])
-
+@permission_classes([permissions.AllowAny])
 def pokemon_card_detail(request, card_id):
-    """Obtener detalle de una carta"""
+    """Obtener detalle de una carta (?fields=images,prices para pedir solo esas secciones)"""
     
-    card = PokemonTCGService.get_card(card_id)
+    card = PokemonTCGService.get_card(card_id, fields=campos_solicitados(request))
     if card:
+        registrar_vista(card_id)
         return Response(card)
     return Response({'error': 'Carta no encontrada'}, status=404)
 
 @api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def pokemon_card_history(request, card_id):
+    """Historial de precios de una carta (?days=90&interval=day|week|month)"""
+    try:
+        days = int(request.query_params.get('days', HISTORY_DAYS))
+    except ValueError:
+        return Response({'error': 'days debe ser un número'}, status=400)
+
+    history = PokemonTCGService.get_price_history(
+        card_id, days=days, interval=request.query_params.get('interval')
+    )
+    return Response(history)
 
+# Vistas de Django puro (sin la negociación de DRF): listas casi estáticas servidas de cache.
+# Síncronas a propósito: bajo gthread una vista async solo agrega un event loop por request
+# y un salto a otro hilo para la misma llamada bloqueante a TCGdex.
+
+@require_GET
 def pokemon_sets(request):
-    
     """Obtener todos los sets/ediciones"""
-    sets = PokemonTCGService.get_sets()
-    return Response(sets)
-
-@api_view(['GET'])
+    return JsonResponse(PokemonTCGService.get_sets(), safe=False)
 
+@require_GET
 def pokemon_rarities(request):
-    
     """Obtener todas las rarezas"""
-    rarities = PokemonTCGService.get_rarities()
-    return Response(rarities)
-
-@api_view(['GET'])
+    return JsonResponse(PokemonTCGService.get_rarities(), safe=False)
 
+@require_GET
 def pokemon_types(request):
-    
     """Obtener todos los tipos"""
-    types = PokemonTCGService.get_types()
-    return Response(types)
+    return JsonResponse(PokemonTCGService.get_types(), safe=False)
+
+@require_GET
+def pokemon_filters(request):
+    """Sets, tipos y rarezas en una sola respuesta"""
+    return JsonResponse(PokemonTCGService.get_filters())
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def pokemon_cache_stats(request):
+    """Aciertos/fallos de la cache de endpoints Pokémon"""
+    return Response(pokemon_cache.stats())
+
+@require_GET
+def imagen_proxy(request):
+    """
+    Imagen externa (cartas, productos) servida desde nuestro disco: ?url=&w=ancho.
+    Se descarga una vez; las miniaturas se generan por ancho fijo y se cachean para siempre.
+    """
+    url = request.GET.get('url', '')
+    try:
+        ancho = image_proxy.ancho_variante(int(request.GET.get('w') or 0))
+    except ValueError:
+        return JsonResponse({'error': 'w debe ser un número'}, status=400)
+
+    try:
+        ruta, content_type = image_proxy.obtener_variante(url, ancho)
+    except image_proxy.ImagenNoPermitida:
+        return JsonResponse({'error': 'Origen de imagen no permitido'}, status=403)
+    except image_proxy.ImagenInvalida as e:
+        logger.warning('Error al obtener imagen %s: %s', url, e)
+        return JsonResponse({'error': 'No se pudo obtener la imagen'}, status=502)
+
+    etag = image_proxy.etag(ruta)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(ruta, 'rb'), content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 class IsOwnerOnly(permissions.BasePermission):
     """
@@ -228,6 +257,7 @@ class IsOwnerOnly(permissions.BasePermission):
 class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
     lookup_field = 'slug'
+    pagination_class = PostPagination
 
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -253,6 +283,7 @@ class PostViewSet(viewsets.ModelViewSet):
         categoria = self.request.query_params.get('categoria')
         estado = self.request.query_params.get('estado')
         destacado = self.request.query_params.get('destacado')
+        q = self.request.query_params.get('q', '').strip()
         
         # 3. Aplicación de filtros
         if categoria:
@@ -264,14 +295,41 @@ class PostViewSet(viewsets.ModelViewSet):
         if destacado == 'true':
             queryset = queryset.filter(destacado=True)
         
-        # 4. Orden cronológico y retorno
+        # 4. El índice solo lee las columnas de la tarjeta (nunca el HTML del artículo)
+        if self.action == 'list':
+            queryset = queryset.only(*CAMPOS_POST_LISTA)
+
+        # 5. Búsqueda (?q=): ordena por relevancia; sin ella, orden cronológico
+        if q and self.action == 'list':
+            return buscar_posts(queryset, q)
         return queryset.order_by('-fecha_creacion')
     
+    def retrieve(self, request, *args, **kwargs):
+        return self._detalle_cacheado(request, kwargs[self.lookup_field])
+
     # Obtener por slug
     @action(detail=False, methods=['get'], url_path='slug/(?P<slug>[^/.]+)')
     def by_slug(self, request, slug=None):
-        queryset = self.get_queryset()
-        post = get_object_or_404(queryset, slug=slug)
-        serializer = self.get_serializer(post)
-        return Response(serializer.data)
-        return Response({'error': 'Post no encontrado'}, status=404)
\ No newline at end of file
+        return self._detalle_cacheado(request, slug)
+
+    def _detalle_cacheado(self, request, slug):
+        """
+        Detalle de un post servido desde cache (se invalida al guardar o borrar, ver signals).
+        Un GET condicional vigente responde 304 sin consultar la base ni serializar.
+        Staff (ve borradores) y ?fields= van siempre a la base.
+        """
+        usar_cache = not request.user.is_staff and 'fields' not in request.query_params
+        entrada = post_cache.obtener(slug) if usar_cache else None
+
+        if entrada is None:
+            post = get_object_or_404(self.get_queryset(), slug=slug)
+            data = self.get_serializer(post).data
+            if not usar_cache:
+                return Response(data)
+            entrada = post_cache.guardar(post, dict(data))
+
+        no_modificado = get_conditional_response(
+            request._request, etag=entrada['etag'], last_modified=entrada['last_modified']
+        )
+        response = no_modificado if no_modificado is not None else Response(entrada['data'])
+        return post_cache.encabezados(response, entrada)
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Logging de producción: registros JSON de una línea, muestreo de loggers ruidosos
+y escritura en un hilo aparte para que el I/O de logs nunca quede en el request.
+Se configura desde LOGGING en settings.
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Atributos propios de LogRecord; el resto son campos pasados con extra={...}
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro con los campos de extra={...} incluidos"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'pid': record.process,
+        }
+        for clave, valor in vars(record).items():
+            if clave in _ATRIBUTOS_RECORD or clave.startswith('_'):
+                continue
+            # django.request adjunta el HttpRequest completo: solo interesa qué se pidió
+            if clave == 'request' and hasattr(valor, 'path'):
+                valor = f'{valor.method} {valor.path}'
+            datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, default=str, ensure_ascii=False)
+
+
+class MuestreoFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción (`tasa`) de los registros hasta `nivel`;
+    los más graves pasan siempre.
+    """
+
+    def __init__(self, tasa=0.1, nivel='INFO'):
+        super().__init__()
+        self.tasa = float(tasa)
+        self.nivel = logging._checkLevel(nivel)
+
+    def filter(self, record):
+        return record.levelno > self.nivel or random.random() < self.tasa
+
+
+class ColaHandler(QueueHandler):
+    """
+    Encola el registro y vuelve de inmediato; un hilo por proceso lo formatea y lo
+    escribe en stderr. Si la cola se llena se descartan registros en vez de bloquear.
+    """
+
+    def __init__(self, capacidad=10000):
+        super().__init__(queue.Queue(maxsize=capacidad))
+        self.capacidad = capacidad
+        self.descartados = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _iniciar(self):
+        # Perezoso: no crear hilos antes del fork de gunicorn; en cada worker
+        # se crea una cola y un hilo propios
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.capacidad)
+            destino = logging.StreamHandler(sys.stderr)
+            destino.setFormatter(self.formatter)
+            self._listener = QueueListener(self.queue, destino, respect_handler_level=False)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Solo lo que no puede esperar: los args podrían cambiar después de loguear.
+        # El formateo (JSON, traceback) lo hace el hilo de escritura.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._iniciar()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+    def close(self):
+        # logging.shutdown() lo llama al salir: vacía la cola antes de terminar
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        super().close()
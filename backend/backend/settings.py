@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+import logging
 import os
+import tempfile
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -137,7 +140,11 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# STATICFILES_STORAGE ya no existe desde Django 5.1: el storage va en STORAGES
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -148,6 +155,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Token buckets de api/throttling.py: 'N/periodo' = ráfaga de N, recarga en el periodo
+    'DEFAULT_THROTTLE_RATES': {
+        'contacto': os.environ.get('THROTTLE_CONTACTO', '60/min'),
+        'contacto_post_ip': os.environ.get('THROTTLE_CONTACTO_POST_IP', '5/hour'),
+        'contacto_post_email': os.environ.get('THROTTLE_CONTACTO_POST_EMAIL', '3/hour'),
+    },
+    # Proxies delante de gunicorn (Railway pone uno): la IP del throttling se toma de
+    # X-Forwarded-For contando desde el final, así un cliente no puede inventarla.
+    # 0 = se usa REMOTE_ADDR e X-Forwarded-For se ignora
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0' if DEBUG else '1')),
 }
 
 CSRF_TRUSTED_ORIGINS = [
@@ -167,26 +184,127 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('EMAIL_HOST_USER', '')
 
+# Correos de contacto (api/correo.py): outbox en base de datos + backend pluggable
+RESEND_API_KEY = os.environ.get('RESEND_API_KEY', '')
+CORREO_BACKEND = os.environ.get('CORREO_BACKEND', 'api.correo.ResendBackend')  # api.correo.FakeBackend en pruebas
+CORREO_REMITENTE = os.environ.get('CORREO_REMITENTE', 'Fehu Developers <contacto@fehudevelopers.cl>')
+CORREO_ADMIN = os.environ.get('CORREO_ADMIN', 'fehu.developers@gmail.com')
+# Drenar el outbox también desde el proceso web (además del worker procesar_correos)
+CORREO_EN_PROCESO = os.environ.get('CORREO_EN_PROCESO', 'True') == 'True'
+
+# Cliente HTTP de TCGdex (api/pokemon_service.py)
+TCGDEX_API_URL = os.environ.get('TCGDEX_API_URL', 'https://api.tcgdex.net/v2/en')
+TCGDEX_POOL_SIZE = int(os.environ.get('TCGDEX_POOL_SIZE', 10))
+TCGDEX_RETRIES = int(os.environ.get('TCGDEX_RETRIES', 2))
+TCGDEX_BACKOFF = float(os.environ.get('TCGDEX_BACKOFF', 0.3))
+TCGDEX_CONNECT_TIMEOUT = float(os.environ.get('TCGDEX_CONNECT_TIMEOUT', 3.05))
+TCGDEX_READ_TIMEOUT = float(os.environ.get('TCGDEX_READ_TIMEOUT', 10))
+
+# Cache compartida por todos los workers. Con REDIS_URL es Redis: add() e incr()
+# atómicos entre workers y réplicas, que necesitan los locks de pokemon_cache y los
+# token buckets de throttling. Sin REDIS_URL se usa CACHE_BACKEND=archivos: un
+# directorio local por namespace (locks con flock) que comparten los workers de un
+# solo nodo, sin servicio externo. Varias réplicas necesitan Redis.
+# Subir CACHE_VERSION en un deploy invalida todas las entradas anteriores.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'archivos')
+if CACHE_BACKEND == 'redis' and not REDIS_URL:
+    raise ImproperlyConfigured('CACHE_BACKEND=redis necesita REDIS_URL')
+if CACHE_BACKEND not in ('redis', 'archivos'):
+    raise ImproperlyConfigured(f"CACHE_BACKEND debe ser 'redis' o 'archivos', no {CACHE_BACKEND!r}")
+if CACHE_BACKEND == 'archivos' and not DEBUG and 'CACHE_BACKEND' not in os.environ:
+    logging.getLogger(__name__).warning(
+        'REDIS_URL no está definida: la cache se guarda en archivos locales y solo '
+        'la comparten los workers de este nodo'
+    )
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'fehu-cache'))
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'fehu')
+CACHE_VERSION = int(os.environ.get('CACHE_VERSION', 1))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 20000))
+CACHE_NAMESPACES = ['pokemon', 'posts', 'throttle']
+
+
+def cache_config(namespace):
+    if CACHE_BACKEND == 'redis':
+        config = {'BACKEND': 'api.cache_backends.RedisCache', 'LOCATION': REDIS_URL}
+    else:
+        config = {
+            'BACKEND': 'api.cache_backends.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, namespace),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    config.update(KEY_PREFIX=f'{CACHE_KEY_PREFIX}:{namespace}', VERSION=CACHE_VERSION, NAMESPACE=namespace)
+    return config
+
+
+CACHES = {
+    # Contadores de aciertos y otros datos internos (no se cuentan como aciertos)
+    'default': cache_config('default'),
+    **{namespace: cache_config(namespace) for namespace in CACHE_NAMESPACES},
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Proxy de imágenes (api/image_proxy.py): hosts permitidos además de las imágenes de productos
+IMAGE_PROXY_HOSTS = [h.strip() for h in os.environ.get('IMAGE_PROXY_HOSTS', 'assets.tcgdex.net').split(',') if h.strip()]
+IMAGE_PROXY_MAX_BYTES = int(os.environ.get('IMAGE_PROXY_MAX_BYTES', 10 * 1024 * 1024))
+# Tamaño máximo del cache de imágenes en disco: al superarlo se borran las menos usadas
+IMAGE_PROXY_MAX_DISCO = int(os.environ.get('IMAGE_PROXY_MAX_DISCO', 1024 * 1024 * 1024))
+# Píxeles máximos (ancho x alto) de una imagen de origen: acota la memoria al decodificarla
+IMAGE_PROXY_MAX_PIXELES = int(os.environ.get('IMAGE_PROXY_MAX_PIXELES', 25_000_000))
+
+# Logging (backend/log.py): JSON de una línea en producción, texto legible con DEBUG.
+# Los registros se encolan y un hilo por proceso los escribe: el request no espera al I/O.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'texto' if DEBUG else 'json')
+# Fracción de registros INFO/DEBUG que se conserva de los loggers ruidosos
+LOG_MUESTREO = float(os.environ.get('LOG_MUESTREO', 0.1))
+# Cada consulta SQL (solo se generan con DEBUG=True)
+LOG_SQL = os.environ.get('LOG_SQL', 'False') == 'True'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'backend.log.JSONFormatter',
+        },
+        'texto': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'filters': {
+        'muestreo': {
+            '()': 'backend.log.MuestreoFilter',
+            'tasa': LOG_MUESTREO,
+        },
+    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'cola': {
+            '()': 'backend.log.ColaHandler',
+            'formatter': LOG_FORMAT,
         },
     },
     'root': {
-        'handlers': ['console'],
-        'level': 'DEBUG',
+        'handlers': ['cola'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+        },
+        'django.db.backends': {
+            'level': 'DEBUG' if LOG_SQL else 'WARNING',
+            'filters': ['muestreo'],
+        },
+        # Una línea por request en runserver
+        'django.server': {
+            'filters': ['muestreo'],
+        },
+        # Reintentos y conexiones del pool HTTP de TCGdex
+        'urllib3': {
+            'level': 'WARNING',
         },
     },
 }
\ No newline at end of file
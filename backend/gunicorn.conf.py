@@ -0,0 +1,90 @@
+"""
+Configuración de gunicorn: `gunicorn -c gunicorn.conf.py`.
+Todo se ajusta por variables de entorno sin tocar el Procfile.
+
+Modos (GUNICORN_MODO):
+- gthread (por defecto): WSGI con hilos; una llamada lenta a TCGdex o Resend
+  bloquea un hilo, no el worker completo.
+- sync: workers de un hilo, el modelo anterior (solo como referencia para benchmarks).
+"""
+import os
+import time
+
+# Para registrar cuánto tarda el arranque (se carga antes que la app)
+INICIO = time.monotonic()
+
+
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+
+def _cpus():
+    # Las CPUs asignadas al contenedor, no las del host
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+MODO = os.environ.get('GUNICORN_MODO', 'gthread')
+CPUS = _cpus()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+wsgi_app = 'backend.wsgi:application'
+worker_class = MODO
+workers = _entero('WEB_CONCURRENCY', min(CPUS * 2 + 1, _entero('GUNICORN_MAX_WORKERS', 8)))
+# Casi todo el tiempo de un request es espera de red o de base de datos
+threads = _entero('GUNICORN_THREADS', 4) if MODO == 'gthread' else 1
+
+# Importar Django una vez en el master: los workers comparten esa memoria (copy-on-write)
+# y un error de importación tumba el arranque en vez de cada worker por separado
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Reciclar workers cada ~1000 requests acota fugas de memoria; el jitter evita
+# que todos se reinicien a la vez
+max_requests = _entero('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _entero('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Mayor que el timeout de lectura de TCGdex (10 s) más sus reintentos
+timeout = _entero('GUNICORN_TIMEOUT', 60)
+# Tiempo para terminar los requests en curso en un deploy o reciclaje
+graceful_timeout = _entero('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _entero('GUNICORN_KEEPALIVE', 5)
+
+# El heartbeat de los workers en memoria y no en disco (evita bloqueos en contenedores)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+
+def post_fork(server, worker):
+    worker.inicio = time.monotonic()
+    # Con preload_app el worker hereda el estado del master: ninguna conexión abierta
+    # antes del fork se debe compartir entre procesos
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s listo en %.0f ms', worker.pid, (time.monotonic() - worker.inicio) * 1000)
+
+
+def when_ready(server):
+    server.log.info(
+        'Modo %s: %s workers x %s hilos (%s CPUs), preload=%s; escuchando a los %.0f ms del arranque',
+        MODO, server.cfg.workers, server.cfg.threads, CPUS, server.cfg.preload_app,
+        (time.monotonic() - INICIO) * 1000,
+    )
+    cache_backend = os.environ.get('CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'archivos')
+    if server.cfg.workers > 1 and cache_backend == 'archivos':
+        server.log.warning(
+            'Cache en archivos locales: los %s workers de este nodo la comparten, pero otras '
+            'réplicas no (locks, throttling y contadores quedan por nodo). Para varias réplicas, REDIS_URL',
+            server.cfg.workers,
+        )
@@ -1,4 +1,5 @@
 import { useCart } from '../context/CartContext'
+import { imagenProxy } from '../services/api'
 
 function Cart({ isOpen, onClose }) {
   const { cart, removeFromCart, clearCart, cartTotal } = useCart()
@@ -40,7 +41,7 @@ function Cart({ isOpen, onClose }) {
                   <div key={item.id} className="flex gap-4 border-b border-gray-200 dark:border-gray-700 pb-4">
                     <div className="w-16 h-16 bg-gray-100 dark:bg-gray-800 rounded flex items-center justify-center shrink-0">
                       {item.imagen0 ? (
-                        <img src={item.imagen0} alt={item.nombre_completo} className="w-full h-full object-contain" />
+                        <img src={imagenProxy(item.imagen0, 96)} alt={item.nombre_completo} className="w-full h-full object-contain" />
                       ) : (
                         <span>📷</span>
                       )}
@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import { useCart } from '../context/CartContext'
+import { imagenProxy } from '../services/api'
 
 function ProductCard({ producto }) {
   const [imagenActual, setImagenActual] = useState(0)
@@ -50,7 +51,7 @@ function ProductCard({ producto }) {
       <div className="relative h-48 bg-gray-100 dark:bg-gray-800 flex items-center justify-center">
         {imagenes.length > 0 ? (
           <img 
-            src={imagenes[imagenActual]} 
+            src={imagenProxy(imagenes[imagenActual], 480)} 
             alt={producto.nombre_completo}
             className="h-full w-full object-contain"
           />
@@ -1,3 +1,5 @@
+import { imagenProxy } from '../../services/api'
+
 function PokemonCard({ card, onClick }) {
   return (
     <div
@@ -8,7 +10,7 @@ function PokemonCard({ card, onClick }) {
         <div className="aspect-[2.5/3.5] overflow-hidden bg-gray-100 dark:bg-gray-700">
           {card.image_small ? (
             <img
-              src={card.image_small}
+              src={imagenProxy(card.image_small, 245)}
               alt={card.name}
               className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
               loading="lazy"
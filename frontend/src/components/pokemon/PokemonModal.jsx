@@ -1,4 +1,5 @@
 import { useEffect } from 'react'
+import { imagenProxy } from '../../services/api'
 
 function PokemonModal({ card, onClose }) {
   useEffect(() => {
@@ -50,7 +51,7 @@ function PokemonModal({ card, onClose }) {
           <div className="flex justify-center">
             {card.images?.large ? (
               <img
-                src={card.images.large}
+                src={imagenProxy(card.images.large, 640)}
                 alt={card.name}
                 className="max-w-full h-auto rounded-xl shadow-lg"
               />
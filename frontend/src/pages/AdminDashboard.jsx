@@ -32,21 +32,35 @@ const AdminDashboard = () => {
     const token = localStorage.getItem('access_token');
     
     try {
-      const response = await fetch(`${API_URL}/api/posts/`, {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      // El listado está paginado (máximo 100 por página): se piden páginas hasta que
+      // `next` sea null. Se avanza por número de página y no con la URL absoluta de `next`
+      const todos = [];
+      for (let pagina = 1; ; pagina++) {
+        const response = await fetch(`${API_URL}/api/posts/?page_size=100&page=${pagina}`, {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (response.status === 401) {
+          setError("Sesión expirada. Por favor, vuelve a iniciar sesión.");
+          return;
+        }
+        if (!response.ok) {
+          setError("No se pudieron cargar los artículos.");
+          return;
         }
-      });
 
-      if (response.ok) {
         const data = await response.json();
-        setPosts(Array.isArray(data) ? data : (data.results || []));
-      } else if (response.status === 401) {
-        setError("Sesión expirada. Por favor, vuelve a iniciar sesión.");
-      } else {
-        setError("No se pudieron cargar los artículos.");
+        if (Array.isArray(data)) {
+          todos.push(...data);
+          break;
+        }
+        todos.push(...(data.results || []));
+        if (!data.next) break;
       }
+      setPosts(todos);
     } catch (err) {
       setError("Error de conexión con el servidor.");
     } finally {
@@ -68,10 +82,20 @@ const AdminDashboard = () => {
     }
   };
 
-  const handleEditClick = (post) => {
-    setPostToEdit(post);
-    setShowEditor(true);
-    window.scrollTo(0, 0);
+  const handleEditClick = async (post) => {
+    // El listado no trae el contenido ni los campos SEO: se pide el artículo completo
+    const token = localStorage.getItem('access_token');
+    try {
+      const response = await fetch(`${API_URL}/api/posts/${post.slug}/`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (!response.ok) throw new Error();
+      setPostToEdit(await response.json());
+      setShowEditor(true);
+      window.scrollTo(0, 0);
+    } catch (err) {
+      alert("No se pudo cargar el artículo.");
+    }
   };
 
   return (
@@ -13,6 +13,12 @@ function Blog() {
   const [posts, setPosts] = useState([])
   const [loading, setLoading] = useState(true)
   const [categoriaActiva, setCategoriaActiva] = useState('')
+  const [busqueda, setBusqueda] = useState('')
+  const [q, setQ] = useState('')
+  // Paginación del backend (PostPagination): página cargada y si quedan más
+  const [pagina, setPagina] = useState(1)
+  const [hayMas, setHayMas] = useState(false)
+  const [cargandoMas, setCargandoMas] = useState(false)
 
   const getImgBBUrl = (url) => {
     // Si la URL es nula o no es string, usamos un placeholder para que el 'src' no desaparezca
@@ -20,24 +26,30 @@ function Blog() {
     return url.trim().replace('http://', 'https://');
   };
 
+  const urlPagina = (numero) => {
+    const params = new URLSearchParams();
+    if (categoriaActiva) params.append('categoria', categoriaActiva);
+    if (q) params.append('q', q);
+    if (numero > 1) params.append('page', numero);
+    return `${API_URL}/api/posts/${params.toString() ? `?${params.toString()}` : ''}`;
+  };
+
+  const fetchPagina = async (numero) => {
+    const response = await fetch(urlPagina(numero))
+    if (!response.ok) throw new Error('Error al obtener posts')
+    const data = await response.json()
+    if (Array.isArray(data)) return { results: data, next: null }
+    return { results: data.results || [], next: data.next }
+  };
+
   useEffect(() => {
     const fetchPosts = async () => {
       setLoading(true)
       try {
-        const params = new URLSearchParams();
-        if (categoriaActiva) params.append('categoria', categoriaActiva);
-        const url = `${API_URL}/api/posts/${params.toString() ? `?${params.toString()}` : ''}`;
-        
-        const response = await fetch(url)
-        if (response.ok) {
-          const data = await response.json()
-          const results = Array.isArray(data) ? data : (data.results || [])
-          
-          // Debug para ver qué campos trae el objeto
-          console.log("Datos del primer post:", results[0]); 
-          
-          setPosts(results)
-        }
+        const { results, next } = await fetchPagina(1)
+        setPosts(results)
+        setPagina(1)
+        setHayMas(Boolean(next))
       } catch (error) {
         console.error('Error:', error)
       } finally {
@@ -45,7 +57,22 @@ function Blog() {
       }
     }
     fetchPosts()
-  }, [categoriaActiva])
+  }, [categoriaActiva, q])
+
+  const cargarMas = async () => {
+    setCargandoMas(true)
+    try {
+      const { results, next } = await fetchPagina(pagina + 1)
+      // Si se publicó un post entre páginas, el corrimiento repetiría el último
+      setPosts(prev => [...prev, ...results.filter(r => !prev.some(p => p.id === r.id))])
+      setPagina(pagina + 1)
+      setHayMas(Boolean(next))
+    } catch (error) {
+      console.error('Error:', error)
+    } finally {
+      setCargandoMas(false)
+    }
+  }
 
   const destacado = posts.find(p => p.destacado) || posts[0]
   const otrosPosts = destacado ? posts.filter(p => p.id !== destacado.id) : posts
@@ -54,12 +81,25 @@ function Blog() {
     <PageLayout>
       <div className="min-h-screen bg-white dark:bg-black transition-colors duration-300">
         <div className="max-w-7xl mx-auto px-4 py-12">
-          
+          <form
+            onSubmit={(e) => { e.preventDefault(); setQ(busqueda.trim()) }}
+            className="relative max-w-xl mb-12"
+          >
+            <Search className="absolute left-4 top-1/2 -translate-y-1/2 text-gray-400" size={18} />
+            <input
+              type="search"
+              value={busqueda}
+              onChange={(e) => { setBusqueda(e.target.value); if (!e.target.value) setQ('') }}
+              placeholder="Buscar artículos..."
+              className="w-full pl-11 pr-4 py-3 rounded-2xl border dark:border-gray-800 bg-gray-50 dark:bg-gray-900 text-gray-900 dark:text-white focus:outline-none focus:ring-2 focus:ring-blue-600"
+            />
+          </form>
+
           {loading ? (
             <div className="flex justify-center py-20"><Loader2 className="animate-spin text-blue-600" size={48} /></div>
           ) : (
             <>
-              {destacado && !categoriaActiva && (
+              {destacado && !categoriaActiva && !q && (
                 <Link to={`/blog/${destacado.slug}`} className="block mb-16 group">
                   <div className="overflow-hidden rounded-[32px] bg-gray-50 dark:bg-gray-900 border dark:border-gray-800 shadow-2xl">
                     <div className="grid md:grid-cols-2">
@@ -76,7 +116,7 @@ function Blog() {
                       </div>
                       <div className="p-8 md:p-12 flex flex-col justify-center">
                         <h2 className="text-3xl md:text-5xl font-black text-gray-900 dark:text-white">{destacado.titulo}</h2>
-                        <p className="text-gray-600 dark:text-gray-400 mt-6 line-clamp-3">{destacado.resumen}</p>
+                        <p className="text-gray-600 dark:text-gray-400 mt-6 line-clamp-3">{destacado.resumen || destacado.extracto}</p>
                       </div>
                     </div>
                   </div>
@@ -84,7 +124,7 @@ function Blog() {
               )}
 
               <div className="grid gap-8 md:grid-cols-2 lg:grid-cols-3">
-                {(categoriaActiva ? posts : otrosPosts).map((post) => (
+                {(categoriaActiva || q ? posts : otrosPosts).map((post) => (
                   <Link key={post.id} to={`/blog/${post.slug}`} className="group">
                     <article className="flex flex-col h-full bg-white dark:bg-gray-900 rounded-3xl overflow-hidden border dark:border-gray-800 hover:shadow-xl transition-all">
                       <div className="relative h-56 bg-gray-200 dark:bg-gray-800">
@@ -98,12 +138,36 @@ function Blog() {
                       </div>
                       <div className="p-6 flex flex-col flex-grow">
                         <h3 className="text-xl font-bold text-gray-900 dark:text-white">{post.titulo}</h3>
-                        <p className="text-gray-600 dark:text-gray-400 text-sm mt-3 line-clamp-3">{post.resumen}</p>
+                        {post.resaltado ? (
+                          // El backend escapa el fragmento; solo agrega las etiquetas <mark>
+                          <p
+                            className="text-gray-600 dark:text-gray-400 text-sm mt-3 line-clamp-3 [&_mark]:bg-yellow-200 dark:[&_mark]:bg-yellow-700 dark:[&_mark]:text-white"
+                            dangerouslySetInnerHTML={{ __html: post.resaltado }}
+                          />
+                        ) : (
+                          <p className="text-gray-600 dark:text-gray-400 text-sm mt-3 line-clamp-3">{post.resumen || post.extracto}</p>
+                        )}
+                        {post.tiempo_lectura && (
+                          <p className="text-xs text-gray-400 mt-auto pt-4">{post.tiempo_lectura} min de lectura</p>
+                        )}
                       </div>
                     </article>
                   </Link>
                 ))}
               </div>
+
+              {hayMas && (
+                <div className="flex justify-center mt-12">
+                  <button
+                    onClick={cargarMas}
+                    disabled={cargandoMas}
+                    className="inline-flex items-center gap-2 px-8 py-3 rounded-2xl bg-blue-600 text-white font-semibold hover:bg-blue-700 transition-colors disabled:opacity-50"
+                  >
+                    {cargandoMas && <Loader2 className="animate-spin" size={18} />}
+                    {cargandoMas ? 'Cargando...' : 'Cargar más artículos'}
+                  </button>
+                </div>
+              )}
             </>
           )}
         </div>
@@ -20,6 +20,10 @@ function Pokemon() {
     rarity: ''
   })
   const [selectedCard, setSelectedCard] = useState(null)
+  const [page, setPage] = useState(1)
+  const [totalPages, setTotalPages] = useState(0)
+  const [totalCount, setTotalCount] = useState(0)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   const [sets, setSets] = useState([])
   const [types, setTypes] = useState([])
@@ -28,15 +32,13 @@ function Pokemon() {
   useEffect(() => {
     const loadFilters = async () => {
       try {
-        const [setsRes, typesRes, raritiesRes] = await Promise.all([
-          fetch(`${API_URL}/api/pokemon/sets/`),
-          fetch(`${API_URL}/api/pokemon/types/`),
-          fetch(`${API_URL}/api/pokemon/rarities/`)
-        ])
+        // Un solo endpoint: el backend consulta sets, tipos y rarezas en paralelo
+        const response = await fetch(`${API_URL}/api/pokemon/filters/`)
+        const data = await response.json()
         
-        setSets(await setsRes.json())
-        setTypes(await typesRes.json())
-        setRarities(await raritiesRes.json())
+        setSets(data.sets || [])
+        setTypes(data.types || [])
+        setRarities(data.rarities || [])
       } catch (error) {
         console.error('Error cargando filtros:', error)
       }
@@ -44,26 +46,31 @@ function Pokemon() {
     loadFilters()
   }, [])
 
-  const searchCards = async () => {
+  const searchCards = async (pageToLoad = 1) => {
     if (!search && !filters.set && !filters.types && !filters.rarity) return
     
-    setLoading(true)
+    const append = pageToLoad > 1
+    append ? setLoadingMore(true) : setLoading(true)
     try {
       const params = new URLSearchParams()
       if (search) params.append('name', search)
       if (filters.set) params.append('set', filters.set)
       if (filters.types) params.append('types', filters.types)
       if (filters.rarity) params.append('rarity', filters.rarity)
+      params.append('page', pageToLoad)
 
       const response = await fetch(`${API_URL}/api/pokemon/search/?${params}`)
       const data = await response.json()
       
-      setCards(data.cards || [])
+      setCards(prev => append ? [...prev, ...(data.cards || [])] : (data.cards || []))
+      setPage(data.page || pageToLoad)
+      setTotalPages(data.totalPages || 0)
+      setTotalCount(data.totalCount || 0)
     } catch (error) {
       console.error('Error buscando cartas:', error)
-      setCards([])
+      if (!append) setCards([])
     } finally {
-      setLoading(false)
+      append ? setLoadingMore(false) : setLoading(false)
     }
   }
 
@@ -131,7 +138,7 @@ function Pokemon() {
 
       {cards.length > 0 && (
         <p className="text-gray-600 dark:text-gray-400 mb-4">
-          {cards.length} cartas encontradas
+          {totalCount} cartas encontradas
         </p>
       )}
 
@@ -166,6 +173,18 @@ function Pokemon() {
         </div>
       )}
 
+      {!loading && page < totalPages && (
+        <div className="flex justify-center mt-8">
+          <button
+            onClick={() => searchCards(page + 1)}
+            disabled={loadingMore}
+            className="px-8 py-3 bg-gray-100 dark:bg-gray-800 rounded-xl font-medium hover:bg-gray-200 dark:hover:bg-gray-700 transition disabled:opacity-50"
+          >
+            {loadingMore ? 'Cargando...' : 'Cargar más'}
+          </button>
+        </div>
+      )}
+
       <PokemonModal
         card={selectedCard}
         onClose={() => setSelectedCard(null)}
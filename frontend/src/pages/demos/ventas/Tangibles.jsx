@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { getProductos } from '../../../services/api'
+import { getProductos, imagenProxy } from '../../../services/api'
 import { useCart } from '../../../context/CartContext'
 import DemoLayout from '../../../components/DemoLayout'
 import Cart from '../../../components/Cart'
@@ -46,7 +46,7 @@ function ProductCard({ producto, tema }) {
       <div className="relative h-52 bg-gradient-to-br from-orange-100/50 to-amber-100/50 dark:from-orange-900/20 dark:to-amber-900/20 flex items-center justify-center overflow-hidden">
         {imagenes.length > 0 ? (
           <img 
-            src={imagenes[imagenActual]} 
+            src={imagenProxy(imagenes[imagenActual], 480)} 
             alt={producto.nombre_completo}
             className="h-full w-full object-contain p-4 group-hover:scale-110 transition-transform duration-500"
           />
@@ -133,6 +133,8 @@ function ProductCard({ producto, tema }) {
 function Tangibles() {
   const [productos, setProductos] = useState([])
   const [loading, setLoading] = useState(true)
+  const [siguiente, setSiguiente] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [search, setSearch] = useState('')
   const [cartOpen, setCartOpen] = useState(false)
   const { cartCount } = useCart()
@@ -144,8 +146,9 @@ function Tangibles() {
   const fetchProductos = async (termino = '') => {
     setLoading(true)
     try {
-      const data = await getProductos(termino)
-      setProductos(data)
+      const { productos, next } = await getProductos(termino)
+      setProductos(productos)
+      setSiguiente(next)
     } catch (error) {
       console.error('Error:', error)
     } finally {
@@ -153,6 +156,20 @@ function Tangibles() {
     }
   }
 
+  const cargarMas = async () => {
+    if (!siguiente) return
+    setLoadingMore(true)
+    try {
+      const { productos, next } = await getProductos('', siguiente)
+      setProductos(prev => [...prev, ...productos])
+      setSiguiente(next)
+    } catch (error) {
+      console.error('Error:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleSearch = (e) => {
     e.preventDefault()
     fetchProductos(search)
@@ -225,13 +242,24 @@ function Tangibles() {
           ) : (
             <>
               <p className={`${tema.textMuted} text-sm`}>
-                Mostrando {productos.length} productos
+                Mostrando {productos.length} productos{siguiente ? ' (hay más)' : ''}
               </p>
               <div className="grid gap-6 grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
                 {productos.map(producto => (
                   <ProductCard key={producto.id} producto={producto} tema={tema} />
                 ))}
               </div>
+              {siguiente && (
+                <div className="flex justify-center">
+                  <button
+                    onClick={cargarMas}
+                    disabled={loadingMore}
+                    className={`px-8 py-3 ${tema.btnSecondary} rounded-xl font-semibold transition-all duration-300 disabled:opacity-50`}
+                  >
+                    {loadingMore ? 'Cargando...' : 'Cargar más'}
+                  </button>
+                </div>
+              )}
             </>
           )}
 
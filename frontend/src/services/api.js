@@ -12,13 +12,39 @@ export async function getTecnologias() {
   return res.json()
 }
 
-export async function getProductos(search = '') {
-  const url = search 
+// Una página del catálogo: { productos, next }. `next` es la URL de la página
+// siguiente (cursor) o null si no hay más
+export async function getProductos(search = '', next = null) {
+  // next es absoluto y, detrás del proxy TLS, puede venir como http://: solo se usa su cursor
+  const url = next ? `${API_URL}/api/productos/${new URL(next).search}` : (search
     ? `${API_URL}/api/productos/?search=${encodeURIComponent(search)}`
-    : `${API_URL}/api/productos/`
+    : `${API_URL}/api/productos/`)
   const res = await fetch(url)
   if (!res.ok) throw new Error('Error al obtener productos')
-  return res.json()
+  const data = await res.json()
+  if (Array.isArray(data)) return { productos: data, next: null }
+  return { productos: data.results || [], next: data.next || null }
+}
+
+// URL de una imagen externa servida por el proxy del backend; ancho = miniatura en px
+export function imagenProxy(url, ancho) {
+  if (!url) return url
+  const params = new URLSearchParams({ url })
+  if (ancho) params.append('w', ancho)
+  return `${API_URL}/api/img/?${params}`
+}
+
+// Repuestos compatibles con un vehículo, por páginas como getProductos: { productos, next }
+export async function getFitment(marca, modelo = '', anio, next = null) {
+  const params = new URLSearchParams({ marca, anio })
+  if (modelo) params.append('modelo', modelo)
+  const url = next
+    ? `${API_URL}/api/productos/fitment/${new URL(next).search}`
+    : `${API_URL}/api/productos/fitment/?${params}`
+  const res = await fetch(url)
+  if (!res.ok) throw new Error('Error al obtener repuestos compatibles')
+  const data = await res.json()
+  return { productos: data.results || [], next: data.next || null }
 }
 
 export async function enviarContacto(datos) {